@@ -0,0 +1,106 @@
+/*
+ * Copyright (C) 2024 David V
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program. If not, see <https://www.gnu.org/licenses/>.
+ */
+
+package dev.davidv.translator
+
+import kotlinx.serialization.Serializable
+import kotlinx.serialization.json.Json
+
+@Serializable
+data class LanguageEntry(
+  val tessName: String,
+  val name: String,
+  val script: String,
+  val size: Int,
+  val tessdataSize: Int,
+)
+
+@Serializable
+data class CatalogFile(
+  val name: String,
+  val size: Int,
+)
+
+@Serializable
+data class DirectionEntry(
+  val model: CatalogFile,
+  val srcVocab: CatalogFile,
+  val tgtVocab: CatalogFile,
+  val lex: CatalogFile,
+  val quality: String,
+)
+
+@Serializable
+data class CatalogData(
+  val version: Int,
+  val commit: String,
+  val languages: Map<String, LanguageEntry>,
+  val fromEnglish: Map<String, DirectionEntry>,
+  val toEnglish: Map<String, DirectionEntry>,
+  val extraFiles: Map<String, List<String>>,
+)
+
+// Sizes, filenames and qualities of every language, generated by generate.py
+// into catalog.json (bundled as a resource) and only parsed on first use.
+object LanguageCatalog {
+  // Absolute, so it still resolves once R8 has moved this class around
+  private const val RESOURCE = "/dev/davidv/translator/catalog.json"
+  private val json = Json { ignoreUnknownKeys = true }
+
+  val data: CatalogData by lazy {
+    val stream =
+      LanguageCatalog::class.java.getResourceAsStream(RESOURCE)
+        ?: throw IllegalStateException("$RESOURCE is missing from the package")
+    stream.bufferedReader().use { parse(it.readText()) }
+  }
+
+  internal fun parse(text: String): CatalogData {
+    val catalog = json.decodeFromString<CatalogData>(text)
+    check(catalog.version == Constants.CATALOG_VERSION) {
+      "$RESOURCE has version ${catalog.version}, expected ${Constants.CATALOG_VERSION}"
+    }
+    return catalog
+  }
+
+  fun language(language: Language): LanguageEntry =
+    data.languages[language.code] ?: throw IllegalStateException("${language.code} is missing from $RESOURCE")
+
+  internal fun files(directions: Map<String, DirectionEntry>): Map<Language, LanguageFiles> {
+    val modelTypes = ModelType.entries.associateBy { it.toString() }
+    return Language.entries
+      .mapNotNull { lang ->
+        directions[lang.code]?.let { entry ->
+          lang to
+            LanguageFiles(
+              Pair(entry.model.name, entry.model.size),
+              Pair(entry.srcVocab.name, entry.srcVocab.size),
+              Pair(entry.tgtVocab.name, entry.tgtVocab.size),
+              Pair(entry.lex.name, entry.lex.size),
+              modelTypes.getValue(entry.quality),
+            )
+        }
+      }.toMap()
+  }
+}
+
+val fromEnglishFiles: Map<Language, LanguageFiles> by lazy { LanguageCatalog.files(LanguageCatalog.data.fromEnglish) }
+
+val toEnglishFiles: Map<Language, LanguageFiles> by lazy { LanguageCatalog.files(LanguageCatalog.data.toEnglish) }
+
+val extraFiles: Map<Language, List<String>> by lazy {
+  Language.entries.mapNotNull { lang -> LanguageCatalog.data.extraFiles[lang.code]?.let { lang to it } }.toMap()
+}
@@ -0,0 +1,52 @@
+/*
+ * Copyright (C) 2024 David V
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program. If not, see <https://www.gnu.org/licenses/>.
+ */
+
+package dev.davidv.translator
+
+import org.junit.Assert.assertEquals
+import org.junit.Assert.assertThrows
+import org.junit.Test
+
+class LanguageCatalogTest {
+  @Test
+  fun `bundled catalog loads`() {
+    assertEquals(Constants.CATALOG_VERSION, LanguageCatalog.data.version)
+    assertEquals("Spanish", LanguageCatalog.language(Language.SPANISH).name)
+    assertEquals("spa", LanguageCatalog.language(Language.SPANISH).tessName)
+  }
+
+  @Test
+  fun `bundled catalog has Spanish in both directions`() {
+    val files = fromEnglishFiles.getValue(Language.SPANISH)
+    assertEquals("model.enes.intgemm.alphas.bin", files.model.first)
+    assertEquals("vocab.enes.spm", files.srcVocab.first)
+    assertEquals("lex.50.50.enes.s2t.bin", files.lex.first)
+    assertEquals(LanguageCatalog.data.fromEnglish.getValue("es").quality, files.quality.toString())
+    assertEquals("vocab.esen.spm", toEnglishFiles.getValue(Language.SPANISH).srcVocab.first)
+  }
+
+  @Test
+  fun `unsupported catalog version is rejected`() {
+    val text =
+      LanguageCatalog::class.java
+        .getResourceAsStream("/dev/davidv/translator/catalog.json")!!
+        .bufferedReader()
+        .use { it.readText() }
+    val newer = text.replaceFirst("\"version\":${Constants.CATALOG_VERSION}", "\"version\":${Constants.CATALOG_VERSION + 1}")
+    assertThrows(IllegalStateException::class.java) { LanguageCatalog.parse(newer) }
+  }
+}
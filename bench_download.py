@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Benchmark the download and size-lookup paths against a local stand-in for
+the model, tessdata and dictionary servers.
+
+The stand-in serves synthetic files at the same URL layout as
+TRANSLATION_BASE_URL, TESSERACT_BASE_URL and DICTIONARY_BASE_URL, sized
+after data/<COMMIT>.json. Models are valid (stored, i.e. incompressible) gzip
+streams, so download.py decompresses them like real ones. Latency before
+every response and a per-connection bandwidth cap can be injected, and the
+stand-in answers Range and If-Range requests with an ETag per file version.
+
+Each code path runs in its own process so peak RSS is measured per path.
+Results are printed, and written as JSON with --output.
+
+With --check-resume, nothing is benchmarked: download.py's resume paths are
+run against the stand-in instead (a connection dropped partway, a file that
+changed since its .part was written, a .part longer than the file), and the
+run fails if any of them doesn't end with the right file.
+
+Usage: python bench_download.py [<lang> ...] [--paths download,download-serial,sizes]
+                                [--latency-ms 50] [--bandwidth-mbps 20] [--scale 0.1] [--output bench.json]
+       python bench_download.py --check-resume
+"""
+import generate
+from models_catalog import ModelsCatalog
+import argparse
+import contextlib
+import gzip
+import hashlib
+import io
+import json
+import platform
+import resource
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+DEFAULT_LANGUAGES = ['de', 'es', 'fr', 'ja', 'nl']
+DEFAULT_SIZE = 1024 * 1024  # for files missing from the sizes file
+PATTERN_SIZE = 64 * 1024
+STORED_BLOCK = 65535  # largest deflate stored block
+# The model --check-resume downloads, and its size on the wire
+RESUME_FILE = "model.enxx.intgemm.alphas.bin"
+RESUME_SIZE = 3 * 1024 * 1024
+
+PATHS = {
+    'download': "download.execute_plan() with --jobs parallel connections",
+    'download-serial': "download.execute_plan() with a single connection",
+    'sizes': "generate.get_language_sizes() for one language after another",
+    'sizes-batched': "generate.resolve_sizes() over every language at once",
+}
+
+def _pattern(name: str) -> bytes:
+    """Incompressible bytes, different (but reproducible) for every file."""
+    seed = zlib.crc32(name.encode())
+    return b"".join(struct.pack("<Q", (seed + i) * 0x9E3779B97F4A7C15 % 2 ** 64) for i in range(PATTERN_SIZE // 8))
+
+def _repeat(pattern: bytes, size: int) -> Iterator[bytes]:
+    while size > 0:
+        chunk = pattern[:size]
+        size -= len(chunk)
+        yield chunk
+
+def _skip(chunks: Iterator[bytes], offset: int) -> Iterator[bytes]:
+    """`chunks` without their first `offset` bytes."""
+    for chunk in chunks:
+        if offset >= len(chunk):
+            offset -= len(chunk)
+            continue
+        yield chunk[offset:]
+        offset = 0
+
+def synthetic_gz_payload(size: int) -> int:
+    """Uncompressed size of a synthetic gz file that is exactly `size` bytes on the wire."""
+    blocks = max(1, -(-(size - 18) // (STORED_BLOCK + 5)))
+    return max(0, size - 18 - 5 * blocks)
+
+def synthetic_gz(name: str, size: int) -> Iterator[bytes]:
+    """
+    A gzip stream made of stored deflate blocks: 10 bytes of header, 5 per
+    block, 8 of trailer, so its length can be picked exactly.
+    """
+    payload = synthetic_gz_payload(size)
+    yield b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+    crc = 0
+    remaining = payload
+    pattern = _pattern(name)
+    while True:
+        block = min(remaining, STORED_BLOCK)
+        remaining -= block
+        yield struct.pack("<BHH", 1 if remaining == 0 else 0, block, block ^ 0xFFFF)
+        for chunk in _repeat(pattern, block):
+            crc = zlib.crc32(chunk, crc)
+            yield chunk
+        if remaining == 0:
+            break
+    yield struct.pack("<II", crc, payload & 0xFFFFFFFF)
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Serves /models/<quality>/<pair>/<file>.gz, /tessdata/<file> and
+    /dictionaries/extra/<file>, counting requests and bytes sent. With
+    `drop_after`, the first GET of every file is cut off after that many
+    bytes of body, like a dropped connection. Bumping a file's entry in
+    `versions` changes its contents and ETag.
+    """
+    daemon_threads = True
+
+    def __init__(self, sizes: Dict[str, int], latency: float = 0.0, bandwidth: Optional[float] = None,
+                 drop_after: Optional[int] = None):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.sizes = sizes
+        self.latency = latency
+        self.bandwidth = bandwidth  # bytes per second per connection
+        self.drop_after = drop_after
+        self.versions: Dict[str, int] = {}
+        self.dropped = set()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.range_requests = 0
+        self.bytes_sent = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = 0
+            self.range_requests = 0
+            self.bytes_sent = 0
+
+    def content_key(self, filename: str) -> str:
+        """What the contents of `filename` are generated from; changes with its version."""
+        version = self.versions.get(filename, 0)
+        return f"{filename}@{version}" if version else filename
+
+    def contents(self, filename: str, compressed: bool) -> Iterator[bytes]:
+        size = self.sizes.get(filename, DEFAULT_SIZE)
+        key = self.content_key(filename)
+        return synthetic_gz(key, size) if compressed else _repeat(_pattern(key), size)
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StandInServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        """(filename, size, body) of the requested file; filename is None if there is none."""
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if parts[0] == "models" and len(parts) == 4 and parts[3].endswith(".gz"):
+            filename = parts[3][:-len(".gz")]
+            return filename, self.server.sizes.get(filename, DEFAULT_SIZE), self.server.contents(filename, compressed=True)
+        if (parts[0] == "tessdata" and len(parts) == 2) or (parts[:2] == ["dictionaries", "extra"] and len(parts) == 3):
+            filename = parts[-1]
+            return filename, self.server.sizes.get(filename, DEFAULT_SIZE), self.server.contents(filename, compressed=False)
+        return None, None, None
+
+    def _range_start(self, size: int, etag: str) -> Optional[int]:
+        """The offset of a `Range: bytes=<start>-` request to honour, None for the whole file."""
+        requested = self.headers.get("Range", "")
+        if not requested.startswith("bytes=") or not requested.endswith("-"):
+            return None
+        if self.headers.get("If-Range", etag) != etag:
+            # Changed since the client's copy; send all of it
+            return None
+        return int(requested[len("bytes="):-1])
+
+    def _respond(self, send_body: bool):
+        with self.server.lock:
+            self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        filename, size, body = self._body()
+        if filename is None:
+            self.send_error(404)
+            return
+        etag = f'"{self.server.content_key(filename)}"'
+        start = self._range_start(size, etag)
+        if "Range" in self.headers:
+            with self.server.lock:
+                self.server.range_requests += 1
+        if start is not None and start >= size:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200 if start is None else 206)
+        if start is not None:
+            self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+            body = _skip(body, start)
+        self.send_header("Content-Length", str(size - (start or 0)))
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("ETag", etag)
+        self.end_headers()
+        if not send_body:
+            return
+
+        limit = None
+        if self.server.drop_after is not None:
+            with self.server.lock:
+                if filename not in self.server.dropped:
+                    self.server.dropped.add(filename)
+                    limit = self.server.drop_after
+        started = time.monotonic()
+        sent = 0
+        for chunk in body:
+            if limit is not None and sent + len(chunk) >= limit:
+                self.wfile.write(chunk[:limit - sent])
+                sent = limit
+                # Hang up with the rest of the body unsent
+                self.close_connection = True
+                break
+            self.wfile.write(chunk)
+            sent += len(chunk)
+            if self.server.bandwidth:
+                ahead = sent / self.server.bandwidth - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+        with self.server.lock:
+            self.server.bytes_sent += sent
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+def load_sizes(sizes_path: Path, scale: float) -> Dict[str, int]:
+    """Flatten a data/<commit>.json sizes file into filename -> size."""
+    with open(sizes_path, 'r') as f:
+        sizes = json.load(f)
+    return {
+        filename: max(1, int(size * scale))
+        for lang_sizes in sizes.values()
+        for filename, size in lang_sizes.items()
+    }
+
+def default_sizes_path() -> Path:
+    """data/<COMMIT>.json, or the newest sizes file if that one hasn't been generated."""
+    sizes_path = Path(__file__).parent / "data" / f"{generate.COMMIT}.json"
+    if sizes_path.exists():
+        return sizes_path
+    candidates = sorted((Path(__file__).parent / "data").glob("*.json"), key=lambda p: p.stat().st_mtime)
+    if not candidates:
+        print(f"Error: {sizes_path} does not exist, pass --sizes")
+        sys.exit(1)
+    print(f"Note: {sizes_path.name} not found, using sizes from {candidates[-1].name}")
+    return candidates[-1]
+
+def language_pairs_for(languages: List[str]) -> Dict[str, set]:
+    """Pretend every language has a base model in both directions."""
+    pairs = {quality: set() for quality in generate.QUALITIES}
+    for lang_code in languages:
+        pairs['base'] |= {f"en{lang_code}", f"{lang_code}en"}
+    return pairs
+
+def run_child(path: str, base_url: str, languages: List[str], jobs: int) -> dict:
+    """Run one code path in this (fresh) process and measure it."""
+    import asyncio
+    import download
+
+    ttfbs = []
+    original_open_url = download.open_url
+
+    def timed_open_url(*args, **kwargs):
+        started = time.perf_counter()
+        response = original_open_url(*args, **kwargs)
+        ttfbs.append(time.perf_counter() - started)
+        return response
+
+    download.open_url = timed_open_url
+    generate.TRANSLATION_BASE_URL = f"{base_url}/models"
+    generate.TESSERACT_BASE_URL = f"{base_url}/tessdata"
+    generate.DICTIONARY_BASE_URL = f"{base_url}/dictionaries"
+    base_urls = download.BaseUrls(generate.TRANSLATION_BASE_URL, generate.TESSERACT_BASE_URL, generate.DICTIONARY_BASE_URL)
+
+    files = 0
+    failed = 0
+    output = io.StringIO()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        if path in ('download', 'download-serial'):
+            directions = download.directions_for_languages(languages, 'base')
+            plan = download.plan_downloads(directions, Path("out"), base_urls, sizes={})
+            failed = len(download.execute_plan(plan, jobs if path == 'download' else 1))
+            files = len(plan)
+        elif path == 'sizes':
+            language_pairs = language_pairs_for(languages)
+            for lang_code in languages:
+                files += len(asyncio.run(generate.get_language_sizes(lang_code, language_pairs)))
+        elif path == 'sizes-batched':
+            language_pairs = language_pairs_for(languages)
+            models = ModelsCatalog.from_language_pairs(language_pairs)
+            requests = [r for lang_code in languages for r in generate.language_size_requests(lang_code, models)]
+            failed = len(asyncio.run(generate.resolve_sizes(requests, [generate.HttpSizeProvider()], {})))
+            files = len(requests) - failed
+    elapsed = time.perf_counter() - started
+
+    ttfb_ms = None
+    if ttfbs:
+        ttfbs.sort()
+        ttfb_ms = {
+            'mean': statistics.mean(ttfbs) * 1000,
+            'p50': statistics.median(ttfbs) * 1000,
+            'p95': ttfbs[int(len(ttfbs) * 0.95)] * 1000,
+        }
+    return {
+        'files': files,
+        'failed': failed,
+        'seconds': elapsed,
+        # ru_maxrss is in KiB on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'ttfb_ms': ttfb_ms,
+    }
+
+def check_resume(server: StandInServer) -> List[str]:
+    """
+    Run download.download() through the resume cases against `server`;
+    returns a description of every case that went wrong.
+    """
+    import download
+    server.sizes[RESUME_FILE] = RESUME_SIZE
+    url = f"{server.base_url}/models/base/enxx/{RESUME_FILE}.gz"
+    failures = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        output_path = Path(work_dir) / RESUME_FILE
+        part_path = output_path.with_name(output_path.name + ".part")
+        meta_path = part_path.with_name(part_path.name + ".json")
+
+        def served() -> bytes:
+            return b"".join(server.contents(RESUME_FILE, compressed=True))
+
+        def write_part(data: bytes, etag: str):
+            part_path.write_bytes(data)
+            meta_path.write_text(json.dumps({'url': url, 'etag': etag, 'last_modified': None, 'received': len(data)}))
+
+        def run(case: str, expect_range: bool):
+            server.reset_counters()
+            output = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(output):
+                    download.download(url, output_path, decompress=True)
+            except Exception as e:
+                failures.append(f"{case}: {e!r}\n{output.getvalue()}")
+                return
+            expected = hashlib.sha256(gzip.decompress(served())).hexdigest()
+            if hashlib.sha256(output_path.read_bytes()).hexdigest() != expected:
+                failures.append(f"{case}: downloaded file does not match\n{output.getvalue()}")
+            elif expect_range and not server.range_requests:
+                failures.append(f"{case}: no Range request was sent\n{output.getvalue()}")
+            elif part_path.exists() or meta_path.exists():
+                failures.append(f"{case}: .part left behind")
+            output_path.unlink(missing_ok=True)
+
+        # The connection drops a third of the way in; the retry asks for the rest
+        server.drop_after = RESUME_SIZE // 3
+        run("dropped connection", expect_range=True)
+        server.drop_after = None
+
+        # A .part of the previous version: If-Range doesn't match, the server
+        # sends the whole new file and the download starts over
+        write_part(served()[:RESUME_SIZE // 2], f'"{server.content_key(RESUME_FILE)}"')
+        server.versions[RESUME_FILE] = server.versions.get(RESUME_FILE, 0) + 1
+        run("changed validator", expect_range=True)
+
+        # A .part longer than the file: the server answers 416 and the download starts over
+        write_part(served() + b"\0" * 100, f'"{server.content_key(RESUME_FILE)}"')
+        run("range not satisfiable", expect_range=True)
+    return failures
+
+def bench_path(server: StandInServer, path: str, languages: List[str], jobs: int) -> dict:
+    server.reset_counters()
+    with tempfile.TemporaryDirectory() as work_dir:
+        # A scratch directory as cwd so nothing (downloads, size checkpoints) lands in the repo
+        proc = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), "--child", path, "--base-url", server.base_url,
+             "--jobs", str(jobs), *languages],
+            cwd=work_dir, stdout=subprocess.PIPE, check=True,
+        )
+    result = json.loads(proc.stdout)
+    result['requests'] = server.requests
+    result['bytes'] = server.bytes_sent
+    result['files_per_s'] = result['files'] / result['seconds']
+    result['mb_per_s'] = server.bytes_sent / 1024 ** 2 / result['seconds']
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the download and size-lookup paths against a local stand-in server.")
+    parser.add_argument("languages", nargs="*", default=DEFAULT_LANGUAGES)
+    parser.add_argument("--paths", default=",".join(PATHS), help=f"comma-separated code paths, from {', '.join(PATHS)}")
+    parser.add_argument("--jobs", default=8, type=int, help="connections for the 'download' path")
+    parser.add_argument("--latency-ms", default=0.0, type=float, help="delay before every response")
+    parser.add_argument("--bandwidth-mbps", type=float, help="per-connection bandwidth cap in megabits per second")
+    parser.add_argument("--sizes", type=Path, help="sizes file (default: data/<COMMIT>.json)")
+    parser.add_argument("--scale", default=1.0, type=float, help="multiply every file size, e.g. 0.1 for quick runs")
+    parser.add_argument("--repeat", default=1, type=int, help="runs per path; the fastest is reported")
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--check-resume", action="store_true", help="check resumed, restarted and 416 downloads instead of benchmarking")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.base_url, args.languages, args.jobs)))
+        return
+    if args.check_resume:
+        server = StandInServer({})
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            failures = check_resume(server)
+        finally:
+            server.shutdown()
+        for failure in failures:
+            print(f"FAILED {failure}")
+        print(f"{3 - len(failures)} of 3 resume cases passed")
+        if failures:
+            sys.exit(1)
+        return
+
+    paths = args.paths.split(",")
+    unknown = [path for path in paths if path not in PATHS]
+    if unknown:
+        print(f"Error: Unknown paths {unknown}, expected some of {list(PATHS)}")
+        sys.exit(1)
+
+    sizes_path = args.sizes or default_sizes_path()
+    bandwidth = args.bandwidth_mbps * 1e6 / 8 if args.bandwidth_mbps else None
+    server = StandInServer(load_sizes(sizes_path, args.scale), args.latency_ms / 1000, bandwidth)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = {}
+    try:
+        for path in paths:
+            runs = [bench_path(server, path, args.languages, args.jobs) for _ in range(args.repeat)]
+            results[path] = best = min(runs, key=lambda r: r['seconds'])
+            ttfb = f", TTFB p50 {best['ttfb_ms']['p50']:.1f} ms" if best['ttfb_ms'] else ""
+            print(f"{path:16} {best['files']:4} files in {best['seconds']:6.2f}s: {best['files_per_s']:7.1f} files/s, "
+                  f"{best['mb_per_s']:7.1f} MB/s, peak RSS {best['peak_rss_mb']:.0f} MB{ttfb}"
+                  + (f", {best['failed']} failed" if best['failed'] else ""))
+    finally:
+        server.shutdown()
+
+    if args.output:
+        report = {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'commit': subprocess.run(["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent,
+                                     stdout=subprocess.PIPE, text=True).stdout.strip(),
+            'parameters': {
+                'languages': args.languages,
+                'jobs': args.jobs,
+                'latency_ms': args.latency_ms,
+                'bandwidth_mbps': args.bandwidth_mbps,
+                'sizes': sizes_path.name,
+                'scale': args.scale,
+                'repeat': args.repeat,
+            },
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Benchmark how generate.py and indexer.py scale with the size of the
+firefox-translations-models repo, on synthetic repos (synthetic_repo.py)
+from today's size to 100 times it.
+
+Stages timed at every scale:
+  scan     ModelsCatalog.scan() of the checkout and generate's pair check
+  history  the git log walk finding the last commit of every pair directory
+  sizes    generate.resolve_sizes() of every file from the checkout, with
+           the checkpoints it writes to data/<COMMIT>.json
+  codegen  generate.build_catalog() and generate_kotlin_enum()
+  index    indexer.py end to end (scan, history, hashing, index.json)
+
+Each scale runs in its own process, in a scratch directory with its own
+cache, so nothing is shared between scales and peak RSS is measured per
+scale. Between consecutive scales the growth exponent of every stage is
+printed: time ~ size^exponent, where size is the number of commits for
+history, of pair directories for sizes and codegen and of files otherwise.
+An exponent well above 1 is super-linear behaviour; with --check, it makes
+the run fail. Past 16 times today's size, pairs run out of two-letter
+language codes and only files and commits keep growing.
+
+Usage: python bench_scaling.py [--scales 1,10,30,100] [--stages scan,history,sizes,codegen,index]
+                               [--repos-dir <dir>] [--max-exponent 1.3] [--check] [--output scaling.json]
+"""
+import generate
+import synthetic_repo
+from models_catalog import ModelsCatalog, get_release_dates_and_commits
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+STAGES = {
+    'scan': "ModelsCatalog.scan() and generate.check_supported_pairs()",
+    'history': "last commit of every pair directory from git log",
+    'sizes': "generate.resolve_sizes() from the checkout",
+    'codegen': "generate.build_catalog() and generate_kotlin_enum()",
+    'index': "indexer.py end to end",
+}
+# What each stage is expected to grow linearly with; sizes and codegen only
+# look at the model, vocab and lex files of each directory
+STAGE_SIZE = {'scan': 'files', 'history': 'commits', 'sizes': 'pair_dirs', 'codegen': 'pair_dirs', 'index': 'files'}
+# Stages faster than this at the larger scale are too noisy to judge
+MIN_SECONDS = 0.05
+
+def run_child(repo_path: Path, tessdata_path: Path, languages: int, stages: List[str]) -> dict:
+    """Time `stages` in this process; the working directory is a scratch one."""
+    synthetic_repo.register_languages(synthetic_repo.language_codes(languages))
+    seconds = {}
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        started = time.perf_counter()
+        models = ModelsCatalog.scan(repo_path)
+        generate.check_supported_pairs(models)
+        if 'scan' in stages:
+            seconds['scan'] = time.perf_counter() - started
+
+        if 'history' in stages:
+            wanted = {(models.best_quality(pair), pair) for pair in models.pairs()}
+            started = time.perf_counter()
+            releases = get_release_dates_and_commits(repo_path / 'models', wanted)
+            seconds['history'] = time.perf_counter() - started
+            if len(releases) != len(wanted):
+                raise RuntimeError(f"history found {len(releases)} of {len(wanted)} pair directories")
+
+        sizes: Dict[str, Dict[str, int]] = {}
+        if 'sizes' in stages or 'codegen' in stages:
+            requests = [request for lang_code in ['en'] + models.languages()
+                        for request in generate.language_size_requests(lang_code, models)]
+            # Synthetic repos are never at the pinned COMMIT
+            provider = generate.LocalSizeProvider(models, tessdata_path, commit=None)
+            started = time.perf_counter()
+            unresolved = asyncio.run(generate.resolve_sizes(requests, [provider], sizes))
+            if 'sizes' in stages:
+                seconds['sizes'] = time.perf_counter() - started
+            if unresolved:
+                raise RuntimeError(f"{len(unresolved)} sizes not found")
+
+        if 'codegen' in stages:
+            started = time.perf_counter()
+            catalog = generate.build_catalog(models.language_pairs(), sizes, size_providers=[])
+            generate.generate_kotlin_enum(catalog)
+            json.dumps(catalog, indent=2, ensure_ascii=False)
+            seconds['codegen'] = time.perf_counter() - started
+
+        if 'index' in stages:
+            import indexer
+            sys.argv = ["indexer.py", "--repo", str(repo_path / "models"), "--output", "index.json", "--digest-cache", "digests.json"]
+            started = time.perf_counter()
+            indexer.main()
+            seconds['index'] = time.perf_counter() - started
+    return {
+        'seconds': seconds,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+def prepare_repo(repos_dir: Path, shape: synthetic_repo.RepoShape) -> dict:
+    """The synthetic repo (and tessdata) of `shape` under `repos_dir`, built unless already there."""
+    name = f"{shape.languages}l-{shape.qualities_per_pair}q-{shape.extra_files}x-{shape.commits}c"
+    repo_path = repos_dir / name / "firefox-translations-models"
+    stats_path = repos_dir / name / "stats.json"
+    if stats_path.exists():
+        with open(stats_path, 'r') as f:
+            return json.load(f)
+    if repo_path.exists():
+        # An interrupted build
+        subprocess.run(["rm", "-rf", str(repos_dir / name)], check=True)
+    stats = synthetic_repo.build_repo(repo_path, shape)
+    synthetic_repo.build_tessdata(repos_dir / name / "tessdata", synthetic_repo.language_codes(shape.languages))
+    stats.update(repo=str(repo_path), tessdata=str(repos_dir / name / "tessdata"))
+    with open(stats_path, 'w') as f:
+        json.dump(stats, f, indent=2)
+    return stats
+
+def bench_scale(repo: dict, stages: List[str]) -> dict:
+    with tempfile.TemporaryDirectory() as scratch:
+        # generate.py checkpoints sizes to data/<COMMIT>.json in the working directory
+        (Path(scratch) / "data").mkdir()
+        env = dict(os.environ, XDG_CACHE_HOME=str(Path(scratch) / "cache"))
+        result = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), "--child", "--repo", repo['repo'], "--tessdata", repo['tessdata'],
+             "--languages", str(repo['languages']), "--stages", ",".join(stages)],
+            cwd=scratch, env=env, stdout=subprocess.PIPE, text=True,
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f"child process failed with exit status {result.returncode}")
+    return json.loads(result.stdout.splitlines()[-1])
+
+def growth_exponent(smaller: dict, larger: dict, stage: str) -> Optional[float]:
+    """k in time ~ size^k between two scales, None when it can't be told."""
+    size = STAGE_SIZE[stage]
+    t1, t2 = smaller['seconds'].get(stage), larger['seconds'].get(stage)
+    n1, n2 = smaller['repo'][size], larger['repo'][size]
+    if not t1 or not t2 or n2 <= n1 or t2 < MIN_SECONDS:
+        return None
+    return math.log(t2 / t1) / math.log(n2 / n1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generate.py and indexer.py on synthetic repos of growing size.")
+    parser.add_argument("--scales", default="1,10,30,100", help="comma-separated multiples of today's repo")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"comma-separated stages, from {', '.join(STAGES)}")
+    parser.add_argument("--repos-dir", type=Path, help="keep the synthetic repos here and reuse them on later runs (default: a temporary directory)")
+    parser.add_argument("--max-exponent", default=1.3, type=float, help="growth exponent above which a stage is reported as super-linear")
+    parser.add_argument("--check", action="store_true", help="exit with an error if a stage grows super-linearly")
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--repo", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--tessdata", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--languages", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    stages = args.stages.split(",")
+    if args.child:
+        print(json.dumps(run_child(args.repo, args.tessdata, args.languages, stages)))
+        return
+
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        print(f"Error: Unknown stages {unknown}, expected some of {list(STAGES)}")
+        sys.exit(1)
+    try:
+        scales = sorted(float(scale) for scale in args.scales.split(","))
+    except ValueError:
+        print(f"Error: Invalid scales '{args.scales}'")
+        sys.exit(1)
+
+    results = []
+    with contextlib.ExitStack() as stack:
+        repos_dir = args.repos_dir or Path(stack.enter_context(tempfile.TemporaryDirectory()))
+        for scale in scales:
+            shape = synthetic_repo.scale_shape(scale)
+            repo = prepare_repo(repos_dir, shape)
+            print(f"scale {scale:g}: {repo['languages']} languages, {repo['pair_dirs']} pair directories, "
+                  f"{repo['files']} files, {repo['commits']} commits")
+            try:
+                result = bench_scale(repo, stages)
+            except RuntimeError as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+            results.append(dict(result, scale=scale, repo={key: value for key, value in repo.items() if key not in ('repo', 'tessdata')}))
+            timings = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in result['seconds'].items())
+            print(f"  {timings}; peak RSS {result['peak_rss_mb']:.0f} MB")
+
+    superlinear = []
+    for smaller, larger in zip(results, results[1:]):
+        print(f"scale {smaller['scale']:g} -> {larger['scale']:g}:")
+        for stage in stages:
+            exponent = growth_exponent(smaller, larger, stage)
+            if exponent is None:
+                continue
+            flagged = exponent > args.max_exponent
+            if flagged:
+                superlinear.append((stage, smaller['scale'], larger['scale'], exponent))
+            size = STAGE_SIZE[stage]
+            print(f"  {stage:8} {size} x{larger['repo'][size] / smaller['repo'][size]:.1f}, "
+                  f"time x{larger['seconds'][stage] / smaller['seconds'][stage]:.1f}: exponent {exponent:.2f}"
+                  + ("  SUPER-LINEAR" if flagged else ""))
+
+    if args.output:
+        report = {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'commit': subprocess.run(["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent,
+                                     stdout=subprocess.PIPE, text=True).stdout.strip(),
+            'parameters': {'scales': scales, 'stages': stages, 'max_exponent': args.max_exponent},
+            'results': results,
+            'superlinear': [{'stage': stage, 'from_scale': a, 'to_scale': b, 'exponent': e} for stage, a, b, e in superlinear],
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    if args.check and superlinear:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
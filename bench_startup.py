@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark how fast the tooling starts: the import time of each module and
+the wall time of quick commands run through tools.py, each in a fresh
+interpreter so nothing is already imported or cached in memory.
+
+Imports are measured with `python -X importtime`, which also gives the
+modules that contribute most to each import. Commands are run as they
+would be from a shell; a bare interpreter (`python -c pass`) is measured too
+so the cost of Python itself can be told apart. Medians over --repeat runs
+are printed, and written as JSON with --output.
+
+Usage: python bench_startup.py [--modules download,generate,...] [--repeat 10] [--top 5] [--output startup.json]
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).parent
+DEFAULT_MODULES = ['generate', 'indexer', 'download', 'sync', 'budget', 'packs', 'mirror', 'dedupe']
+# name -> arguments; {output} is a scratch directory
+COMMANDS = {
+    'python': ["-c", "pass"],
+    'tools --help': ["tools.py", "--help"],
+    'download --help': ["tools.py", "download", "--help"],
+    'download --dry-run': ["tools.py", "download", "es", "--dry-run", "--output-dir", "{output}"],
+    'index --help': ["tools.py", "index", "--help"],
+}
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self µs, cumulative µs) of every line `-X importtime` printed."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+def bench_import(module: str, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+        runs.append(parse_importtime(result.stderr))
+    cumulative = [next(us for name, _, us in imports if name == module) for imports in runs]
+    # Attribute self time per module, median across runs
+    self_times: Dict[str, List[int]] = {}
+    for imports in runs:
+        for name, self_us, _ in imports:
+            self_times.setdefault(name, []).append(self_us)
+    heaviest = sorted(((name, statistics.median(times)) for name, times in self_times.items()), key=lambda item: item[1], reverse=True)
+    return {
+        'import_ms': statistics.median(cumulative) / 1000,
+        'modules': len(runs[0]),
+        'heaviest': [{'module': name, 'self_ms': us / 1000} for name, us in heaviest],
+    }
+
+def bench_command(args: List[str], repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as output:
+            command = [sys.executable] + [arg.format(output=output) for arg in args]
+            started = time.perf_counter()
+            result = subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            times.append(time.perf_counter() - started)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} failed:\n{result.stderr[-2000:]}")
+    return {'wall_ms': statistics.median(times) * 1000, 'min_ms': min(times) * 1000}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark module import times and the startup of quick commands.")
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES), help="comma-separated modules to import")
+    parser.add_argument("--commands", default=",".join(COMMANDS), help=f"comma-separated commands, from {', '.join(COMMANDS)}")
+    parser.add_argument("--repeat", default=10, type=int, help="runs per module or command; the median is reported")
+    parser.add_argument("--top", default=5, type=int, help="heaviest imports listed per module")
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    args = parser.parse_args()
+
+    commands = args.commands.split(",") if args.commands else []
+    unknown = [command for command in commands if command not in COMMANDS]
+    if unknown:
+        print(f"Error: Unknown commands {unknown}, expected some of {list(COMMANDS)}")
+        sys.exit(1)
+
+    imports = {}
+    for module in (args.modules.split(",") if args.modules else []):
+        try:
+            imports[module] = result = bench_import(module, args.repeat)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        heaviest = ", ".join(f"{entry['module']} {entry['self_ms']:.1f}" for entry in result['heaviest'][:args.top])
+        print(f"import {module:12} {result['import_ms']:7.1f} ms, {result['modules']:4} modules; heaviest (ms): {heaviest}")
+
+    results = {}
+    for command in commands:
+        try:
+            results[command] = result = bench_command(COMMANDS[command], args.repeat)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"{command:24} {result['wall_ms']:7.1f} ms (min {result['min_ms']:.1f} ms)")
+
+    if args.output:
+        report = {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'commit': subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT,
+                                     stdout=subprocess.PIPE, text=True).stdout.strip(),
+            'parameters': {'repeat': args.repeat},
+            'imports': imports,
+            'commands': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Pick a model quality (base-memory, base or tiny) for each direction of each
+language so that a whole device image fits a byte budget, instead of always
+taking the best quality like generate.py does.
+
+Languages are kept by priority first: a language is only dropped if every
+combination of qualities for the languages of higher priority leaves no
+room for it. Among the selections that keep the same languages, the one with
+the best qualities (weighted by priority) wins. This is a multiple-choice
+knapsack, solved exactly over sizes rounded up to --granularity, so the
+result always fits.
+
+Sizes are the installed (decompressed) sizes taken from the local checkout,
+or download sizes with --measure download. Tessdata sizes come from the
+sizes generate.py recorded, or from a local --tessdata-path. English OCR is
+always installed, like the app does, and is taken off the budget up front.
+
+Usage:
+    python budget.py <firefox-translations-models> --budget 600M [es:3 fr:2 de ...]
+                     [--ram-budget 200M] [--plan] [--catalog-dir out]
+"""
+import generate
+from download import plan_downloads, print_plan
+from download_cache import parse_size
+from models_catalog import QUALITY_PRIORITY, ModelsCatalog, local_file_size
+import argparse
+import json
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+DEFAULT_GRANULARITY = 1024 * 1024
+# Higher is better; base-memory > base > tiny like get_best_model_type()
+QUALITY_SCORE = {quality: len(QUALITY_PRIORITY) - 1 - i for i, quality in enumerate(QUALITY_PRIORITY)}
+
+class Choice(NamedTuple):
+    # Quality of <lang> -> en and of en -> <lang>
+    to_english: str
+    from_english: str
+    # Everything the language adds to the image, tessdata included
+    size: int
+
+def installed_size(models: ModelsCatalog, quality: str, pair: str, filename: str) -> Optional[int]:
+    """
+    Decompressed size of a model file, from the gzip trailer of the file in
+    the checkout. None when the checkout only has a git-lfs pointer.
+    """
+    path = models.repo_path / 'models' / quality / pair / f"{filename}.gz"
+    try:
+        if path.stat().st_size != models.file_size(quality, pair, filename):
+            return None
+        with open(path, 'rb') as f:
+            f.seek(-4, os.SEEK_END)
+            return struct.unpack("<I", f.read(4))[0]
+    except OSError:
+        return None
+
+def direction_size(models: ModelsCatalog, quality: str, src_lang: str, tgt_lang: str, measure: str) -> int:
+    """Bytes of the model, vocab and lex files of one direction."""
+    pair = f"{src_lang}{tgt_lang}"
+    total = 0
+    for filename in sorted(set(generate.generate_files_for_language(src_lang, tgt_lang).values())):
+        size = installed_size(models, quality, pair, filename) if measure == 'installed' else None
+        if size is None:
+            # Without the LFS object the compressed size is the best lower bound there is
+            size = models.file_size(quality, pair, filename)
+        if size is None:
+            raise ValueError(f"models/{quality}/{pair}/{filename}.gz is missing from the checkout")
+        total += size
+    return total
+
+def language_choices(models: ModelsCatalog, lang_code: str, tessdata_size: int, measure: str,
+                     ram_budget: Optional[int] = None) -> List[Choice]:
+    """
+    Every combination of qualities available for both directions of
+    `lang_code`. With a `ram_budget`, directions too big to load are left
+    out: translating between two non-English languages pivots through
+    English and holds two directions at once, so each may use half of it.
+    """
+    per_direction = {}
+    for src_lang, tgt_lang in ((lang_code, 'en'), ('en', lang_code)):
+        sizes = {}
+        for quality in models.qualities(f"{src_lang}{tgt_lang}"):
+            size = direction_size(models, quality, src_lang, tgt_lang, measure)
+            ram = size if measure == 'installed' else direction_size(models, quality, src_lang, tgt_lang, 'installed')
+            if ram_budget is None or 2 * ram <= ram_budget:
+                sizes[quality] = size
+        per_direction[src_lang] = sizes
+    return [
+        Choice(to_quality, from_quality, to_size + from_size + tessdata_size)
+        for to_quality, to_size in per_direction[lang_code].items()
+        for from_quality, from_size in per_direction['en'].items()
+    ]
+
+def select(choices: Dict[str, List[Choice]], priorities: Dict[str, int], budget: int,
+           granularity: int = DEFAULT_GRANULARITY) -> Dict[str, Choice]:
+    """
+    The best Choice for each language that fits in `budget` bytes; languages
+    that don't fit are absent from the result. One language of a priority is
+    worth more than any number of languages of lower priorities:
+
+    >>> sorted(select({'es': [Choice('base', 'base', 200)], 'fr': [Choice('base', 'base', 100)],
+    ...                'de': [Choice('base', 'base', 100)]}, {'es': 3, 'fr': 2, 'de': 2}, 200, 1))
+    ['es']
+    """
+    # Quality upgrades, weighted by priority, are worth less than keeping any
+    # language, and keeping a language is worth more than keeping every
+    # language of lower priority (and upgrading them all) put together
+    total = sum(2 * max(QUALITY_SCORE.values()) * priorities[lang_code] for lang_code in choices)
+    keep_bonus = {}
+    for priority in sorted(set(priorities[lang_code] for lang_code in choices)):
+        keep_bonus[priority] = total + 1
+        total += keep_bonus[priority] * sum(1 for lang_code in choices if priorities[lang_code] == priority)
+
+    capacity = budget // granularity
+    # best[b]: highest value of the languages seen so far within b units
+    best = [0] * (capacity + 1)
+    picks = []
+    for lang_code, options in choices.items():
+        weights = [-(-choice.size // granularity) for choice in options]
+        values = [
+            keep_bonus[priorities[lang_code]]
+            + priorities[lang_code] * (QUALITY_SCORE[choice.to_english] + QUALITY_SCORE[choice.from_english])
+            for choice in options
+        ]
+        new_best = best[:]
+        pick = [-1] * (capacity + 1)
+        for i, (weight, value) in enumerate(zip(weights, values)):
+            for b in range(weight, capacity + 1):
+                candidate = best[b - weight] + value
+                if candidate > new_best[b]:
+                    new_best[b] = candidate
+                    pick[b] = i
+        picks.append((lang_code, options, weights, pick))
+        best = new_best
+
+    selected = {}
+    b = capacity
+    for lang_code, options, weights, pick in reversed(picks):
+        i = pick[b]
+        if i >= 0:
+            selected[lang_code] = options[i]
+            b -= weights[i]
+    return selected
+
+def load_tessdata_sizes(sizes_path: Path, tessdata_path: Optional[Path]) -> Dict[str, int]:
+    """Sizes of .traineddata files by filename; a local tessdata checkout wins over recorded sizes."""
+    sizes = {}
+    if sizes_path.exists():
+        with open(sizes_path, 'r') as f:
+            for lang_sizes in json.load(f).values():
+                sizes.update({filename: size for filename, size in lang_sizes.items() if filename.endswith(".traineddata")})
+    if tessdata_path is not None:
+        for entry in os.scandir(tessdata_path):
+            if entry.name.endswith(".traineddata"):
+                sizes[entry.name] = local_file_size(Path(entry.path))
+    return sizes
+
+def parse_priorities(specs: List[str], models: ModelsCatalog) -> Dict[str, int]:
+    """`LANG[:PRIORITY]` specs, every language at priority 1 if there are none."""
+    if not specs:
+        return {lang_code: 1 for lang_code in models.languages()}
+    priorities = {}
+    for spec in specs:
+        lang_code, _, priority = spec.partition(":")
+        priorities[lang_code] = int(priority) if priority else 1
+    return priorities
+
+def selection_catalog(models: ModelsCatalog, selected: Dict[str, Choice], tessdata_sizes: Dict[str, int]) -> dict:
+    """The catalog.json generate.py would write if the checkout only had the selected models."""
+    language_pairs = {quality: set() for quality in generate.QUALITIES}
+    existing_sizes = {'en': {'eng.traineddata': tessdata_sizes['eng.traineddata']}}
+    for lang_code, choice in selected.items():
+        tess_filename = f"{generate.TESSERACT_LANGUAGE_MAPPINGS[lang_code]}.traineddata"
+        sizes = {tess_filename: tessdata_sizes[tess_filename]}
+        for src_lang, tgt_lang, quality in ((lang_code, 'en', choice.to_english), ('en', lang_code, choice.from_english)):
+            pair = f"{src_lang}{tgt_lang}"
+            language_pairs[quality].add(pair)
+            for filename in generate.generate_files_for_language(src_lang, tgt_lang).values():
+                sizes[filename] = models.file_size(quality, pair, filename)
+        existing_sizes[lang_code] = sizes
+    # Every size is known, so build_catalog has nothing to look up or save
+    return generate.build_catalog(language_pairs, existing_sizes, size_providers=[])
+
+def main():
+    parser = argparse.ArgumentParser(description="Choose model qualities so a set of languages fits a storage budget.")
+    parser.add_argument("repository_path", type=Path)
+    parser.add_argument("languages", nargs="*", help="language codes with an optional priority, e.g. es:3 fr:2 de (default: every language at priority 1)")
+    parser.add_argument("--budget", required=True, type=parse_size, help="bytes available for models and OCR data, e.g. 600M or 2G")
+    parser.add_argument("--ram-budget", type=parse_size, help="memory available for translation; directions needing more are not considered")
+    parser.add_argument("--measure", default="installed", choices=["installed", "download"],
+                        help="count decompressed sizes (what the device stores) or download sizes")
+    parser.add_argument("--granularity", default=DEFAULT_GRANULARITY, type=parse_size, help="sizes are rounded up to this for the search")
+    parser.add_argument("--sizes", default=f"data/{generate.COMMIT}.json", type=Path, help="sizes recorded by generate.py, for tessdata")
+    parser.add_argument("--tessdata-path", type=Path, help="local tessdata_fast checkout, for tessdata sizes")
+    parser.add_argument("--plan", action="store_true", help="list every file of the resulting download plan")
+    parser.add_argument("--output-dir", default="translator_models", type=Path, help="output directory of the download plan")
+    parser.add_argument("--catalog-dir", type=Path, help="write catalog.json and Language.kt for the selection here")
+    args = parser.parse_args()
+
+    if not args.repository_path.exists():
+        print(f"Error: Repository path '{args.repository_path}' does not exist")
+        sys.exit(1)
+    models = ModelsCatalog.load(args.repository_path)
+    generate.check_supported_pairs(models)
+    priorities = parse_priorities(args.languages, models)
+    for lang_code, priority in priorities.items():
+        if lang_code not in models.languages():
+            print(f"Error: No models for '{lang_code}' in {args.repository_path}")
+            sys.exit(1)
+        if priority < 1:
+            print(f"Error: Priority of '{lang_code}' must be at least 1")
+            sys.exit(1)
+
+    tessdata_sizes = load_tessdata_sizes(args.sizes, args.tessdata_path)
+    tess_filenames = {lang_code: f"{generate.TESSERACT_LANGUAGE_MAPPINGS[lang_code]}.traineddata" for lang_code in ['en', *priorities]}
+    missing = sorted(set(tess_filenames.values()) - set(tessdata_sizes))
+    if missing:
+        print(f"Error: no size found for {', '.join(missing)}; pass --tessdata-path or --sizes")
+        sys.exit(1)
+
+    budget = args.budget - tessdata_sizes[tess_filenames['en']]
+    if budget < 0:
+        print(f"Error: The budget doesn't even fit English OCR data ({tessdata_sizes[tess_filenames['en']]} bytes)")
+        sys.exit(1)
+
+    choices = {}
+    for lang_code in sorted(priorities, key=lambda code: (-priorities[code], code)):
+        try:
+            options = language_choices(models, lang_code, tessdata_sizes[tess_filenames[lang_code]], args.measure, args.ram_budget)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if not options:
+            print(f"Skipping {lang_code}: no model pair in both directions fits the RAM budget")
+            continue
+        choices[lang_code] = options
+    selected = select(choices, priorities, budget, args.granularity)
+
+    print(f"{'lang':6}{'priority':>9}  {'to English':12} {'from English':12} {args.measure + ' size':>15}")
+    for lang_code in choices:
+        if lang_code in selected:
+            choice = selected[lang_code]
+            print(f"{lang_code:6}{priorities[lang_code]:9}  {choice.to_english:12} {choice.from_english:12} {choice.size / 1024 ** 2:12.1f} MB")
+    dropped = [lang_code for lang_code in choices if lang_code not in selected]
+    if dropped:
+        print(f"Doesn't fit: {', '.join(dropped)}")
+    # Languages sharing tessdata (nb, nn) count it twice in the search; the total doesn't
+    used = sum(choice.size for choice in selected.values()) + tessdata_sizes[tess_filenames['en']]
+    shared_tessdata = [tess_filenames[lang_code] for lang_code in selected]
+    used -= sum(tessdata_sizes[filename] * (shared_tessdata.count(filename) - 1) for filename in set(shared_tessdata))
+    print(f"{len(selected)} languages, {used / 1024 ** 2:.1f} MB of {args.budget / 1024 ** 2:.1f} MB ({args.measure} sizes)")
+
+    directions = [
+        direction
+        for lang_code, choice in sorted(selected.items())
+        for direction in (('en', lang_code, choice.from_english), (lang_code, 'en', choice.to_english))
+    ]
+    plan = plan_downloads(directions, args.output_dir, sizes=tessdata_sizes, models=models)
+    print_plan(plan, args.output_dir, verbose=args.plan)
+    if selected and all(choice.to_english == choice.from_english for choice in selected.values()):
+        specs = " ".join(f"{lang_code}:{choice.to_english}" for lang_code, choice in sorted(selected.items()))
+        print(f"To download: python download.py {specs} --output-dir {args.output_dir}")
+
+    if args.catalog_dir:
+        catalog = selection_catalog(models, selected, tessdata_sizes)
+        args.catalog_dir.mkdir(parents=True, exist_ok=True)
+        with open(args.catalog_dir / generate.CATALOG_FILE, 'w') as f:
+            json.dump(catalog, f, ensure_ascii=False, separators=(',', ':'))
+        with open(args.catalog_dir / "Language.kt", 'w') as f:
+            f.write(generate.generate_kotlin_enum(catalog))
+        print(f"Generated {generate.CATALOG_FILE} and Language.kt in {args.catalog_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Find byte-identical files across output trees (download.py trees, image
+builds, mirror roots) and make them share storage: a copy-on-write reflink
+where the filesystem supports it (btrfs, XFS and bcachefs on Linux), or a
+hardlink.
+
+Hardlinks are safe for these trees because nothing in this tooling writes
+into an existing file: download.py, sync.py and delta patches always write a
+temporary file and rename it over the old one, which gives the path a new
+inode instead of changing the shared one. Anything that edits files in place
+should use reflinks.
+
+Files are grouped by device and size first, so only same-sized candidates
+are ever hashed. Reflinked files can't be told apart from copies, so a
+later run clones (and counts) them again, which is harmless.
+
+Usage: python dedupe.py <dir> [<dir> ...] [--mode auto|reflink|hardlink] [--reference <dir> ...] [--dry-run]
+"""
+from download_cache import sha256_mmap
+import argparse
+import errno
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# From linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+MODES = ['auto', 'reflink', 'hardlink']
+# In-progress downloads and temporary files come and go; leave them alone
+SKIPPED_SUFFIXES = ('.part', '.part.json', '.tmp')
+
+class DedupeReport:
+    def __init__(self):
+        self.scanned = 0
+        self.hashed = 0
+        self.already_shared = 0
+        self.duplicates = 0
+        self.linked = {'reflink': 0, 'hardlink': 0}
+        self.bytes_saved = 0
+        self.failed: List[Tuple[Path, str]] = []
+
+    def print(self, dry_run: bool = False):
+        how = ", ".join(f"{count} {mode}s" for mode, count in self.linked.items() if count)
+        verb = "Would link" if dry_run else "Linked"
+        print(f"Scanned {self.scanned} files, hashed {self.hashed}; {self.already_shared} already shared storage")
+        print(f"{verb} {self.duplicates} duplicates" + (f" ({how})" if how and not dry_run else "") + f", {self.bytes_saved / 1024 ** 2:.1f} MB saved")
+        for path, error in self.failed:
+            print(f"Could not link {path}: {error}")
+
+def reflink(source: Path, target: Path):
+    """Make `target` a copy-on-write clone of `source`; raises OSError if the filesystem can't."""
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported on this platform")
+    with open(source, 'rb') as f_src, open(target, 'wb') as f_dst:
+        fcntl.ioctl(f_dst.fileno(), FICLONE, f_src.fileno())
+
+def link(source: Path, target: Path, mode: str) -> str:
+    """
+    Replace `target` with a reflink or hardlink of `source`, atomically:
+    the link is made next to it and renamed over it. Returns the kind of
+    link made.
+    """
+    tmp_path = target.with_name(target.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    try:
+        if mode in ('auto', 'reflink'):
+            try:
+                reflink(source, tmp_path)
+                kind = 'reflink'
+            except OSError:
+                tmp_path.unlink(missing_ok=True)
+                if mode == 'reflink':
+                    raise
+                os.link(source, tmp_path)
+                kind = 'hardlink'
+        else:
+            os.link(source, tmp_path)
+            kind = 'hardlink'
+        os.replace(tmp_path, target)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return kind
+
+def tree_files(roots: Iterable[Path]) -> List[Path]:
+    """Regular files under `roots`, symlinks and transfer leftovers excluded."""
+    files = []
+    for root in roots:
+        for dirpath, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                path = Path(dirpath) / filename
+                if not filename.endswith(SKIPPED_SUFFIXES) and path.is_file() and not path.is_symlink():
+                    files.append(path)
+    return files
+
+def dedupe(files: List[Path], mode: str = 'auto', reference: Optional[List[Path]] = None,
+           dry_run: bool = False, report: Optional[DedupeReport] = None) -> DedupeReport:
+    """
+    Link every file of `files` to an identical earlier one. Files in
+    `reference` are only ever link sources, never replaced (like rsync's
+    --link-dest), and are preferred as sources.
+    """
+    report = report or DedupeReport()
+    reference = reference or []
+    candidates: Dict[Tuple[int, int], List[Path]] = {}
+    for path in reference + files:
+        st = path.stat()
+        report.scanned += 1
+        candidates.setdefault((st.st_dev, st.st_size), []).append(path)
+
+    readonly = set(reference)
+    for (_, size), paths in candidates.items():
+        if len(paths) < 2 or size == 0 or all(path in readonly for path in paths):
+            continue
+        # Files already sharing an inode only need hashing once
+        by_inode: Dict[int, List[Path]] = {}
+        for path in paths:
+            by_inode.setdefault(path.stat().st_ino, []).append(path)
+        report.already_shared += sum(len(same) - 1 for same in by_inode.values())
+
+        sources: Dict[str, Path] = {}
+        for same in by_inode.values():
+            digest = sha256_mmap(same[0])
+            report.hashed += 1
+            source = sources.get(digest)
+            if source is None:
+                sources[digest] = same[0]
+                continue
+            for path in same:
+                if path in readonly:
+                    continue
+                if not dry_run:
+                    try:
+                        report.linked[link(source, path, mode)] += 1
+                    except OSError as e:
+                        report.failed.append((path, str(e)))
+                        continue
+                report.duplicates += 1
+                report.bytes_saved += size
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Turn identical files into reflinks or hardlinks.")
+    parser.add_argument("dirs", nargs="+", type=Path, help="trees whose duplicate files are replaced by links")
+    parser.add_argument("--reference", nargs="+", type=Path, default=[], help="trees only used as link sources, never modified")
+    parser.add_argument("--mode", default="auto", choices=MODES, help="auto tries a reflink and falls back to a hardlink")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be saved")
+    args = parser.parse_args()
+
+    for directory in args.dirs + args.reference:
+        if not directory.is_dir():
+            print(f"Error: {directory} is not a directory")
+            sys.exit(1)
+    report = dedupe(tree_files(args.dirs), args.mode, tree_files(args.reference), args.dry_run)
+    report.print(args.dry_run)
+    if report.failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
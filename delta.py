@@ -0,0 +1,130 @@
+"""
+Binary delta patches between two versions of an (uncompressed) model file.
+
+A patch is a small header naming the source and target by SHA-256, followed
+by a gzip stream of operations that rebuild the target: copy a range of the
+source, or insert literal bytes. Matching works on fixed-size blocks of the
+target looked up among the aligned blocks of the source and is then extended
+byte by byte, which suits model files whose tensors keep their layout across
+releases but can't find data that moved by a non-block-aligned offset.
+"""
+import gzip
+import hashlib
+import os
+import struct
+from pathlib import Path
+
+MAGIC = b"OTDELTA1"
+BLOCK_SIZE = 4096
+CHUNK_SIZE = 1024 * 1024
+
+# magic, source sha256, target sha256, target size
+HEADER = struct.Struct("<8s32s32sQ")
+COPY = b"C"  # followed by source offset and length
+DATA = b"D"  # followed by length and the bytes themselves
+RANGE = struct.Struct("<QQ")
+LENGTH = struct.Struct("<Q")
+
+class PatchError(ValueError):
+    pass
+
+def _common_prefix(a: bytes, b: bytes) -> int:
+    n = min(len(a), len(b))
+    for i in range(n):
+        if a[i] != b[i]:
+            return i
+    return n
+
+def make_patch(source: bytes, target: bytes) -> bytes:
+    """Build a patch that turns `source` into `target`."""
+    blocks = {}
+    for offset in range(0, len(source) - BLOCK_SIZE + 1, BLOCK_SIZE):
+        blocks.setdefault(source[offset:offset + BLOCK_SIZE], offset)
+
+    ops = bytearray()
+    literal_start = 0
+    pos = 0
+    while pos + BLOCK_SIZE <= len(target):
+        src = blocks.get(target[pos:pos + BLOCK_SIZE])
+        if src is None:
+            # Back onto the block grid, a copy extended byte by byte may have left it
+            pos = (pos // BLOCK_SIZE + 1) * BLOCK_SIZE
+            continue
+        length = BLOCK_SIZE
+        while pos + length + BLOCK_SIZE <= len(target) and \
+                target[pos + length:pos + length + BLOCK_SIZE] == source[src + length:src + length + BLOCK_SIZE]:
+            length += BLOCK_SIZE
+        length += _common_prefix(target[pos + length:pos + length + BLOCK_SIZE], source[src + length:src + length + BLOCK_SIZE])
+
+        if literal_start < pos:
+            ops += DATA + LENGTH.pack(pos - literal_start) + target[literal_start:pos]
+        ops += COPY + RANGE.pack(src, length)
+        pos += length
+        literal_start = pos
+    if literal_start < len(target):
+        ops += DATA + LENGTH.pack(len(target) - literal_start) + target[literal_start:]
+
+    header = HEADER.pack(MAGIC, hashlib.sha256(source).digest(), hashlib.sha256(target).digest(), len(target))
+    return header + gzip.compress(bytes(ops), compresslevel=9)
+
+def read_header(patch_path: Path) -> tuple[str, str, int]:
+    """(source sha256, target sha256, target size) of a patch file."""
+    with open(patch_path, 'rb') as f:
+        magic, source_sha256, target_sha256, target_size = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise PatchError(f"{patch_path} is not a delta patch")
+    return source_sha256.hex(), target_sha256.hex(), target_size
+
+def _read_exact(f, n: int) -> bytes:
+    data = f.read(n)
+    if len(data) != n:
+        raise PatchError("Truncated patch")
+    return data
+
+def apply_patch(source_path: Path, patch_path: Path, output_path: Path, expected_sha256: str | None = None):
+    """
+    Rebuild the target of `patch_path` from `source_path` into `output_path`.
+    Both the source and the result are checked against the hashes recorded
+    in the patch, and the result against `expected_sha256` if given; the
+    output is only renamed into place if they match.
+    """
+    source_sha256, target_sha256, target_size = read_header(patch_path)
+    if expected_sha256 is not None and target_sha256 != expected_sha256:
+        raise PatchError(f"{patch_path} builds {target_sha256}, expected {expected_sha256}")
+
+    digest = hashlib.sha256()
+    with open(source_path, 'rb') as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    if digest.hexdigest() != source_sha256:
+        raise PatchError(f"{source_path} is not the version {patch_path} applies to")
+
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with open(patch_path, 'rb') as f_patch, open(source_path, 'rb') as f_src, open(tmp_path, 'wb') as f_out:
+            f_patch.seek(HEADER.size)
+            ops = gzip.GzipFile(fileobj=f_patch)
+            while op := ops.read(1):
+                if op == COPY:
+                    offset, length = RANGE.unpack(_read_exact(ops, RANGE.size))
+                    f_src.seek(offset)
+                    reader = f_src
+                else:
+                    if op != DATA:
+                        raise PatchError(f"Unknown patch operation {op!r}")
+                    (length,) = LENGTH.unpack(_read_exact(ops, LENGTH.size))
+                    reader = ops
+                while length:
+                    chunk = _read_exact(reader, min(length, CHUNK_SIZE))
+                    f_out.write(chunk)
+                    digest.update(chunk)
+                    written += len(chunk)
+                    length -= len(chunk)
+        if written != target_size or digest.hexdigest() != target_sha256:
+            raise PatchError(f"Patched {output_path.name} does not match the expected hash")
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
@@ -1,46 +1,859 @@
 #!/usr/bin/env python3
+"""
+Download translation and OCR models into the layout described in OFFLINE_SETUP.md.
+Usage: python download.py <lang> [<lang> ...] | all [--quality base] [--jobs 8]
+"""
 import generate
-import urllib.request
+import delta
+import model_codecs
+import transfer_metrics
+from dedupe import MODES as DEDUPE_MODES, dedupe, tree_files
+from download_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, DownloadCache, parse_size, sha256_file
+from models_catalog import ModelsCatalog, pair_language
+from transfer_metrics import TransferMetrics
+import argparse
 import gzip
+import hashlib
+import http.client
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
 
-def download(url: str, output_path: Path, decompress: bool):
-    print(f"Downloading {url}")
-    with urllib.request.urlopen(url) as response:
-        data = response.read()
-        if decompress:
-            data = gzip.decompress(data)
+if TYPE_CHECKING:
+    import ssl
 
-    with open(output_path, 'wb') as f_out:
-        f_out.write(data)
+# Read/write granularity when streaming; peak memory stays around this size
+# regardless of how big the downloaded file is.
+CHUNK_SIZE = 1024 * 1024
+MAX_REDIRECTS = 5
+DEFAULT_JOBS = 8
+RETRIES = 3
+# Seconds without any data before a connection is considered dead
+TIMEOUT = 60
+# How often the `.part` sidecar is updated with the number of bytes received
+PART_CHECKPOINT_BYTES = 8 * CHUNK_SIZE
 
-def download_language_pair(src_lang, tgt_lang, model_type="base", output_dir="models"):
-    output_dir = Path(output_dir)
+# A URL with a commit in its path, whose contents never change
+PINNED_URL_RE = re.compile(r"/[0-9a-f]{40}/")
+
+# Where generate.py records file sizes, as <commit>.json
+SIZES_DIR = Path("data")
+# The catalog shipped with the app, with the quality of every direction it has models for
+CATALOG_PATH = Path(__file__).parent / "app/src/main/resources/dev/davidv/translator" / generate.CATALOG_FILE
+
+# Where the shards of sharded indexes are kept between runs, by manifest and hash
+INDEX_CACHE_DIR = DEFAULT_CACHE_DIR.parent / "index"
+INDEX_SHARDS_VERSION = 1
+
+# Each worker thread keeps one open connection per (scheme, host) so that
+# consecutive files from the same CDN reuse the TCP/TLS session.
+_connections = threading.local()
+# Loading the system CA store takes a while; only done once HTTPS is used
+_ssl_context = None
+_ssl_context_lock = threading.Lock()
+# Lines printed by concurrent downloads
+_print_lock = threading.Lock()
+
+def log(message: str):
+    """Print a line from a download thread without it running into another thread's."""
+    with _print_lock:
+        sys.stdout.write(message + "\n")
+        sys.stdout.flush()
+
+class DownloadJob(NamedTuple):
+    url: str
+    output_path: Path
+    decompress: bool
+    # Bytes on the wire, when known (see load_file_sizes)
+    size: Optional[int] = None
+
+class BaseUrls(NamedTuple):
+    translation: str = generate.TRANSLATION_BASE_URL
+    tesseract: str = generate.TESSERACT_BASE_URL
+    dictionary: str = generate.DICTIONARY_BASE_URL
+
+def _get_ssl_context() -> 'ssl.SSLContext':
+    global _ssl_context
+    with _ssl_context_lock:
+        if _ssl_context is None:
+            import ssl
+            _ssl_context = ssl.create_default_context()
+        return _ssl_context
+
+def _get_connection(scheme: str, netloc: str) -> http.client.HTTPConnection:
+    pool = getattr(_connections, 'pool', None)
+    if pool is None:
+        pool = _connections.pool = {}
+    key = (scheme, netloc)
+    if key not in pool:
+        if scheme == 'https':
+            pool[key] = http.client.HTTPSConnection(netloc, timeout=TIMEOUT, context=_get_ssl_context())
+        else:
+            pool[key] = http.client.HTTPConnection(netloc, timeout=TIMEOUT)
+    return pool[key]
+
+def _drop_connection(scheme: str, netloc: str):
+    conn = getattr(_connections, 'pool', {}).pop((scheme, netloc), None)
+    if conn is not None:
+        conn.close()
+
+def reset_connections():
+    """
+    Close every connection held by this thread. Used after an aborted
+    transfer, which may have left a (possibly redirected-to) connection with
+    unread data on it.
+    """
+    pool = getattr(_connections, 'pool', {})
+    for conn in pool.values():
+        conn.close()
+    pool.clear()
+
+class HTTPStatusError(RuntimeError):
+    def __init__(self, url: str, status: int, reason: str):
+        super().__init__(f"HTTP {status} {reason} for {url}")
+        self.status = status
+
+class ChecksumError(ValueError):
+    """An installed file whose SHA-256 is not the one the index lists."""
+
+def open_url(url: str, headers: Optional[Dict[str, str]] = None, method: str = 'GET') -> http.client.HTTPResponse:
+    """
+    GET (or `method`) `url` over a kept-alive connection, following redirects.
+    Returns 200 and 206 responses, raises HTTPStatusError for anything else.
+    The caller must read the response to the end (or close it) before the
+    connection can be reused by the next request on this thread.
+    """
+    headers = headers or {}
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        conn = _get_connection(parts.scheme, parts.netloc)
+        try:
+            conn.request(method, path, headers=headers)
+            response = conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionError):
+            # The server closed an idle kept-alive connection; retry once on a fresh one
+            _drop_connection(parts.scheme, parts.netloc)
+            conn = _get_connection(parts.scheme, parts.netloc)
+            conn.request(method, path, headers=headers)
+            response = conn.getresponse()
+
+        if response.status in (301, 302, 303, 307, 308):
+            location = response.getheader('Location')
+            response.read()
+            url = urllib.parse.urljoin(url, location)
+            continue
+        if response.status not in (200, 206):
+            response.read()
+            raise HTTPStatusError(url, response.status, response.reason)
+        return response
+    raise RuntimeError(f"Too many redirects for {url}")
+
+def content_length(url: str) -> Optional[int]:
+    """The size of `url` from the Content-Length of a HEAD request, None when the server doesn't send one."""
+    with open_url(url, method='HEAD') as response:
+        response.read()
+        length = response.getheader('Content-Length')
+    return int(length) if length is not None and length.isdigit() else None
+
+def _part_paths(output_path: Path) -> Tuple[Path, Path]:
+    part_path = output_path.with_name(output_path.name + ".part")
+    return part_path, part_path.with_name(part_path.name + ".json")
+
+def _load_part_meta(meta_path: Path, url: str) -> Optional[dict]:
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('url') != url:
+        return None
+    return meta
+
+def _save_part_meta(meta_path: Path, meta: dict):
+    tmp_path = meta_path.with_name(meta_path.name + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+def _range_matches(response: http.client.HTTPResponse, offset: int, etag: Optional[str]) -> bool:
+    content_range = response.getheader('Content-Range', '')
+    if not content_range.startswith(f"bytes {offset}-"):
+        return False
+    return not (etag and response.getheader('ETag') and response.getheader('ETag') != etag)
+
+class _StreamingInstall:
+    """
+    Decompresses a file into place as its bytes arrive, instead of in a
+    second pass over the finished `.part`. The `.part` is still written, as
+    the decompressor's state can't be saved: a resumed transfer replays it.
+    """
+    def __init__(self, output_path: Path, codec: str = 'gz', sha256: Optional[str] = None):
+        self.output_path = output_path
+        self.tmp_path = output_path.with_name(output_path.name + ".tmp")
+        self.codec = codec
+        self.sha256 = sha256
+        self.f_out = None
+        self.decompressor = None
+        self.digest = None
+        self.seconds = 0.0
+
+    def start(self, part_path: Path, received: int):
+        """Start over, from the first `received` bytes of `part_path`."""
+        if self.f_out is not None:
+            self.f_out.close()
+        self.f_out = open(self.tmp_path, 'wb')
+        self.decompressor = model_codecs.CODECS[self.codec].decompressor()
+        self.digest = hashlib.sha256()
+        if received:
+            with open(part_path, 'rb') as f_in:
+                while received > 0 and (chunk := f_in.read(min(CHUNK_SIZE, received))):
+                    self.write(chunk)
+                    received -= len(chunk)
+
+    def write(self, chunk: bytes):
+        started = time.monotonic()
+        try:
+            data = self.decompressor.decompress(chunk)
+        except model_codecs.DECODE_ERRORS as e:
+            raise model_codecs.DecodeError(f"{self.output_path.name}: {e}")
+        if self.sha256 is not None:
+            self.digest.update(data)
+        self.f_out.write(data)
+        self.seconds += time.monotonic() - started
+
+    def finish(self):
+        if not self.decompressor.eof:
+            raise model_codecs.DecodeError(f"{self.output_path.name}: compressed file ended before the end-of-stream marker was reached")
+        if self.sha256 is not None and self.digest.hexdigest() != self.sha256:
+            raise ChecksumError(f"{self.output_path.name} hashes to {self.digest.hexdigest()}, expected {self.sha256}")
+        written = self.f_out.tell()
+        self.f_out.close()
+        os.replace(self.tmp_path, self.output_path)
+        record = transfer_metrics.current()
+        if record is not None:
+            record.install_seconds += self.seconds
+            record.bytes_written += written
+
+    def abort(self):
+        if self.f_out is not None:
+            self.f_out.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+def fetch_part(url: str, part_path: Path, meta_path: Path, sink: Optional[_StreamingInstall] = None):
+    """
+    Fetch the raw bytes of `url` into `part_path`, continuing a previous
+    partial transfer with a Range request when the sidecar metadata says the
+    part belongs to the same URL. The server's ETag/Last-Modified is sent as
+    If-Range, so a changed file (or a server that ignores ranges) comes back
+    as a plain 200 and the part is restarted from zero. A `sink` is fed the
+    bytes of the file as they arrive, from the start.
+    """
+    record = transfer_metrics.current()
+    meta = _load_part_meta(meta_path, url)
+    received = 0
+    headers = {}
+    if meta is not None and part_path.exists():
+        received = min(meta['received'], part_path.stat().st_size)
+        validator = meta.get('etag') or meta.get('last_modified')
+        if received > 0:
+            headers['Range'] = f"bytes={received}-"
+            if validator:
+                headers['If-Range'] = validator
+
+    requested = time.monotonic()
+    try:
+        response = open_url(url, headers)
+    except HTTPStatusError as e:
+        if e.status != 416:
+            raise
+        # Our offset doesn't fit the current file; start over
+        received = 0
+        response = open_url(url)
+
+    etag = response.getheader('ETag')
+    if response.status == 206 and not _range_matches(response, received, meta['etag'] if meta else None):
+        # The server handed back a different slice or a different version of the file
+        response.close()
+        reset_connections()
+        response = open_url(url)
+        etag = response.getheader('ETag')
+    if record is not None:
+        # Up to the headers of the response we read from, including a 416 or
+        # mismatched range request that had to be repeated
+        record.ttfb = time.monotonic() - requested
+
+    with response:
+        last_modified = response.getheader('Last-Modified')
+        if response.status == 200:
+            received = 0
+        else:
+            log(f"Resuming {url} at byte {received}")
+        if record is not None:
+            record.resumed_from = received
+
+        meta = {'url': url, 'etag': etag, 'last_modified': last_modified, 'received': received}
+        _save_part_meta(meta_path, meta)
+        if sink is not None:
+            sink.start(part_path, received)
+        with open(part_path, 'r+b' if received else 'wb') as f_out:
+            f_out.truncate(received)
+            f_out.seek(received)
+            try:
+                since_checkpoint = 0
+                while chunk := response.read(CHUNK_SIZE):
+                    if record is not None:
+                        record.bytes_received += len(chunk)
+                    f_out.write(chunk)
+                    if sink is not None:
+                        sink.write(chunk)
+                    since_checkpoint += len(chunk)
+                    if since_checkpoint >= PART_CHECKPOINT_BYTES:
+                        f_out.flush()
+                        meta['received'] = f_out.tell()
+                        _save_part_meta(meta_path, meta)
+                        since_checkpoint = 0
+                if response.length:
+                    # read(amt) reports a dropped connection as a short EOF
+                    raise http.client.IncompleteRead(b'', response.length)
+            finally:
+                f_out.flush()
+                meta['received'] = f_out.tell()
+                _save_part_meta(meta_path, meta)
+
+def fetch_with_retries(url: str, part_path: Path, meta_path: Path, sink: Optional[_StreamingInstall] = None):
+    record = transfer_metrics.current()
+    started = time.monotonic()
+    installing = sink.seconds if sink is not None else 0.0
+    try:
+        for attempt in range(RETRIES + 1):
+            try:
+                fetch_part(url, part_path, meta_path, sink)
+                return
+            except (http.client.HTTPException, OSError, HTTPStatusError) as e:
+                # A half-read response leaves the connection in an unusable state
+                reset_connections()
+                if attempt == RETRIES or (isinstance(e, HTTPStatusError) and e.status < 500):
+                    raise
+                log(f"Error downloading {url} ({e}), retrying")
+                if record is not None:
+                    record.retries += 1
+                    # Time to first byte of the attempt that delivers
+                    record.ttfb = None
+                time.sleep(2 ** attempt)
+            except BaseException:
+                reset_connections()
+                raise
+    finally:
+        if record is not None:
+            # Decompressing what arrived counts as installing it
+            record.transfer_seconds += time.monotonic() - started - (sink.seconds - installing if sink is not None else 0.0)
+
+def install(source: Path, output_path: Path, decompress: bool, codec: str = 'gz', sha256: Optional[str] = None):
+    """
+    Stream `source` (decompressing it with `codec` if `decompress`) into
+    `output_path` through a temporary file that is renamed into place once
+    complete, and only if its contents hash to `sha256` when one is given.
+    """
+    record = transfer_metrics.current()
+    started = time.monotonic()
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    digest = hashlib.sha256()
+    try:
+        with (model_codecs.open_decompressed(source, codec) if decompress else open(source, 'rb')) as f_in, open(tmp_path, 'wb') as f_out:
+            while chunk := f_in.read(CHUNK_SIZE):
+                if sha256 is not None:
+                    digest.update(chunk)
+                f_out.write(chunk)
+            written = f_out.tell()
+        if sha256 is not None and digest.hexdigest() != sha256:
+            raise ChecksumError(f"{output_path.name} hashes to {digest.hexdigest()}, expected {sha256}")
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, output_path)
+    if record is not None:
+        record.install_seconds += time.monotonic() - started
+        record.bytes_written += written
+
+def cached_copy_current(url: str, validators: Dict[str, Optional[str]]) -> bool:
+    """
+    Whether a cached copy of `url` served with `validators` (see
+    DownloadCache.validators) is still what the server has. URLs pinning a
+    commit always are; others are revalidated with a conditional HEAD
+    request, and a copy without validators is never trusted. A server that
+    can't be reached leaves the copy in use.
+    """
+    if PINNED_URL_RE.search(url):
+        return True
+    headers = {}
+    if validators['etag']:
+        headers['If-None-Match'] = validators['etag']
+    if validators['last_modified']:
+        headers['If-Modified-Since'] = validators['last_modified']
+    if not headers:
+        return False
+    try:
+        with open_url(url, headers, method='HEAD') as response:
+            response.read()
+            etag, last_modified = response.getheader('ETag'), response.getheader('Last-Modified')
+    except HTTPStatusError as e:
+        return e.status == 304
+    except (http.client.HTTPException, OSError) as e:
+        log(f"Could not revalidate cached {url} ({e}), using it")
+        return True
+    # A server ignoring conditional requests answers 200 either way
+    return etag == validators['etag'] and last_modified == validators['last_modified']
+
+def download(url: str, output_path: Path, decompress: bool, cache: Optional[DownloadCache] = None, codec: str = 'gz',
+             sha256: Optional[str] = None):
+    """
+    Download `url` into `output_path`, decompressing it with `codec` (see
+    model_codecs) if `decompress`.
+    The raw bytes are collected in a `.part` file (resumable across runs,
+    see fetch_part) and streamed into place through a temporary file, so an
+    interrupted download never leaves a truncated output behind. Without a
+    `cache`, they are decompressed as they arrive; with one, previously
+    fetched URLs are served from disk (once revalidated, see
+    cached_copy_current) and new downloads are added to it and installed
+    from there. With a `sha256`, the result is checked against it before it
+    is renamed into place; a cached copy that doesn't match is fetched
+    again, a download that doesn't raises ChecksumError and is dropped.
+    """
+    record = transfer_metrics.current()
+    source = cache.lookup(url) if cache is not None else None
+    if source is not None and not cached_copy_current(url, cache.validators(url)):
+        log(f"Cached {url} is out of date")
+        cache.release(source)
+        cache.discard(url)
+        source = None
+    if source is not None:
+        log(f"Using cached {url}")
+        try:
+            install(source, output_path, decompress, codec, sha256)
+            if record is not None:
+                record.outcome = "cached"
+            return
+        except (ChecksumError,) + model_codecs.DECODE_ERRORS as e:
+            log(f"Cached {url} is corrupt ({e}), downloading it again")
+            cache.discard(url)
+        finally:
+            cache.release(source)
+
+    log(f"Downloading {url}")
+    part_path, meta_path = _part_paths(output_path)
+    if cache is None and decompress:
+        sink = _StreamingInstall(output_path, codec, sha256)
+        try:
+            fetch_with_retries(url, part_path, meta_path, sink)
+            sink.finish()
+        except (model_codecs.DecodeError, ChecksumError):
+            # Corrupt payload, make sure it gets fetched again next time
+            sink.abort()
+            part_path.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+            raise
+        except BaseException:
+            sink.abort()
+            raise
+        meta_path.unlink(missing_ok=True)
+        part_path.unlink()
+        return
+    fetch_with_retries(url, part_path, meta_path)
+    meta = _load_part_meta(meta_path, url) or {}
+    meta_path.unlink(missing_ok=True)
+    if cache is None and not decompress:
+        os.replace(part_path, output_path)
+        if record is not None:
+            record.bytes_written += output_path.stat().st_size
+        return
+    source = cache.store(url, part_path, meta.get('etag'), meta.get('last_modified'))
+
+    try:
+        install(source, output_path, decompress, codec, sha256)
+    except (ChecksumError,) + model_codecs.DECODE_ERRORS:
+        # Corrupt payload, make sure it gets fetched again next time
+        cache.discard(url)
+        raise
+    finally:
+        cache.release(source)
+
+def _read_source(source: str) -> bytes:
+    if source.startswith(("http://", "https://")):
+        with open_url(source) as response:
+            return response.read()
+    with open(source, 'rb') as f:
+        return f.read()
+
+def load_shards(manifest: dict, manifest_source: str, languages: Optional[List[str]] = None,
+                cache_dir: Path = INDEX_CACHE_DIR) -> List[dict]:
+    """
+    The language entries of a sharded index (see indexer.py --shards-dir),
+    optionally only those of `languages`. Shards are kept by hash in a
+    directory of `cache_dir` for `manifest_source`, so only the ones that
+    changed since the last run are fetched; the ones `manifest` no longer
+    lists are removed from it, leaving those of other sources alone.
+    """
+    base = manifest_source.rsplit("/", 1)[0] if "/" in manifest_source else "."
+    source_key = manifest_source if manifest_source.startswith(("http://", "https://")) else str(Path(manifest_source).resolve())
+    cache_dir = cache_dir / hashlib.sha1(source_key.encode()).hexdigest()[:16]
+    entries = []
+    fetched = 0
+    for lang_code, shard in sorted(manifest['shards'].items()):
+        if languages is not None and lang_code not in languages:
+            continue
+        cached_path = cache_dir / f"{shard['sha256']}.json"
+        try:
+            data = cached_path.read_bytes()
+        except FileNotFoundError:
+            data = gzip.decompress(_read_source(f"{base}/{shard['path']}"))
+            if hashlib.sha256(data).hexdigest() != shard['sha256']:
+                raise ValueError(f"Shard {shard['path']} does not match its hash in {manifest_source}")
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = cached_path.with_name(cached_path.name + ".tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, cached_path)
+            fetched += 1
+        entries.append(json.loads(data))
+    listed = {f"{shard['sha256']}.json" for shard in manifest['shards'].values()}
+    for path in cache_dir.glob("*.json") if cache_dir.is_dir() else []:
+        if path.name not in listed:
+            path.unlink(missing_ok=True)
+    print(f"Index: {len(entries)} languages, {fetched} shards fetched")
+    return entries
+
+def load_index(source: str, languages: Optional[List[str]] = None) -> Dict[str, dict]:
+    """
+    File entries of an index written by indexer.py, by filename. `source`
+    is a path or URL to either an index.json or the manifest.json of a
+    sharded index, of which only the shards of `languages` are read.
+    """
+    index = json.loads(_read_source(str(source)))
+    if 'shards' in index:
+        if index.get('version') != INDEX_SHARDS_VERSION:
+            raise ValueError(f"Unsupported index manifest version {index.get('version')}")
+        language_entries = load_shards(index, str(source), languages)
+    else:
+        language_entries = index['languages']
+    return {
+        files[key]['name']: files[key]
+        for language in language_entries
+        for files in (language['to'], language['from']) if files
+        for key in files
+    }
+
+def upgrade(job: DownloadJob, entry: Optional[dict], cache: Optional[DownloadCache] = None):
+    """
+    Bring `job.output_path` to the version described by its index `entry`.
+    A file that is already there is left alone if its hash matches, and
+    patched if the index has a delta from its current version; anything
+    else (including a patch that fails to apply) is a full download, of a
+    recompressed variant when the index lists one in a codec we can decode.
+    Whatever is installed must hash to the entry's sha256: a variant that
+    doesn't falls back to the .gz, which raises ChecksumError if it doesn't
+    either.
+    """
+    record = transfer_metrics.current()
+    sha256 = entry.get('sha256') if entry is not None and job.decompress else None
+    if entry is not None and 'sha256' in entry and job.decompress and job.output_path.exists():
+        current = sha256_file(job.output_path)
+        if current == entry['sha256']:
+            log(f"Up to date {job.output_path.name}")
+            if record is not None:
+                record.outcome = "up-to-date"
+            return
+        for patch in entry.get('deltas', []):
+            if patch['from_sha256'] != current or patch['to_sha256'] != entry['sha256']:
+                continue
+            log(f"Patching {job.output_path.name} from {patch['url']}")
+            part_path, meta_path = _part_paths(job.output_path.with_name(job.output_path.name + ".patch"))
+            try:
+                fetch_with_retries(patch['url'], part_path, meta_path)
+                meta_path.unlink(missing_ok=True)
+                started = time.monotonic()
+                delta.apply_patch(job.output_path, part_path, job.output_path, entry['sha256'])
+                if record is not None:
+                    record.outcome = "patched"
+                    record.install_seconds += time.monotonic() - started
+                    record.bytes_written += job.output_path.stat().st_size
+                return
+            except (delta.PatchError, http.client.HTTPException, OSError) as e:
+                log(f"Patching {job.output_path.name} failed ({e}), downloading it in full")
+            finally:
+                part_path.unlink(missing_ok=True)
+    for variant in entry.get('variants', []) if entry is not None and job.decompress else []:
+        if variant['codec'] not in model_codecs.CODECS:
+            continue
+        if record is not None:
+            record.url = variant['url']
+            record.expected_bytes = variant['size_bytes']
+        try:
+            download(variant['url'], job.output_path, job.decompress, cache, variant['codec'], sha256)
+            return
+        except (HTTPStatusError, http.client.HTTPException, ChecksumError) + model_codecs.DECODE_ERRORS as e:
+            log(f"Downloading {variant['url']} failed ({e}), falling back to {job.url}")
+        if record is not None:
+            record.url = job.url
+            record.expected_bytes = job.size
+    download(job.url, job.output_path, job.decompress, cache, sha256=sha256)
+
+def language_pair_jobs(src_lang: str, tgt_lang: str, model_type: str, output_dir: Path,
+                       base_urls: BaseUrls = BaseUrls()) -> List[DownloadJob]:
+    """
+    List the model, vocab and lex files needed for one direction, plus the
+    tessdata and extra files of the languages involved.
+    """
     bin_dir = output_dir / "bin"
     tessdata_dir = output_dir / "tesseract" / "tessdata"
 
-    bin_dir.mkdir(parents=True, exist_ok=True)
-    tessdata_dir.mkdir(parents=True, exist_ok=True)
+    jobs = []
+    files = generate.generate_files_for_language(src_lang, tgt_lang)
+    for filename in sorted(set(files.values())):
+        url = f"{base_urls.translation}/{model_type}/{src_lang}{tgt_lang}/{filename}.gz"
+        jobs.append(DownloadJob(url, bin_dir / filename, decompress=True))
+
+    for lang_code in (src_lang, tgt_lang):
+        tess_filename = f"{generate.TESSERACT_LANGUAGE_MAPPINGS[lang_code]}.traineddata"
+        jobs.append(DownloadJob(f"{base_urls.tesseract}/{tess_filename}", tessdata_dir / tess_filename, decompress=False))
+        for filename in generate.EXTRA_FILES.get(lang_code, []):
+            jobs.append(DownloadJob(f"{base_urls.dictionary}/extra/{filename}", bin_dir / filename, decompress=False))
+    return jobs
+
+def direction_qualities(models: Optional[ModelsCatalog] = None, catalog_path: Path = CATALOG_PATH) -> Dict[str, str]:
+    """
+    The quality each pair is fetched in unless one is asked for: the best one
+    in `models` if given, otherwise the one in the app's catalog.json. Pairs
+    without models are left out.
+    """
+    if models is not None:
+        return {pair: models.best_quality(pair) for pair in models.pairs()}
+    with open(catalog_path, 'r') as f:
+        catalog = json.load(f)
+    if catalog.get('version') != generate.CATALOG_VERSION:
+        raise ValueError(f"{catalog_path} is version {catalog.get('version')}, expected {generate.CATALOG_VERSION}")
+    qualities = {f"en{lang_code}": entry['quality'] for lang_code, entry in catalog['fromEnglish'].items()}
+    qualities.update({f"{lang_code}en": entry['quality'] for lang_code, entry in catalog['toEnglish'].items()})
+    return qualities
 
+def available_languages(qualities: Dict[str, str]) -> List[str]:
+    """The languages with models both to and from English in `qualities`."""
+    return sorted({pair_language(pair) for pair in qualities if f"en{pair_language(pair)}" in qualities and f"{pair_language(pair)}en" in qualities})
+
+def directions_for_languages(lang_specs: List[str], default_quality: Optional[str],
+                             qualities: Optional[Dict[str, str]] = None) -> List[Tuple[str, str, str]]:
+    """
+    Expand `LANG[:QUALITY]` specs into (src, tgt, quality) directions to and
+    from English. Without a quality in the spec or a `default_quality`, each
+    direction gets its own from `qualities` (see direction_qualities).
+    """
+    directions = []
+    for spec in lang_specs:
+        lang_code, _, quality = spec.partition(":")
+        if lang_code == "en":
+            continue
+        for src_lang, tgt_lang in (("en", lang_code), (lang_code, "en")):
+            pair_quality = quality or default_quality or (qualities or {}).get(f"{src_lang}{tgt_lang}")
+            if pair_quality is None:
+                raise ValueError(f"There is no {src_lang}{tgt_lang} model; ask for a quality to try anyway (e.g. {lang_code}:tiny)")
+            directions.append((src_lang, tgt_lang, pair_quality))
+    return directions
+
+def load_file_sizes(fallback: bool = True) -> Tuple[Dict[str, int], str]:
+    """
+    Compressed sizes by filename, from the sizes recorded by generate.py for
+    the pinned COMMIT, or else (if `fallback`) the newest ones recorded for
+    another commit, and which of these they are. These are for the quality
+    generate.py picked, so they are approximate when another quality is
+    requested.
+    """
+    path = SIZES_DIR / f"{generate.COMMIT}.json"
+    source = str(path)
+    if not path.exists():
+        recorded = sorted(SIZES_DIR.glob("*.json"), key=lambda path: path.stat().st_mtime) if SIZES_DIR.is_dir() else []
+        if not recorded or not fallback:
+            return {}, f"none recorded for {generate.COMMIT[:7]} in {SIZES_DIR}"
+        path = recorded[-1]
+        source = f"{path}, recorded for commit {path.stem[:7]} rather than {generate.COMMIT[:7]}"
+    with open(path, 'r') as f:
+        recorded_sizes = json.load(f)
+    return {filename: size for lang_sizes in recorded_sizes.values() for filename, size in lang_sizes.items()}, source
+
+def plan_downloads(directions: List[Tuple[str, str, str]], output_dir: Path, base_urls: BaseUrls = BaseUrls(),
+                   sizes: Optional[Dict[str, int]] = None, models: Optional[ModelsCatalog] = None) -> List[DownloadJob]:
+    """
+    Resolve (src, tgt, quality) directions into the list of files to fetch,
+    with files shared between directions or languages (tessdata for nb/nn,
+    English OCR, extra files) appearing once. English tessdata is always
+    included, like the app does.
+    With the `models` of a local checkout, requested qualities are checked
+    against it and model sizes are exact for the quality asked for. Without
+    `sizes`, the others come from load_file_sizes(), and where they came
+    from is printed.
+    """
+    if sizes is None:
+        sizes, source = load_file_sizes()
+        print(f"Sizes: {f'models from {models.repo_path}, the rest from ' if models is not None else ''}{source}")
+    planned: Dict[Path, DownloadJob] = {}
+    for src_lang, tgt_lang, quality in directions:
+        pair = f"{src_lang}{tgt_lang}"
+        if models is not None and quality not in models.qualities(pair):
+            available = ", ".join(sorted(models.qualities(pair))) or "none"
+            raise ValueError(f"{pair} has no {quality} model (available: {available})")
+        for job in language_pair_jobs(src_lang, tgt_lang, quality, output_dir, base_urls):
+            existing = planned.get(job.output_path)
+            if existing is not None and existing.url != job.url:
+                raise ValueError(f"{job.output_path.name} is requested from both {existing.url} and {job.url}")
+            size = models.file_size(quality, pair, job.output_path.name) if models is not None and job.decompress else None
+            planned[job.output_path] = job._replace(size=size if size is not None else sizes.get(job.output_path.name))
+    return sorted(planned.values(), key=lambda job: job.output_path)
+
+def print_plan(plan: List[DownloadJob], output_dir: Path, verbose: bool = True):
+    for job in plan if verbose else []:
+        size = f"{job.size / 1024 ** 2:8.1f} MB" if job.size is not None else "       ? MB"
+        print(f"{size}  {job.output_path.relative_to(output_dir)}  <- {job.url}")
+    known = sum(job.size for job in plan if job.size is not None)
+    unknown = sum(1 for job in plan if job.size is None)
+    print(f"{len(plan)} files, {known / 1024 ** 2:.1f} MB to download", end="")
+    print(f" ({unknown} of unknown size)" if unknown else "")
+
+def run_job(job: DownloadJob, cache: Optional[DownloadCache] = None, index: Optional[Dict[str, dict]] = None,
+            metrics: Optional[TransferMetrics] = None):
+    """Fetch (or, with an `index`, upgrade) one file, recording its metrics if asked to."""
+    if metrics is None:
+        if index is None:
+            download(job.url, job.output_path, job.decompress, cache)
+        else:
+            upgrade(job, index.get(job.output_path.name), cache)
+        return
+    with metrics.track(job.url, job.output_path, job.size):
+        run_job(job, cache, index)
+
+def execute_plan(plan: List[DownloadJob], jobs: int = DEFAULT_JOBS, cache: Optional[DownloadCache] = None,
+                 index: Optional[Dict[str, dict]] = None, metrics: Optional[TransferMetrics] = None) -> List[DownloadJob]:
+    """
+    Run the downloads in `plan`, up to `jobs` at once. With an `index` (see
+    load_index), files already present are upgraded in place where possible.
+    With `metrics`, the transfer of each file is recorded.
+    Returns the jobs that failed.
+    """
+    for job in plan:
+        job.output_path.parent.mkdir(parents=True, exist_ok=True)
+    if metrics is not None:
+        metrics.expect(len(plan), sum(job.size or 0 for job in plan))
+
+    print(f"Downloading {len(plan)} files with {jobs} parallel connections")
+    failed = []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(run_job, job, cache, index, metrics): job for job in plan}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                log(f"Error downloading {job.url}: {e}")
+                failed.append(job)
+    return failed
+
+def download_language_pair(src_lang, tgt_lang, model_type="base", output_dir="models", metrics: Optional[TransferMetrics] = None):
+    output_dir = Path(output_dir)
     print(f"\n=== Downloading {src_lang} -> {tgt_lang} ({model_type}) ===")
-    en_to_other_files = generate.generate_files_for_language(src_lang, tgt_lang)
-    for filename in sorted(set(en_to_other_files.values())):
-        url = f"{generate.TRANSLATION_BASE_URL}/{model_type}/{src_lang}{tgt_lang}/{filename}.gz"
-        output_path = bin_dir / filename
-        download(url, output_path, decompress=True)
-
-    lang_code = src_lang if src_lang != "en" else tgt_lang
-    print(f"\n=== Downloading Tesseract OCR for {lang_code.upper()} ===")
-    tess_name = generate.TESSERACT_LANGUAGE_MAPPINGS[lang_code]
-    tess_filename = f"{tess_name}.traineddata"
-    tess_url = f"{generate.TESSERACT_BASE_URL}/{tess_filename}"
-    tess_output_path = tessdata_dir / tess_filename
-    if not tess_output_path.exists():  # don't want to download both times
-      download(tess_url, tess_output_path, decompress=False)
+    plan = plan_downloads([(src_lang, tgt_lang, model_type)], output_dir)
+    # Shared with the other direction
+    plan = [job for job in plan if job.decompress or not job.output_path.exists()]
+    if metrics is not None:
+        metrics.expect(len(plan), sum(job.size or 0 for job in plan))
+    for job in plan:
+        job.output_path.parent.mkdir(parents=True, exist_ok=True)
+        run_job(job, metrics=metrics)
 
-if __name__ == "__main__":
-    download_language_pair("en", "es", "tiny", "translator_models")
-    download_language_pair("es", "en", "tiny", "translator_models")
+def main():
+    parser = argparse.ArgumentParser(description="Download translation and OCR models for offline use.")
+    parser.add_argument("languages", nargs="+", help="language codes, optionally with a quality (e.g. es fr nl:tiny), or 'all'")
+    parser.add_argument("--quality", choices=generate.QUALITIES,
+                        help="quality for languages without one (default: the catalog's, or --repository's best, for each direction)")
+    parser.add_argument("--output-dir", default="translator_models", type=Path)
+    parser.add_argument("--jobs", default=DEFAULT_JOBS, type=int, help="maximum concurrent downloads")
+    parser.add_argument("--dry-run", action="store_true", help="print the download plan and exit")
+    parser.add_argument("--translation-base-url", default=generate.TRANSLATION_BASE_URL)
+    parser.add_argument("--tesseract-base-url", default=generate.TESSERACT_BASE_URL)
+    parser.add_argument("--dictionary-base-url", default=generate.DICTIONARY_BASE_URL)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, type=Path)
+    parser.add_argument("--cache-size", default=DEFAULT_MAX_BYTES, type=parse_size, help="cache budget, e.g. 500M or 10G")
+    parser.add_argument("--no-cache", action="store_true", help="always fetch from the network")
+    parser.add_argument("--repository", type=Path, help="local firefox-translations-models checkout to check qualities and sizes against")
+    parser.add_argument("--index", help="index.json or sharded index manifest.json (path or URL) from indexer.py; "
+                        "existing files are checked against it and patched when a delta is available")
+    parser.add_argument("--metrics", type=Path, help="append per-file transfer metrics to this JSON lines file")
+    parser.add_argument("--summary", action="store_true", help="print a report of where the time went")
+    parser.add_argument("--progress", action="store_true", help="show progress and ETA on stderr")
+    parser.add_argument("--profile", type=Path, help="profile the download threads with cProfile and save the stats here")
+    parser.add_argument("--dedupe", choices=DEDUPE_MODES, help="link downloaded files identical to each other or to --link-dest files")
+    parser.add_argument("--link-dest", nargs="+", type=Path, default=[], help="other trees (e.g. a previous image) to link identical files to")
+    args = parser.parse_args()
+
+    try:
+        models = ModelsCatalog.load(args.repository) if args.repository else None
+        # Not needed when every quality is given, e.g. outside a checkout
+        qualities = direction_qualities(models) if args.quality is None or args.languages == ["all"] else {}
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not load the models catalog: {e}")
+        sys.exit(1)
+    lang_specs = available_languages(qualities) if args.languages == ["all"] else args.languages
+    for spec in lang_specs:
+        lang_code, _, quality = spec.partition(":")
+        if lang_code not in generate.LANGUAGE_NAMES:
+            print(f"Error: Unsupported language code '{lang_code}'")
+            print(f"Supported language codes: {sorted(generate.LANGUAGE_NAMES.keys())}")
+            sys.exit(1)
+        if quality and quality not in generate.QUALITIES:
+            print(f"Error: Unknown quality '{quality}', expected one of {generate.QUALITIES}")
+            sys.exit(1)
 
-    # dutch has base-memory for nl->en, which is much better than tiny
-    # but only tiny for en->nl
+    base_urls = BaseUrls(args.translation_base_url, args.tesseract_base_url, args.dictionary_base_url)
+    try:
+        plan = plan_downloads(directions_for_languages(lang_specs, args.quality, qualities), args.output_dir, base_urls, models=models)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print_plan(plan, args.output_dir, verbose=args.dry_run)
+    if args.dry_run:
+        return
+
+    cache = None if args.no_cache else DownloadCache(args.cache_dir, args.cache_size)
+    try:
+        index = load_index(args.index, [spec.partition(":")[0] for spec in lang_specs]) if args.index else None
+    except (OSError, ValueError, HTTPStatusError) as e:
+        print(f"Error: Could not load index {args.index}: {e}")
+        sys.exit(1)
+    metrics = None
+    if args.metrics or args.summary or args.progress or args.profile:
+        metrics = TransferMetrics(args.metrics, args.progress, args.profile)
+    try:
+        failed = execute_plan(plan, args.jobs, cache, index, metrics)
+    finally:
+        if metrics is not None:
+            metrics.close()
+    if metrics is not None:
+        metrics.print_summary()
+    if args.dedupe:
+        written = [job.output_path for job in plan if job not in failed and job.output_path.exists()]
+        dedupe(written, args.dedupe, tree_files(args.link_dest)).print()
+    if cache is not None:
+        cache.close()
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits ({stats['hit_bytes']} bytes), {stats['misses']} misses, "
+              f"{stats['evictions']} evictions, {stats['total_bytes']}/{stats['max_bytes']} bytes used")
+    if failed:
+        print(f"{len(failed)} downloads failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
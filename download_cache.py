@@ -0,0 +1,203 @@
+"""
+Persistent, content-addressed cache for downloaded model files.
+Objects are stored by the SHA-256 of their (still compressed) bytes, and an
+index maps each URL to its object and the ETag/Last-Modified it was served
+with. URLs don't all pin a commit (tessdata follows a branch, mirrors serve
+whatever they have), so download.py revalidates those before using a hit.
+The total size of the objects is kept under a byte budget by evicting the
+least recently used ones, except those handed out by lookup() or store()
+and not yet given back with release().
+"""
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() / "offline-translator" / "downloads"
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+HASH_CHUNK_SIZE = 1024 * 1024
+
+SIZE_SUFFIXES = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+def parse_size(value: str) -> int:
+    """Parse a byte count such as `500M` or `10G`."""
+    value = value.strip().upper().removesuffix('B')
+    if value and value[-1] in SIZE_SUFFIXES:
+        return int(float(value[:-1]) * SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def sha256_mmap(path: Path) -> str:
+    """
+    SHA-256 of a file, hashed straight from the page cache: the whole
+    mapping goes to hashlib in one call, which releases the GIL, so threads
+    hash in parallel without copying the file through Python.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.sha256().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.sha256(mm).hexdigest()
+
+class DownloadCache:
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / "objects"
+        self.index_path = self.cache_dir / "index.json"
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+        # url -> {"sha256", "size", "etag", "last_modified"}; sha256 -> last use timestamp
+        self.urls: Dict[str, dict] = {}
+        self.last_used: Dict[str, float] = {}
+        if self.index_path.exists():
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            self.urls = index.get('urls', {})
+            self.last_used = index.get('last_used', {})
+        # sha256 -> number of handed out object paths still being read
+        self.pins: Dict[str, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.hit_bytes = 0
+        self.stored_bytes = 0
+        self.evictions = 0
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def total_bytes(self) -> int:
+        sizes = {entry['sha256']: entry['size'] for entry in self.urls.values()}
+        return sum(sizes.values())
+
+    def _pin(self, digest: str):
+        self.pins[digest] = self.pins.get(digest, 0) + 1
+
+    def lookup(self, url: str) -> Optional[Path]:
+        """
+        Return the cached object for `url`, or None on a miss. The object is
+        not evicted until it is given back with release().
+        """
+        with self.lock:
+            entry = self.urls.get(url)
+            if entry is not None:
+                path = self._object_path(entry['sha256'])
+                try:
+                    valid = path.stat().st_size == entry['size']
+                except FileNotFoundError:
+                    valid = False
+                if valid:
+                    self.hits += 1
+                    self.hit_bytes += entry['size']
+                    self.last_used[entry['sha256']] = time.time()
+                    self._pin(entry['sha256'])
+                    return path
+                # Object went missing or was truncated behind our back
+                del self.urls[url]
+            self.misses += 1
+            return None
+
+    def validators(self, url: str) -> Dict[str, Optional[str]]:
+        """The ETag and Last-Modified `url` was cached with (either may be None)."""
+        with self.lock:
+            entry = self.urls.get(url, {})
+            return {'etag': entry.get('etag'), 'last_modified': entry.get('last_modified')}
+
+    def store(self, url: str, path: Path, etag: Optional[str] = None, last_modified: Optional[str] = None) -> Path:
+        """
+        Move the fully downloaded file at `path` into the cache under `url`,
+        with the validators it was served with, and return the object path, to
+        be given back with release() like one from lookup(). Identical
+        content fetched from different URLs is only stored once.
+        """
+        digest = sha256_file(path)
+        size = path.stat().st_size
+        object_path = self._object_path(digest)
+        with self.lock:
+            if object_path.exists():
+                path.unlink()
+            else:
+                object_path.parent.mkdir(exist_ok=True)
+                shutil.move(path, object_path)
+                self.stored_bytes += size
+            self.urls[url] = {'sha256': digest, 'size': size, 'etag': etag, 'last_modified': last_modified}
+            self.last_used[digest] = time.time()
+            self._pin(digest)
+            self._evict()
+            self._save()
+        return object_path
+
+    def release(self, path: Path):
+        """
+        Let an object returned by lookup() or store() be evicted again, and
+        evict what pinned objects kept over the budget.
+        """
+        with self.lock:
+            digest = path.name
+            self.pins[digest] -= 1
+            if not self.pins[digest]:
+                del self.pins[digest]
+                if self.total_bytes() > self.max_bytes:
+                    self._evict()
+                    self._save()
+
+    def discard(self, url: str):
+        """Forget `url`, deleting its object unless another URL shares it."""
+        with self.lock:
+            entry = self.urls.pop(url, None)
+            if entry is None:
+                return
+            if not any(e['sha256'] == entry['sha256'] for e in self.urls.values()):
+                self._object_path(entry['sha256']).unlink(missing_ok=True)
+                self.last_used.pop(entry['sha256'], None)
+            self._save()
+
+    def _evict(self):
+        sizes = {entry['sha256']: entry['size'] for entry in self.urls.values()}
+        total = sum(sizes.values())
+        for digest in sorted(sizes, key=lambda d: self.last_used.get(d, 0)):
+            if total <= self.max_bytes:
+                break
+            if digest in self.pins:
+                # Still being installed from
+                continue
+            self._object_path(digest).unlink(missing_ok=True)
+            self.urls = {u: e for u, e in self.urls.items() if e['sha256'] != digest}
+            self.last_used.pop(digest, None)
+            total -= sizes[digest]
+            self.evictions += 1
+
+    def _save(self):
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({'urls': self.urls, 'last_used': self.last_used}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def close(self):
+        """Persist access times recorded by lookups."""
+        with self.lock:
+            self._save()
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_bytes': self.hit_bytes,
+            'stored_bytes': self.stored_bytes,
+            'evictions': self.evictions,
+            'total_bytes': self.total_bytes(),
+            'max_bytes': self.max_bytes,
+        }
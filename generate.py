@@ -1,22 +1,50 @@
 #!/usr/bin/env python3
 """
 Generate Kotlin enum class for language pairs from model repository structure.
-Usage: python generate_language_enum.py <repository_path>
+Usage: python generate.py <repository_path> [--sizes cache,local,http] [--tessdata-path <dir>]
 """
 
+import abc
+import argparse
 import os
 import sys
 import json
-import asyncio
-import aiohttp
+import time
+from models_catalog import QUALITIES, QUALITY_PRIORITY, ModelsCatalog, git_head, local_file_size
+from url_metadata import DEFAULT_PATH as DEFAULT_URL_CACHE, DEFAULT_TTL as DEFAULT_URL_TTL, UrlMetadataCache
 from pathlib import Path
-from typing import Dict, Set, Tuple
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, NamedTuple, Optional, Set, Tuple
+
+# asyncio and aiohttp take a good part of a second to import and are only
+# needed to look sizes up over HTTP, so they are imported where they're used;
+# download.py and the other tools import this module for its tables.
+if TYPE_CHECKING:
+    import asyncio
+    import aiohttp
 
 COMMIT = "6ffda9ba34d107a8b50ec766273b252ef92ebafc"
 TRANSLATION_BASE_URL = f"https://media.githubusercontent.com/media/mozilla/firefox-translations-models/{COMMIT}/models"
 TESSERACT_BASE_URL = "https://raw.githubusercontent.com/tesseract-ocr/tessdata_fast/refs/heads/main"
 DICTIONARY_BASE_URL = "https://translator.davidv.dev/dictionaries"
 DICT_VERSION = 1
+# Format of catalog.json, checked by LanguageCatalog.kt
+CATALOG_VERSION = 1
+# Written next to Language.kt; ships as app/src/main/resources/dev/davidv/translator/catalog.json
+CATALOG_FILE = "catalog.json"
+
+# Files fetched from `<DICTIONARY_BASE_URL>/extra/` alongside a language's models
+EXTRA_FILES = {
+    'ja': ['mucab.bin'],
+}
+
+# HEAD requests used to learn file sizes
+SIZE_FETCH_CONCURRENCY = 16
+SIZE_FETCH_RETRIES = 3
+SIZE_FETCH_BACKOFF = 0.5  # seconds, doubled on every retry
+SIZE_FETCH_TIMEOUT = 30
+# Every checkpoint rewrites the whole sizes file, so they are spaced in time
+# rather than every N files, which would be quadratic in the number of files
+SIZE_CHECKPOINT_INTERVAL = 5.0  # seconds
 
 # Language code to display name mapping
 LANGUAGE_NAMES = {
@@ -182,30 +210,24 @@ LANGUAGE_SCRIPTS = {
     'zh': 'Han',          # Chinese uses Han characters
 }
 
+def check_supported_pairs(models: ModelsCatalog):
+    """Exit if the repository has a pair with a language we know nothing about."""
+    for pair in models.pairs():
+        src, tgt = parse_language_pair(pair)
+        if src not in LANGUAGE_NAMES or tgt not in LANGUAGE_NAMES:
+            print(f"Error: Unsupported language pair '{pair}' found in {sorted(models.qualities(pair))}")
+            print(f"Supported pairs: {sorted(LANGUAGE_NAMES.keys())}")
+            sys.exit(1)
+
 def extract_language_pairs(repo_path: Path) -> Dict[str, Set[str]]:
     """
     Extract language pairs from repository structure.
     Returns dict mapping model_type -> set of language pairs
     Validates that all found pairs are in the supported list.
     """
-    language_pairs = {'base': set(), 'base-memory': set(), 'tiny': set()}
-
-    # Scan models/base, models/base-memory, and models/tiny directories
-    for model_type in ['base', 'base-memory', 'tiny']:
-        models_dir = repo_path / 'models' / model_type
-        if models_dir.exists():
-            for item in models_dir.iterdir():
-                if item.is_dir():
-                    # Directory name should be language pair (e.g., 'enar', 'enru')
-                    pair_name = item.name
-                    src, tgt = parse_language_pair(pair_name)
-                    if src not in LANGUAGE_NAMES or tgt not in LANGUAGE_NAMES:
-                        print(f"Error: Unsupported language pair '{pair_name}' found in {model_type}")
-                        print(f"Supported pairs: {sorted(LANGUAGE_NAMES.keys())}")
-                        sys.exit(1)
-                    language_pairs[model_type].add(pair_name)
-
-    return language_pairs
+    models = ModelsCatalog.load(repo_path)
+    check_supported_pairs(models)
+    return models.language_pairs()
 
 def parse_language_pair(pair: str) -> Tuple[str, str]:
     """
@@ -249,14 +271,10 @@ def get_best_model_type(model_types: Set[str]) -> str:
     """
     Get the best model type based on priority: base-memory > base > tiny
     """
-    if 'base-memory' in model_types:
-        return 'base-memory'
-    elif 'base' in model_types:
-        return 'base'
-    elif 'tiny' in model_types:
-        return 'tiny'
-    else:
-        raise ValueError(f"No valid model type found in {model_types}")
+    for model_type in QUALITY_PRIORITY:
+        if model_type in model_types:
+            return model_type
+    raise ValueError(f"No valid model type found in {model_types}")
 
 def generate_files_for_language(from_code: str, to_code: str) -> Dict[str, str]:
     """
@@ -285,9 +303,17 @@ def generate_files_for_language(from_code: str, to_code: str) -> Dict[str, str]:
         'tgtVocab': tgt_vocab
     }
 
-def generate_kotlin_enum(language_pairs: Dict[str, Set[str]], existing_sizes: dict[str, dict[str, int]]) -> str:
+def enum_name(lang_code: str) -> str:
+    return LANGUAGE_NAMES[lang_code].upper().replace(' ', '_').replace('Å', 'A')
+
+def build_catalog(language_pairs: Dict[str, Set[str]], existing_sizes: dict[str, dict[str, int]],
+                  size_providers: Optional[List['SizeProvider']] = None) -> dict:
     """
-    Generate Kotlin enum classes for Language and LanguagePair.
+    Build the language catalog shipped with the app as catalog.json: every
+    language with its OCR data and sizes, and the files and quality of each
+    direction to and from English.
+    Sizes missing from `existing_sizes` are looked up through `size_providers`
+    (HTTP by default) and saved back to data/<COMMIT>.json.
     """
     # Collect all unique languages
     all_languages = set()
@@ -299,36 +325,27 @@ def generate_kotlin_enum(language_pairs: Dict[str, Set[str]], existing_sizes: di
 
     all_languages.add("en")
 
-    # Collect all unique language pairs with their model types
-    pairs_data = {}  # pair -> (src_code, tgt_code, model_types)
-
-    for model_type, pairs in language_pairs.items():
-        for pair in pairs:
-            src_code, tgt_code = parse_language_pair(pair)
-
-            # Assert that pairs are only to or from English
-            if src_code != 'en' and tgt_code != 'en':
-                print(f"Error: Language pair '{pair}' is not to or from English")
-                print(f"Only English-to-X or X-to-English pairs are supported")
-                sys.exit(1)
-
-            if pair not in pairs_data:
-                pairs_data[pair] = (src_code, tgt_code, set())
-            pairs_data[pair][2].add(model_type)
+    models = ModelsCatalog.from_language_pairs(language_pairs)
 
     # Separate into fromEnglish and toEnglish
     from_english = {}  # lang_code -> model_type
     to_english = {}    # lang_code -> model_type
 
-    for pair, (src_code, tgt_code, model_types) in pairs_data.items():
-        best_model_type = get_best_model_type(model_types)
+    for pair in models.pairs():
+        src_code, tgt_code = parse_language_pair(pair)
+
+        # Assert that pairs are only to or from English
+        if src_code != 'en' and tgt_code != 'en':
+            print(f"Error: Language pair '{pair}' is not to or from English")
+            print(f"Only English-to-X or X-to-English pairs are supported")
+            sys.exit(1)
 
         if src_code == 'en':
             # English to other language
-            from_english[tgt_code] = best_model_type
+            from_english[tgt_code] = models.best_quality(pair)
         else:
             # Other language to English
-            to_english[src_code] = best_model_type
+            to_english[src_code] = models.best_quality(pair)
 
     # Ensure 2 way translation
     from_english = {k: v for k, v in from_english.items() if k in to_english}
@@ -338,75 +355,63 @@ def generate_kotlin_enum(language_pairs: Dict[str, Set[str]], existing_sizes: di
     all_lang_codes = set(from_english.keys())
     all_lang_codes.add('en')
 
-    for lang_code in sorted(all_lang_codes):
-        if lang_code not in existing_sizes:
-            print(f"Fetching size for {lang_code}")
-            existing_sizes[lang_code] = asyncio.run(get_language_sizes(lang_code, language_pairs))
-            save_sizes(existing_sizes)
-
-    # Generate Language enum entries
-    language_entries = []
+    missing = [
+        request
+        for lang_code in sorted(all_lang_codes)
+        for request in language_size_requests(lang_code, models)
+        if request.filename not in existing_sizes.get(lang_code, {})
+    ]
+    if missing:
+        print(f"Looking up {len(missing)} missing file sizes")
+        if size_providers is None:
+            size_providers = [HttpSizeProvider()]
+        import asyncio
+        unresolved = asyncio.run(resolve_sizes(missing, size_providers, existing_sizes))
+        save_sizes(existing_sizes)
+        if unresolved:
+            sys.exit(1)
+
+    languages = {}
     for lang_code in sorted(all_languages):
         # from_english is bidirectional with to_english
         if lang_code not in from_english and lang_code != 'en':
           continue
-        lang_name = LANGUAGE_NAMES[lang_code]
         tess_name = TESSERACT_LANGUAGE_MAPPINGS[lang_code]
-        script = LANGUAGE_SCRIPTS[lang_code]
-        enum_name = lang_name.upper().replace(' ', '_').replace('Å', 'A')
-
         sizes = existing_sizes[lang_code]
-        tess_filename = f"{tess_name}.traineddata"
-        tessdata_size = sizes[tess_filename]
-
-        # full, including tessdata
-        translation_size = sum(v for v in sizes.values())
-
-        language_entries.append(f'    {enum_name}("{lang_code}", "{tess_name}", "{lang_name}", "{script}", {translation_size}, {tessdata_size})')
-
-    language_entries = sorted(language_entries)
-
-    # Generate fromEnglishFiles map entries
-    from_english_files_entries = []
-    for lang_code in sorted(from_english.keys()):
-        lang_name = LANGUAGE_NAMES[lang_code]
-        lang_enum = f'Language.{lang_name.upper().replace(" ", "_").replace("Å", "A")}'
-        model_type_enum = f'ModelType.{from_english[lang_code].upper().replace("-", "_")}'
-        files = generate_files_for_language('en', lang_code)
-        sizes = existing_sizes[lang_code]
-
-        model_size = sizes[files["model"]]
-        src_vocab_size = sizes[files["srcVocab"]]
-        tgt_vocab_size = sizes[files["tgtVocab"]]
-        lex_size = sizes[files["lex"]]
-
-        from_english_files_entries.append(f'    {lang_enum} to LanguageFiles(Pair("{files["model"]}", {model_size}), Pair("{files["srcVocab"]}", {src_vocab_size}), Pair("{files["tgtVocab"]}", {tgt_vocab_size}), Pair("{files["lex"]}", {lex_size}), {model_type_enum})')
-
-    # Generate toEnglishFiles map entries
-    to_english_files_entries = []
-    for lang_code in sorted(to_english.keys()):
-        lang_name = LANGUAGE_NAMES[lang_code]
-        lang_enum = f'Language.{lang_name.upper().replace(" ", "_").replace("Å", "A")}'
-        model_type_enum = f'ModelType.{to_english[lang_code].upper().replace("-", "_")}'
-        files = generate_files_for_language(lang_code, 'en')
+        languages[lang_code] = {
+            'tessName': tess_name,
+            'name': LANGUAGE_NAMES[lang_code],
+            'script': LANGUAGE_SCRIPTS[lang_code],
+            # full, including tessdata
+            'size': sum(v for v in sizes.values()),
+            'tessdataSize': sizes[f"{tess_name}.traineddata"],
+        }
+
+    def direction_files(from_code: str, to_code: str, lang_code: str, model_type: str) -> dict:
+        files = generate_files_for_language(from_code, to_code)
         sizes = existing_sizes[lang_code]
+        entry = {role: {'name': files[role], 'size': sizes[files[role]]} for role in ('model', 'srcVocab', 'tgtVocab', 'lex')}
+        entry['quality'] = model_type
+        return entry
 
-        model_size = sizes[files["model"]]
-        src_vocab_size = sizes[files["srcVocab"]]
-        tgt_vocab_size = sizes[files["tgtVocab"]]
-        lex_size = sizes[files["lex"]]
-
-        to_english_files_entries.append(f'    {lang_enum} to LanguageFiles(Pair("{files["model"]}", {model_size}), Pair("{files["srcVocab"]}", {src_vocab_size}), Pair("{files["tgtVocab"]}", {tgt_vocab_size}), Pair("{files["lex"]}", {lex_size}), {model_type_enum})')
-
-    to_english_lines = ",\n".join(to_english_files_entries)
-    from_english_lines = ",\n".join(from_english_files_entries)
-    language_lines = ",\n".join(language_entries)
+    return {
+        'version': CATALOG_VERSION,
+        'commit': COMMIT,
+        'languages': languages,
+        'fromEnglish': {lang_code: direction_files('en', lang_code, lang_code, from_english[lang_code]) for lang_code in sorted(from_english)},
+        'toEnglish': {lang_code: direction_files(lang_code, 'en', lang_code, to_english[lang_code]) for lang_code in sorted(to_english)},
+        'extraFiles': {lang_code: filenames for lang_code, filenames in sorted(EXTRA_FILES.items()) if lang_code in languages},
+    }
 
-    extra_files_entries = []
-    extra_files_entries.append('    Language.JAPANESE to listOf("mucab.bin")')
-    extra_files_lines = ",\n".join(extra_files_entries)
+def generate_kotlin_enum(catalog: dict) -> str:
+    """
+    Generate the Kotlin side of the catalog: constants, ModelType and a
+    Language enum holding only the language codes. Everything else about a
+    language is read lazily from catalog.json by LanguageCatalog.kt.
+    """
+    language_lines = ",\n".join(sorted(f'    {enum_name(lang_code)}("{lang_code}")' for lang_code in catalog['languages']))
 
-    # Generate the complete enum classes and maps
+    # Generate the complete enum classes
     kotlin_code = f"""/*
  * Copyright (C) 2024 David V
  *
@@ -430,6 +435,7 @@ package dev.davidv.translator
 
 object Constants {{
   const val DICT_VERSION = {DICT_VERSION}
+  const val CATALOG_VERSION = {CATALOG_VERSION}
   const val DEFAULT_TRANSLATION_MODELS_BASE_URL =
     "{TRANSLATION_BASE_URL}"
   const val DEFAULT_TESSERACT_MODELS_BASE_URL = "{TESSERACT_BASE_URL}"
@@ -444,9 +450,27 @@ enum class ModelType(private val pathName: String) {{
     override fun toString(): String = pathName
 }}
 
-enum class Language(val code: String, val tessName: String, val displayName: String, val script: String, val sizeBytes: Int, val tessdataSizeBytes: Int) {{
+enum class Language(val code: String) {{
 {language_lines};
 
+    private val entry: LanguageEntry
+        get() = LanguageCatalog.language(this)
+
+    val tessName: String
+        get() = entry.tessName
+
+    val displayName: String
+        get() = entry.name
+
+    val script: String
+        get() = entry.script
+
+    val sizeBytes: Int
+        get() = entry.size
+
+    val tessdataSizeBytes: Int
+        get() = entry.tessdataSize
+
     val tessFilename: String
         get() = "$tessName.traineddata"
 }}
@@ -460,85 +484,213 @@ data class LanguageFiles(
 ) {{
     fun allFiles(): List<String> = listOf(model.first, srcVocab.first, tgtVocab.first, lex.first).distinct()
 }}
+"""
 
-val fromEnglishFiles = mapOf(
-{from_english_lines}
-)
+    return kotlin_code
 
-val toEnglishFiles = mapOf(
-{to_english_lines}
-)
+class SizeRequest(NamedTuple):
+    lang_code: str
+    filename: str
+    url: str
+    # Location of the .gz inside the models checkout; None for tessdata
+    model_path: Optional[str]
+
+def language_size_requests(lang_code: str, models: ModelsCatalog) -> List[SizeRequest]:
+    """List every file related to a language whose size we need."""
+    requests = []
+
+    # Translation model files
+    for pair in models.pairs_for_language(lang_code):
+        src_code, tgt_code = parse_language_pair(pair)
+        best_model_type = models.best_quality(pair)
+        files = generate_files_for_language(src_code, tgt_code)
+
+        for filename in sorted(set(files.values())):
+            model_path = f"models/{best_model_type}/{src_code}{tgt_code}/{filename}.gz"
+            url = f"{TRANSLATION_BASE_URL}/{best_model_type}/{src_code}{tgt_code}/{filename}.gz"
+            requests.append(SizeRequest(lang_code, filename, url, model_path))
+
+    # Tesseract file
+    tess_name = TESSERACT_LANGUAGE_MAPPINGS[lang_code]
+    tess_filename = f"{tess_name}.traineddata"
+    tess_url = f"{TESSERACT_BASE_URL}/{tess_filename}"
+    requests.append(SizeRequest(lang_code, tess_filename, tess_url, None))
+    return requests
+
+class SizeProvider(abc.ABC):
+    """
+    A source of file sizes. `get_sizes` yields (request, size) for the
+    requests it can answer, in whatever order they become available.
+    """
+    name = ""
 
-val extraFiles = mapOf(
-{extra_files_lines}
-)"""
+    @abc.abstractmethod
+    def get_sizes(self, requests: List[SizeRequest]) -> AsyncIterator[Tuple[SizeRequest, int]]:
+        pass
 
-    return kotlin_code
+class CacheSizeProvider(SizeProvider):
+    """Sizes previously recorded in data/<COMMIT>.json."""
+    name = "cache"
 
-async def get_file_size(session: aiohttp.ClientSession, url: str) -> int:
-    """Get file size using HTTP HEAD request."""
-    try:
-        async with session.head(url) as response:
-            if response.status == 200:
-                content_length = response.headers.get('Content-Length')
-                if content_length:
-                    return int(content_length)
-    except Exception as e:
-        print(f"Error getting size for {url}: {e}")
-    return 0
+    def __init__(self, sizes: dict):
+        self.sizes = sizes
 
-async def get_language_sizes(lang_code: str, language_pairs: Dict[str, Set[str]]) -> dict:
-    """Get sizes for all files related to a specific language."""
-    sizes = {}
+    async def get_sizes(self, requests):
+        for request in requests:
+            size = self.sizes.get(request.lang_code, {}).get(request.filename)
+            if size:
+                yield request, size
 
-    async with aiohttp.ClientSession() as session:
-        # Find pairs involving this language
-        relevant_pairs = []
-        for model_type, pairs in language_pairs.items():
-            for pair in pairs:
-                src_code, tgt_code = parse_language_pair(pair)
-                non_en_lang = tgt_code if src_code == 'en' else src_code
-
-                if non_en_lang == lang_code:
-                    if pair not in [p[0] for p in relevant_pairs]:
-                        relevant_pairs.append((pair, src_code, tgt_code, set()))
-
-                    # Find the pair in our list and add this model type
-                    for i, (p, s, t, model_types) in enumerate(relevant_pairs):
-                        if p == pair:
-                            relevant_pairs[i] = (p, s, t, model_types | {model_type})
-                            break
-
-        # Collect all URLs to fetch concurrently
-        url_to_filename = {}
-
-        # Get translation model URLs
-        for pair, src_code, tgt_code, model_types in relevant_pairs:
-            best_model_type = get_best_model_type(model_types)
-            files = generate_files_for_language(src_code, tgt_code)
-
-            for filename in sorted(set(files.values())):
-                if filename not in sizes:
-                    url = f"{TRANSLATION_BASE_URL}/{best_model_type}/{src_code}{tgt_code}/{filename}.gz"
-                    url_to_filename[url] = filename
-
-        # Get tesseract URL
-        tess_name = TESSERACT_LANGUAGE_MAPPINGS[lang_code]
-        tess_filename = f"{tess_name}.traineddata"
-        tess_url = f"{TESSERACT_BASE_URL}/{tess_filename}"
-        url_to_filename[tess_url] = tess_filename
+class LocalSizeProvider(SizeProvider):
+    """
+    Sizes from a firefox-translations-models checkout, and optionally from a
+    local copy of tessdata_fast. Model sizes are only given when the
+    checkout is at `commit`, which the download URLs (and the sizes saved
+    to data/<COMMIT>.json) are for; None accepts a checkout at any commit.
+    """
+    name = "local"
+
+    def __init__(self, models: ModelsCatalog, tessdata_path: Optional[Path] = None, commit: Optional[str] = COMMIT):
+        self.models = models
+        self.tessdata_path = tessdata_path
+        head = models.head or (git_head(models.repo_path) if models.repo_path is not None else None)
+        self.use_models = commit is None or head == commit
+        if not self.use_models:
+            print(f"Warning: {models.repo_path} is at {head or 'an unknown commit'}, not {commit}; "
+                  f"not taking model sizes from it")
+
+    async def get_sizes(self, requests):
+        for request in requests:
+            if request.model_path is not None:
+                size = self.models.file_sizes.get(request.model_path) if self.use_models else None
+            elif self.tessdata_path is not None:
+                size = local_file_size(self.tessdata_path / request.filename)
+            else:
+                size = None
+            if size:
+                yield request, size
+
+async def get_file_size(session: 'aiohttp.ClientSession', url: str, semaphore: 'asyncio.Semaphore',
+                        url_cache: Optional[UrlMetadataCache] = None) -> int:
+    """
+    Get file size using HTTP HEAD request, retrying transient failures.
+    With a `url_cache`, recent answers (and recent failures) are reused and
+    older ones revalidated with a conditional request.
+    """
+    import asyncio
+    import aiohttp
+    headers = {}
+    if url_cache is not None:
+        size = url_cache.fresh_size(url)
+        if size is not None:
+            return size
+        if url_cache.backing_off(url):
+            print(f"Skipping {url}: failed recently")
+            return url_cache.known_size(url) or 0
+        headers = url_cache.conditional_headers(url)
+
+    for attempt in range(SIZE_FETCH_RETRIES + 1):
+        try:
+            async with semaphore, session.head(url, headers=headers) as response:
+                if url_cache is not None and response.status != 429 and response.status < 500:
+                    size = url_cache.record_response(url, response.status, response.headers)
+                    if size:
+                        url_cache.clear_failures(url)
+                    else:
+                        print(f"Error getting size for {url}: HTTP {response.status}")
+                    return size
+                if response.status == 200:
+                    content_length = response.headers.get('Content-Length')
+                    if content_length:
+                        return int(content_length)
+                    return 0
+                if response.status != 429 and response.status < 500:
+                    print(f"Error getting size for {url}: HTTP {response.status}")
+                    return 0
+                error = f"HTTP {response.status}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = repr(e)
+        if attempt < SIZE_FETCH_RETRIES:
+            await asyncio.sleep(SIZE_FETCH_BACKOFF * 2 ** attempt)
+    print(f"Error getting size for {url}: {error}")
+    if url_cache is not None:
+        url_cache.record_failure(url, error)
+        return url_cache.known_size(url) or 0
+    return 0
 
-        # Execute all HTTP HEAD requests concurrently
-        tasks = [get_file_size(session, url) for url in url_to_filename.keys()]
-        results = await asyncio.gather(*tasks)
+class HttpSizeProvider(SizeProvider):
+    """
+    HEAD requests against the download URLs, all sent from a single pooled
+    session with at most `concurrency` in flight. A `url_cache` is saved
+    and its statistics printed once all requests are answered.
+    """
+    name = "http"
+
+    def __init__(self, concurrency: int = SIZE_FETCH_CONCURRENCY, url_cache: Optional[UrlMetadataCache] = None):
+        self.concurrency = concurrency
+        self.url_cache = url_cache
+
+    async def get_sizes(self, requests):
+        import asyncio
+        import aiohttp
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=SIZE_FETCH_TIMEOUT)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            async def fetch(request: SizeRequest) -> Tuple[SizeRequest, int]:
+                return request, await get_file_size(session, request.url, semaphore, self.url_cache)
+
+            try:
+                for task in asyncio.as_completed([fetch(request) for request in requests]):
+                    request, size = await task
+                    if size > 0:
+                        yield request, size
+            finally:
+                if self.url_cache is not None:
+                    self.url_cache.save()
+                    self.url_cache.print_stats()
+
+SIZE_PROVIDERS = {
+    'cache': lambda args, models, sizes: CacheSizeProvider(sizes),
+    'local': lambda args, models, sizes: LocalSizeProvider(models, args.tessdata_path),
+    'http': lambda args, models, sizes: HttpSizeProvider(
+        url_cache=None if args.no_url_cache else UrlMetadataCache(args.url_cache, args.url_ttl)
+    ),
+}
 
-        # Map results back to filenames
-        for url, size in zip(url_to_filename.keys(), results):
-            filename = url_to_filename[url]
-            if size > 0:
-                sizes[filename] = size
+async def resolve_sizes(requests: List[SizeRequest], providers: List[SizeProvider], sizes: dict) -> List[SizeRequest]:
+    """
+    Fill in `sizes` (lang_code -> filename -> size) by asking each provider in
+    turn for whatever the previous ones could not answer. Progress is
+    checkpointed to disk every SIZE_CHECKPOINT_INTERVAL seconds so an
+    interrupted run loses little. Returns the requests nobody could answer.
+    """
+    pending = list(requests)
+    checkpointed = time.monotonic()
+    for provider in providers:
+        if not pending:
+            break
+        answered = set()
+        async for request, size in provider.get_sizes(pending):
+            sizes.setdefault(request.lang_code, {})[request.filename] = size
+            answered.add(request)
+            if time.monotonic() - checkpointed >= SIZE_CHECKPOINT_INTERVAL:
+                save_sizes(sizes)
+                checkpointed = time.monotonic()
+        print(f"Got {len(answered)} sizes from {provider.name}")
+        pending = [request for request in pending if request not in answered]
+
+    for request in pending:
+        print(f"Error: no size found for {request.filename} ({request.lang_code})")
+    return pending
 
-    return sizes
+async def get_language_sizes(lang_code: str, language_pairs: Dict[str, Set[str]]) -> dict:
+    """Get sizes for all files related to a specific language."""
+    sizes = {}
+    models = ModelsCatalog.from_language_pairs(language_pairs)
+    await resolve_sizes(language_size_requests(lang_code, models), [HttpSizeProvider()], sizes)
+    return sizes.get(lang_code, {})
 
 def load_existing_sizes() -> dict:
     """Load existing sizes from JSON file if it exists."""
@@ -549,18 +701,37 @@ def load_existing_sizes() -> dict:
     return {}
 
 def save_sizes(sizes: dict):
-    """Save sizes to JSON file."""
+    """
+    Merge sizes into the JSON file, atomically. Entries already on disk are
+    kept, so a run that skipped the cache doesn't drop them.
+    """
     sizes_file = f"data/{COMMIT}.json"
-    with open(sizes_file, 'w') as f:
-        json.dump(sizes, f, indent=2, sort_keys=True)
+    tmp_file = f"{sizes_file}.tmp"
+    merged = load_existing_sizes()
+    for lang_code, lang_sizes in sizes.items():
+        merged.setdefault(lang_code, {}).update(lang_sizes)
+    with open(tmp_file, 'w') as f:
+        json.dump(merged, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, sizes_file)
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python generate_language_enum.py <repository_path>")
+    parser = argparse.ArgumentParser(description="Generate Language.kt from a firefox-translations-models checkout.")
+    parser.add_argument("repository_path")
+    parser.add_argument("--sizes", default="cache,http",
+                        help=f"comma-separated size providers to try in order, from {', '.join(SIZE_PROVIDERS)}")
+    parser.add_argument("--tessdata-path", type=Path, help="local tessdata_fast checkout, used by the 'local' size provider")
+    parser.add_argument("--url-cache", default=DEFAULT_URL_CACHE, type=Path, help="where the 'http' size provider remembers what each URL returned")
+    parser.add_argument("--url-ttl", default=DEFAULT_URL_TTL, type=float, help="seconds before a remembered size is revalidated")
+    parser.add_argument("--no-url-cache", action="store_true", help="send a full HEAD request for every size")
+    args = parser.parse_args()
+
+    repo_path = args.repository_path
+    provider_names = args.sizes.split(",")
+    unknown = [name for name in provider_names if name not in SIZE_PROVIDERS]
+    if unknown:
+        print(f"Error: Unknown size providers {unknown}, expected some of {list(SIZE_PROVIDERS)}")
         sys.exit(1)
 
-    repo_path = sys.argv[1]
-
     if not os.path.exists(repo_path):
         print(f"Error: Repository path '{repo_path}' does not exist")
         sys.exit(1)
@@ -568,9 +739,12 @@ def main():
     print(f"Scanning repository at: {repo_path}")
 
     # Extract language pairs
-    language_pairs = extract_language_pairs(Path(repo_path))
+    models = ModelsCatalog.load(Path(repo_path))
+    check_supported_pairs(models)
+    language_pairs = models.language_pairs()
 
-    existing_sizes = load_existing_sizes()
+    existing_sizes = load_existing_sizes() if 'cache' in provider_names else {}
+    size_providers = [SIZE_PROVIDERS[name](args, models, existing_sizes) for name in provider_names]
     print(f"Found {len(language_pairs['base'])} base language pairs")
     print(f"Found {len(language_pairs['base-memory'])} base-memory language pairs")
     print(f"Found {len(language_pairs['tiny'])} tiny language pairs")
@@ -579,8 +753,13 @@ def main():
         print("No language pairs found. Please check the repository structure.")
         sys.exit(1)
 
+    catalog = build_catalog(language_pairs, existing_sizes, size_providers)
+    with open(CATALOG_FILE, 'w') as f:
+        json.dump(catalog, f, ensure_ascii=False, separators=(',', ':'))
+    print(f"Generated catalog in {CATALOG_FILE}")
+
     # Generate Kotlin enum
-    kotlin_code = generate_kotlin_enum(language_pairs, existing_sizes)
+    kotlin_code = generate_kotlin_enum(catalog)
 
     # Write to file
     output_file = "Language.kt"
@@ -1,38 +1,42 @@
+import argparse
 import dataclasses
+import gzip
+import hashlib
 import json
 import subprocess
 
+import delta
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from functools import partial
 from pathlib import Path
 
-from data import LANGUAGE_NAMES, LANGUAGE_SCRIPTS
+from generate import LANGUAGE_NAMES, LANGUAGE_SCRIPTS
+from models_catalog import ModelsCatalog, pair_language
 
+DIGEST_CHUNK_SIZE = 1024 * 1024
+SHARDS_VERSION = 1
+VARIANTS_VERSION = 1
 MODELS_URL = "https://media.githubusercontent.com/media/mozilla/firefox-translations-models/{commit}/models/{category}/{{lang_pair}}/{{fname}}.gz"
 
-repo_dir = Path("~/git/firefox-translations-models/models/").expanduser()
-assert repo_dir.exists()
-model_types = ["tiny", "base", "base-memory"]
-available = {}
-for type_ in model_types:
-    available[type_] = [p.name for p in (repo_dir / type_).iterdir()]
+DEFAULT_REPO_DIR = Path("~/git/firefox-translations-models/models/").expanduser()
 
-best_cat_for_model = {}
-for type_ in model_types:  # goes in worse -> best order
-    for model in available[type_]:
-        best_cat_for_model[model] = type_
+# The checkout being indexed, set up by load_repo() so that importing this
+# module stays cheap
+repo_dir = DEFAULT_REPO_DIR
+models: ModelsCatalog | None = None
+best_cat_for_model: dict[str, str] = {}
+all_langs: list[str] = []
 
 
-def not_eng(s: str) -> str:
-    a, b = s[0:2], s[2:]
-    if a == "en":
-        return b
-    return a
-
-
-# flattened
-all_langs = [x for xs in available.values() for x in xs]
-all_langs = sorted(set(not_eng(x) for x in all_langs))
+def load_repo(path: Path = DEFAULT_REPO_DIR):
+    """Scan the models/ directory of a firefox-translations-models checkout for indexing."""
+    global repo_dir, models, best_cat_for_model, all_langs
+    if not path.is_dir():
+        raise FileNotFoundError(f"{path} is not a directory")
+    repo_dir = path
+    models = ModelsCatalog.load(repo_dir.parent)
+    best_cat_for_model = {pair: models.best_quality(pair) for pair in models.pairs()}
+    all_langs = models.languages()
 
 
 @dataclass(frozen=True)
@@ -41,16 +45,15 @@ class IndexFile:
     size_bytes: int
     release_date: int
     url: str
+    uncompressed_size: int
+    sha256: str  # of the uncompressed file
 
 
-def file_size(repo_path: Path, quality: str, lang_pair: str, fname: str) -> int:
-    fpath = repo_path / quality / lang_pair / f"{fname}.gz"
-    return fpath.stat().st_size
+def file_path(repo_path: Path, quality: str, lang_pair: str, fname: str) -> Path:
+    return repo_path / quality / lang_pair / f"{fname}.gz"
 
 
-def generate_files_for_language(
-    repo_path: Path, quality: str, lang_pair: str, rd: int, base_url
-) -> dict[str, IndexFile]:
+def pair_filenames(lang_pair: str) -> dict[str, str]:
     model = f"model.{lang_pair}.intgemm.alphas.bin"
     lex = f"lex.50.50.{lang_pair}.s2t.bin"
 
@@ -66,37 +69,74 @@ def generate_files_for_language(
         src_vocab = vocab_file
         tgt_vocab = vocab_file
 
-    fsize = partial(file_size, repo_path, quality, lang_pair)
-    return {
-        "model": IndexFile(
-            name=model, size_bytes=fsize(model), release_date=rd, url=base_url.format(fname=model, lang_pair=lang_pair)
-        ),
-        "lex": IndexFile(
-            name=lex, size_bytes=fsize(lex), release_date=rd, url=base_url.format(fname=lex, lang_pair=lang_pair)
-        ),
-        "src_vocab": IndexFile(
-            name=src_vocab,
-            size_bytes=fsize(src_vocab),
-            release_date=rd,
-            url=base_url.format(fname=src_vocab, lang_pair=lang_pair),
-        ),
-        "tgt_vocab": IndexFile(
-            name=tgt_vocab,
-            size_bytes=fsize(tgt_vocab),
+    return {"model": model, "lex": lex, "src_vocab": src_vocab, "tgt_vocab": tgt_vocab}
+
+
+def generate_files_for_language(
+    repo_path: Path, quality: str, lang_pair: str, rd: int, base_url, digests: dict[Path, tuple[int, str]]
+) -> dict[str, IndexFile]:
+    files = {}
+    for key, fname in pair_filenames(lang_pair).items():
+        uncompressed_size, sha256 = digests[file_path(repo_path, quality, lang_pair, fname)]
+        files[key] = IndexFile(
+            name=fname,
+            size_bytes=models.file_size(quality, lang_pair, fname),
             release_date=rd,
-            url=base_url.format(fname=tgt_vocab, lang_pair=lang_pair),
-        ),
-    }
+            url=base_url.format(fname=fname, lang_pair=lang_pair),
+            uncompressed_size=uncompressed_size,
+            sha256=sha256,
+        )
+    return files
+
+
+def digest_gz(path: Path) -> tuple[int, str]:
+    """Uncompressed size and SHA-256 of a .gz file, decompressed as a stream."""
+    digest = hashlib.sha256()
+    size = 0
+    with gzip.open(path, "rb") as f:
+        while chunk := f.read(DIGEST_CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+    return size, digest.hexdigest()
+
+
+def compute_digests(paths: set[Path], cache_path: Path, workers: int | None = None) -> dict[Path, tuple[int, str]]:
+    """
+    digest_gz() every path in a process pool. Results are cached in
+    `cache_path` keyed by (path, mtime, size) so unchanged files are skipped
+    on the next run.
+    """
+    cache = {}
+    if cache_path.exists():
+        with open(cache_path) as f:
+            cache = json.load(f)
 
+    digests = {}
+    todo = []
+    for path in paths:
+        st = path.stat()
+        entry = cache.get(str(path))
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            digests[path] = (entry["uncompressed_size"], entry["sha256"])
+        else:
+            todo.append((path, st))
 
-def get_release_date_and_commit(repo_path: Path, quality: str, lang_pair: str) -> tuple[int, str]:
-    cwd = repo_path / quality / lang_pair
-    cmd = ["git", "log", "-1", "--format=%H;%at", "."]
-    proc = subprocess.run(cmd, cwd=cwd, stdout=subprocess.PIPE, check=True)
-    stdout = proc.stdout.decode().strip()
-    commit, tstamp = stdout.split(";")
-    tstamp = int(tstamp)
-    return (tstamp, commit)
+    if todo:
+        print(f"Hashing {len(todo)} files ({len(paths) - len(todo)} cached)")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for (path, st), (uncompressed_size, sha256) in zip(todo, executor.map(digest_gz, [p for p, _ in todo])):
+                digests[path] = (uncompressed_size, sha256)
+                cache[str(path)] = {
+                    "mtime_ns": st.st_mtime_ns,
+                    "size": st.st_size,
+                    "uncompressed_size": uncompressed_size,
+                    "sha256": sha256,
+                }
+        tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+        tmp_path.replace(cache_path)
+    return digests
 
 
 class EnhancedJSONEncoder(json.JSONEncoder):
@@ -106,40 +146,279 @@ class EnhancedJSONEncoder(json.JSONEncoder):
         return super().default(o)
 
 
-def main():
-    index = []
-    for lang in all_langs:
-        model_from = f"{lang}en"
-        model_to = f"en{lang}"
-        pair_data_from = None
-        pair_data_to = None
-
-        if cat := best_cat_for_model.get(model_from):
-            rd, commit = get_release_date_and_commit(repo_dir, cat, model_from)
-            url = MODELS_URL.format(commit=commit, category=cat)
-            pair_data_from = generate_files_for_language(repo_dir, cat, model_from, rd, url)
-
-        if cat := best_cat_for_model.get(model_to):
-            rd, commit = get_release_date_and_commit(repo_dir, cat, model_to)
-            url = MODELS_URL.format(commit=commit, category=cat)
-            pair_data_to = generate_files_for_language(repo_dir, cat, model_to, rd, url)
-
-        index_language = {
-            "code": lang,
-            "to": pair_data_to,
-            "from": pair_data_from,
-            "name": LANGUAGE_NAMES[lang],
-            "script": LANGUAGE_SCRIPTS[lang],
-            "extra_files": [],
-        }
-        index.append(index_language)
-
-    json.dump(
-        {"languages": index},
-        open("index.json", "w"),
-        cls=EnhancedJSONEncoder,
-        indent=2,
+def git_output(repo_path: Path, *args: str) -> str:
+    proc = subprocess.run(["git", *args], cwd=repo_path, stdout=subprocess.PIPE, check=True)
+    return proc.stdout.decode().strip()
+
+
+def changed_pairs(repo_path: Path, since: str) -> set[tuple[str, str]] | None:
+    """
+    (quality, lang_pair) directories touched between `since` and HEAD, or None
+    if `since` is not in this repository (force-push, different clone...).
+    """
+    exists = subprocess.run(
+        ["git", "cat-file", "-e", f"{since}^{{commit}}"], cwd=repo_path, stderr=subprocess.DEVNULL
     )
+    if exists.returncode != 0:
+        return None
+    changed = set()
+    for line in git_output(repo_path, "diff", "--name-only", "--no-renames", "--relative", since, "HEAD", "--", ".").splitlines():
+        parts = line.split("/")
+        if len(parts) >= 3:
+            changed.add((parts[0], parts[1]))
+    return changed
+
+
+def index_language(
+    lang: str, release_info: dict[tuple[str, str], tuple[int, str]], digests: dict[Path, tuple[int, str]]
+) -> dict:
+    model_from = f"{lang}en"
+    model_to = f"en{lang}"
+    pair_data_from = None
+    pair_data_to = None
+
+    if cat := best_cat_for_model.get(model_from):
+        rd, commit = release_info[(cat, model_from)]
+        url = MODELS_URL.format(commit=commit, category=cat)
+        pair_data_from = generate_files_for_language(repo_dir, cat, model_from, rd, url, digests)
+
+    if cat := best_cat_for_model.get(model_to):
+        rd, commit = release_info[(cat, model_to)]
+        url = MODELS_URL.format(commit=commit, category=cat)
+        pair_data_to = generate_files_for_language(repo_dir, cat, model_to, rd, url, digests)
+
+    return {
+        "code": lang,
+        "to": pair_data_to,
+        "from": pair_data_from,
+        "name": LANGUAGE_NAMES[lang],
+        "script": LANGUAGE_SCRIPTS[lang],
+        "extra_files": [],
+    }
+
+
+def index_files(index: dict) -> dict[str, dict]:
+    """Every file entry of an index, by filename."""
+    return {
+        files[key]["name"]: files[key]
+        for entry in index["languages"]
+        for files in (entry["to"], entry["from"])
+        if files
+        for key in files
+    }
+
+
+def git_blob(repo_path: Path, commit: str, path: str) -> bytes | None:
+    """Contents of `path` at `commit`, through git-lfs if it is a pointer; None if it did not exist."""
+    proc = subprocess.run(["git", "show", f"{commit}:./{path}"], cwd=repo_path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    if proc.returncode != 0:
+        return None
+    if proc.stdout.startswith(b"version https://git-lfs"):
+        proc = subprocess.run(["git", "lfs", "smudge", "--", path], cwd=repo_path, input=proc.stdout, stdout=subprocess.PIPE, check=True)
+    return proc.stdout
+
+
+def make_delta(previous_commit: str, pair: str, old: dict, new: dict, deltas_dir: Path, base_url: str) -> dict | None:
+    """Write a patch from the `old` to the `new` version of a file, if it is worth it."""
+    # Where the previous index pointed: <category>/<pair>/<file>.gz under models/
+    old_path = "/".join(old["url"].rsplit("/", 3)[1:])
+    old_gz = git_blob(repo_dir, previous_commit, old_path)
+    if old_gz is None:
+        print(f"Skipping delta for {new['name']}: {old_path} is not in {previous_commit[:7]}")
+        return None
+    old_data = gzip.decompress(old_gz)
+    if hashlib.sha256(old_data).hexdigest() != old["sha256"]:
+        print(f"Skipping delta for {new['name']}: {old_path} in {previous_commit[:7]} does not match the previous index")
+        return None
+    with gzip.open(file_path(repo_dir, best_cat_for_model[pair], pair, new["name"]), "rb") as f:
+        patch = delta.make_patch(old_data, f.read())
+    if len(patch) > new["size_bytes"] // 2:
+        print(f"Skipping delta for {new['name']}: {len(patch)} bytes vs {new['size_bytes']} compressed")
+        return None
+
+    patch_name = f"{new['name']}.{old['sha256'][:16]}-{new['sha256'][:16]}.patch"
+    (deltas_dir / patch_name).write_bytes(patch)
+    print(f"Wrote {patch_name}: {len(patch)} bytes vs {new['size_bytes']} compressed")
+    return {
+        "from_sha256": old["sha256"],
+        "to_sha256": new["sha256"],
+        "size_bytes": len(patch),
+        "url": f"{base_url}/{patch_name}",
+    }
+
+
+def build_deltas(previous: dict, entries: dict[str, dict], deltas_dir: Path, base_url: str):
+    """
+    For every file whose hash changed since the `previous` index, write a
+    patch from the previous version to `deltas_dir` and list it under the
+    file's "deltas". Patches that would not save at least half of the
+    compressed download are dropped.
+    """
+    deltas_dir.mkdir(parents=True, exist_ok=True)
+    old_files = index_files(previous)
+    built = {}
+    for entry in entries.values():
+        for direction, pair in (("to", f"en{entry['code']}"), ("from", f"{entry['code']}en")):
+            for f in (entry[direction] or {}).values():
+                old = old_files.get(f["name"])
+                if old is None or "sha256" not in old:
+                    continue
+                if old["sha256"] == f["sha256"]:
+                    deltas = old.get("deltas", [])
+                else:
+                    if f["name"] not in built:  # src_vocab and tgt_vocab may be the same file
+                        patch = make_delta(previous["commit"], pair, old, f, deltas_dir, base_url)
+                        built[f["name"]] = [patch] if patch else []
+                    deltas = built[f["name"]]
+                if deltas:
+                    f["deltas"] = deltas
+
+
+def shard_bytes(entry: dict) -> bytes:
+    """Canonical JSON of one language entry; its hash names the shard."""
+    return json.dumps(entry, cls=EnhancedJSONEncoder, sort_keys=True, separators=(",", ":")).encode()
+
+
+def write_shards(head: str, index: list[dict], shards_dir: Path) -> dict:
+    """
+    Write one gzipped shard per language to `shards_dir`, named after the
+    hash of its contents so it can be cached forever, and a manifest.json
+    listing the shard of each language with that hash. Unchanged shards are
+    not rewritten. Shards of the previous manifest are kept, for clients that
+    fetched it just before it was replaced; older ones are removed.
+    """
+    shards_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        with open(shards_dir / "manifest.json") as f:
+            previous = {shard["path"] for shard in json.load(f)["shards"].values()}
+    except (OSError, ValueError, KeyError):
+        previous = set()
+    shards = {}
+    for entry in index:
+        data = shard_bytes(entry)
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = shards_dir / f"{entry['code']}.{sha256[:16]}.json.gz"
+        if not path.exists():
+            tmp_path = path.with_name(path.name + ".tmp")
+            tmp_path.write_bytes(gzip.compress(data, mtime=0))
+            tmp_path.replace(path)
+        shards[entry["code"]] = {"path": path.name, "sha256": sha256, "size_bytes": path.stat().st_size}
+
+    manifest = {"version": SHARDS_VERSION, "commit": head, "shards": shards}
+    tmp_manifest = shards_dir / "manifest.json.tmp"
+    with open(tmp_manifest, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp_manifest.replace(shards_dir / "manifest.json")
+
+    listed = {shard["path"] for shard in shards.values()} | previous
+    for path in shards_dir.glob("*.json.gz"):
+        if path.name not in listed:
+            path.unlink()
+    return manifest
+
+
+def load_variants(variants_dir: Path) -> dict[str, dict]:
+    """The recompressed files listed in the variants.json recompress.py wrote to `variants_dir`."""
+    with open(variants_dir / "variants.json") as f:
+        variants = json.load(f)
+    if variants.get("version") != VARIANTS_VERSION:
+        raise ValueError(f"Unsupported variants.json version {variants.get('version')}")
+    return variants["files"]
+
+
+def attach_variants(index: list[dict], variants: dict[str, dict], base_url: str):
+    """
+    List under every file's "variants" the recompressed copy recompress.py
+    made of its current contents, if any. The .gz stays the file's url, as
+    the fallback for clients that can't decode the variant's codec.
+    """
+    for entry in index:
+        for files in (entry["to"], entry["from"]):
+            for f in (files or {}).values():
+                quality, pair, name = f["url"].rsplit("/", 3)[1:]
+                variant = variants.get(f"{quality}/{pair}/{name.removesuffix('.gz')}")
+                if variant is not None and variant["sha256"] == f["sha256"]:
+                    f["variants"] = [
+                        {"codec": variant["codec"], "url": f"{base_url}/{variant['path']}", "size_bytes": variant["size_bytes"]}
+                    ]
+                else:
+                    f.pop("variants", None)
+
+
+def has_digests(entry: dict) -> bool:
+    """Whether an entry from a previous index already carries uncompressed sizes and hashes."""
+    return all("sha256" in files[key] for files in (entry["to"], entry["from"]) if files for key in files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build index.json from a firefox-translations-models checkout.")
+    parser.add_argument("--repo", default=DEFAULT_REPO_DIR, type=Path, help="models/ directory of a firefox-translations-models checkout")
+    parser.add_argument("--output", default="index.json", type=Path)
+    parser.add_argument("--full", action="store_true", help="rebuild every entry instead of only those changed since the last run")
+    parser.add_argument("--digest-cache", default=".index-digests.json", type=Path, help="cache of uncompressed sizes and hashes")
+    parser.add_argument("--jobs", type=int, help="processes used for hashing (default: one per core)")
+    parser.add_argument("--deltas-dir", type=Path, help="write patches from the previously indexed version of changed files here")
+    parser.add_argument("--deltas-base-url", help="URL the --deltas-dir contents are published under")
+    parser.add_argument("--variants-dir", type=Path, help="list the recompressed files recompress.py published here")
+    parser.add_argument("--variants-base-url", help="URL the --variants-dir contents are published under")
+    parser.add_argument("--shards-dir", type=Path, help="also write the index as a manifest.json and one compressed shard per language here")
+    args = parser.parse_args()
+    if args.deltas_dir and not args.deltas_base_url:
+        parser.error("--deltas-dir requires --deltas-base-url")
+    if args.variants_dir and not args.variants_base_url:
+        parser.error("--variants-dir requires --variants-base-url")
+    try:
+        load_repo(args.repo.expanduser())
+    except FileNotFoundError as e:
+        parser.error(str(e))
+
+    head = git_output(repo_dir, "rev-parse", "HEAD")
+    previous = None
+    if args.output.exists():
+        with open(args.output) as f:
+            previous = json.load(f)
+    kept = {}
+    if not args.full and previous is not None:
+        changed = changed_pairs(repo_dir, previous["commit"]) if "commit" in previous else None
+        if changed is not None:
+            affected = {pair_language(pair) for _, pair in changed}
+            kept = {
+                entry["code"]: entry
+                for entry in previous["languages"]
+                if entry["code"] not in affected and has_digests(entry)
+            }
+            print(f"Updating index from {previous['commit']}: {len(affected)} languages changed")
+        else:
+            print("Previous index commit unknown, rebuilding the whole index")
+
+    to_index = [lang for lang in all_langs if lang not in kept]
+    wanted = {(best_cat_for_model[model], model) for lang in to_index for model in (f"{lang}en", f"en{lang}") if model in best_cat_for_model}
+    release_info = models.release_info(wanted)
+    paths = {file_path(repo_dir, cat, model, fname) for cat, model in wanted for fname in pair_filenames(model).values()}
+    digests = compute_digests(paths, args.digest_cache, args.jobs)
+    entries = {lang: index_language(lang, release_info, digests) for lang in to_index}
+    if args.deltas_dir and previous is not None and "commit" in previous:
+        entries = json.loads(json.dumps(entries, cls=EnhancedJSONEncoder))
+        build_deltas(previous, entries, args.deltas_dir, args.deltas_base_url.rstrip("/"))
+    index = [entries[lang] if lang in entries else kept[lang] for lang in all_langs]
+    if args.variants_dir:
+        index = json.loads(json.dumps(index, cls=EnhancedJSONEncoder))
+        attach_variants(index, load_variants(args.variants_dir), args.variants_base_url.rstrip("/"))
+
+    tmp_output = args.output.with_name(args.output.name + ".tmp")
+    with open(tmp_output, "w") as f:
+        json.dump(
+            {"commit": head, "languages": index},
+            f,
+            cls=EnhancedJSONEncoder,
+            indent=2,
+        )
+    tmp_output.replace(args.output)
+
+    if args.shards_dir:
+        manifest = write_shards(head, index, args.shards_dir)
+        print(f"Wrote {len(manifest['shards'])} shards to {args.shards_dir}")
 
 
-main()
+if __name__ == "__main__":
+    main()
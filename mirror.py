@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Serve local model, tessdata and dictionary trees over HTTP at the URL layout
+the app and download.py expect, so devices on the LAN can be provisioned
+without each of them going to the internet:
+
+    /models/<quality>/<pair>/<file>.gz   from --models (the models/ dir of a firefox-translations-models checkout)
+    /tessdata/<file>.traineddata         from --tessdata (a tessdata_fast checkout)
+    /dictionaries/...                    from --dictionaries (a copy of the dictionary server: extra/, <version>/...)
+    /variants/<quality>/<pair>/<file>.*  from --variants (recompressed models from recompress.py)
+
+Files are sent as they are on disk (the .gz models are not recompressed)
+with sendfile(). Range, If-Range, If-None-Match and If-Modified-Since are
+supported, and each client connection gets its own thread.
+
+Usage: python mirror.py --models ~/git/firefox-translations-models/models --tessdata ~/git/tessdata_fast [--port 8000]
+"""
+from dedupe import MODES as DEDUPE_MODES, dedupe, tree_files
+import argparse
+import email.utils
+import socket
+import sys
+import urllib.parse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+DEFAULT_PORT = 8000
+
+class MirrorServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Devices tend to be switched on all at once
+    request_queue_size = 128
+
+    def __init__(self, address: Tuple[str, int], roots: Dict[str, Path]):
+        super().__init__(address, MirrorHandler)
+        self.roots = {prefix: root.resolve() for prefix, root in roots.items()}
+
+class MirrorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MirrorServer
+
+    def _resolve(self) -> Optional[Path]:
+        """The file a request path refers to, refusing anything outside the served roots."""
+        prefix, _, rest = urllib.parse.unquote(self.path.split("?")[0]).lstrip("/").partition("/")
+        root = self.server.roots.get(prefix)
+        if root is None or not rest:
+            return None
+        path = (root / rest).resolve()
+        if root not in path.parents or not path.is_file():
+            return None
+        return path
+
+    def _not_modified(self, etag: str, mtime: float) -> bool:
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(",")]
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since is not None:
+            try:
+                return int(mtime) <= email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _byte_range(self, size: int, etag: str, last_modified: str) -> Optional[Tuple[int, int]]:
+        """
+        The single (start, end) range requested, inclusive; None for the whole
+        file. Raises ValueError if the range can't be satisfied.
+        """
+        header = self.headers.get('Range')
+        if header is None or not header.startswith("bytes=") or "," in header:
+            return None
+        if_range = self.headers.get('If-Range')
+        if if_range is not None and if_range not in (etag, last_modified):
+            return None
+        first, _, last = header[len("bytes="):].strip().partition("-")
+        try:
+            if first:
+                start, end = int(first), int(last) if last else size - 1
+            else:
+                start, end = max(0, size - int(last)), size - 1
+        except ValueError:
+            return None
+        if start >= size or start > end:
+            raise ValueError(header)
+        return start, min(end, size - 1)
+
+    def _respond(self, send_body: bool):
+        path = self._resolve()
+        if path is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        st = path.stat()
+        etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+        last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+
+        if self._not_modified(etag, st.st_mtime):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            return
+        try:
+            byte_range = self._byte_range(st.st_size, etag, last_modified)
+        except ValueError:
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header("Content-Range", f"bytes */{st.st_size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start, end = byte_range or (0, st.st_size - 1)
+        length = end - start + 1
+        self.send_response(HTTPStatus.PARTIAL_CONTENT if byte_range else HTTPStatus.OK)
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{st.st_size}")
+        self.send_header("Content-Type", "application/gzip" if path.suffix == ".gz" else "application/octet-stream")
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        if send_body and length > 0:
+            with open(path, 'rb') as f:
+                self.connection.sendfile(f, start, length)
+
+    def do_GET(self):
+        try:
+            self._respond(send_body=True)
+        except (ConnectionError, socket.timeout):
+            self.close_connection = True
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve local model trees at the URL layout the app and download.py use.")
+    parser.add_argument("--models", type=Path, help="models/ directory of a firefox-translations-models checkout")
+    parser.add_argument("--tessdata", type=Path, help="directory with the .traineddata files")
+    parser.add_argument("--dictionaries", type=Path, help="directory laid out like the dictionary server")
+    parser.add_argument("--variants", type=Path, help="recompressed models written by recompress.py --output-dir")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", default=DEFAULT_PORT, type=int)
+    parser.add_argument("--dedupe", choices=DEDUPE_MODES, help="before serving, link identical files across the served trees (they are modified)")
+    args = parser.parse_args()
+
+    roots = {
+        prefix: root
+        for prefix, root in (('models', args.models), ('tessdata', args.tessdata), ('dictionaries', args.dictionaries),
+                             ('variants', args.variants))
+        if root is not None
+    }
+    if not roots:
+        parser.error("nothing to serve, pass at least one of --models, --tessdata, --dictionaries or --variants")
+    for prefix, root in roots.items():
+        if not root.is_dir():
+            print(f"Error: {root} is not a directory")
+            sys.exit(1)
+
+    if args.dedupe:
+        dedupe(tree_files(roots.values()), args.dedupe).print()
+
+    server = MirrorServer((args.host, args.port), roots)
+    host = socket.gethostname() if args.host == "0.0.0.0" else args.host
+    print("Point the app's settings (or download.py's --*-base-url options) at:")
+    names = {'models': "Translation models", 'tessdata': "Tesseract models", 'dictionaries': "Dictionaries",
+             'variants': "Model variants"}
+    for prefix in roots:
+        print(f"  {names[prefix]:20} http://{host}:{server.server_address[1]}/{prefix}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
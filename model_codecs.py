@@ -0,0 +1,156 @@
+"""
+Codecs model files can be published in. Every file is always served as .gz,
+which is all the app and older download.py versions read; recompress.py can
+publish a smaller or faster-to-decode variant next to it, which indexer.py
+lists in the file's index entry and download.py decodes instead.
+
+bz2 and xz come with Python. zstd and brotli need the `zstandard` and
+`brotli` packages and are only in CODECS when those are installed, so a
+download.py without them skips such variants and fetches the .gz.
+"""
+import bz2
+import gzip
+import io
+import lzma
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, NamedTuple, Protocol, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+READ_SIZE = 1024 * 1024
+
+class Codec(NamedTuple):
+    name: str
+    extension: str
+    levels: range
+    compress: Callable[[bytes, int], bytes]
+    decompress: Callable[[bytes], bytes]
+    # A streaming reader of the decompressed contents of a file
+    open: Callable[[Path], BinaryIO]
+    # A new incremental decompressor: decompress(chunk) and, at the end, eof
+    decompressor: Callable[[], 'Decompressor']
+
+class Decompressor(Protocol):
+    eof: bool
+
+    def decompress(self, data: bytes) -> bytes: ...
+
+class DecodeError(ValueError):
+    """A stream that didn't decode, as seen by whoever fed it to a Decompressor."""
+
+class _GzipDecompressor:
+    """zlib's gzip decompressor, over any number of members like gzip.open() reads."""
+    def __init__(self):
+        self.d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    @property
+    def eof(self) -> bool:
+        return self.d.eof
+
+    def decompress(self, data: bytes) -> bytes:
+        out = self.d.decompress(data)
+        while self.d.eof and self.d.unused_data:
+            data, self.d = self.d.unused_data, zlib.decompressobj(16 + zlib.MAX_WBITS)
+            out += self.d.decompress(data)
+        return out
+
+class _BrotliDecompressor:
+    def __init__(self):
+        self.d = brotli.Decompressor()
+
+    @property
+    def eof(self) -> bool:
+        return self.d.is_finished()
+
+    def decompress(self, data: bytes) -> bytes:
+        return self.d.process(data)
+
+class _StreamReader(io.RawIOBase):
+    """
+    A file-like reader over an incremental decompressor, for codecs whose
+    packages don't provide one that notices a truncated stream.
+    """
+    def __init__(self, path: Path, decompressor: Decompressor):
+        self.f = open(path, 'rb')
+        self.decompressor = decompressor
+        self.pending = b""
+        self.pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while self.pos == len(self.pending):
+            chunk = self.f.read(READ_SIZE)
+            if not chunk:
+                if not self.decompressor.eof:
+                    raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+                return 0
+            self.pending, self.pos = self.decompressor.decompress(chunk), 0
+        n = min(len(buffer), len(self.pending) - self.pos)
+        buffer[:n] = self.pending[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+    def close(self):
+        self.f.close()
+        super().close()
+
+def _zstd_decompressor() -> Decompressor:
+    return zstandard.ZstdDecompressor().decompressobj()
+
+def _open_zstd(path: Path) -> BinaryIO:
+    return io.BufferedReader(_StreamReader(path, _zstd_decompressor()), READ_SIZE)
+
+def _open_brotli(path: Path) -> BinaryIO:
+    return io.BufferedReader(_StreamReader(path, _BrotliDecompressor()), READ_SIZE)
+
+CODECS: Dict[str, Codec] = {
+    'gz': Codec('gz', '.gz', range(1, 10), lambda data, level: gzip.compress(data, level, mtime=0),
+                gzip.decompress, lambda path: gzip.open(path, 'rb'), _GzipDecompressor),
+    'bz2': Codec('bz2', '.bz2', range(1, 10), bz2.compress, bz2.decompress, lambda path: bz2.open(path, 'rb'),
+                 bz2.BZ2Decompressor),
+    'xz': Codec('xz', '.xz', range(0, 10), lambda data, level: lzma.compress(data, preset=level),
+                lzma.decompress, lambda path: lzma.open(path, 'rb'), lzma.LZMADecompressor),
+}
+if zstandard is not None:
+    CODECS['zst'] = Codec('zst', '.zst', range(1, 23),
+                          lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+                          lambda data: _zstd_decompressor().decompress(data), _open_zstd, _zstd_decompressor)
+if brotli is not None:
+    CODECS['br'] = Codec('br', '.br', range(0, 12), lambda data, level: brotli.compress(data, quality=level),
+                         brotli.decompress, _open_brotli, _BrotliDecompressor)
+# Every codec a variant may be published in, installed here or not
+KNOWN_CODECS = ['gz', 'bz2', 'xz', 'zst', 'br']
+
+# What decoding a corrupt or truncated file raises (gzip and bz2 raise OSError)
+DECODE_ERRORS: Tuple[type, ...] = (OSError, EOFError, DecodeError, zlib.error, lzma.LZMAError) \
+    + ((zstandard.ZstdError,) if zstandard is not None else ()) \
+    + ((brotli.error,) if brotli is not None else ())
+
+def parse_codec(spec: str) -> Tuple[Codec, int]:
+    """A codec and level from e.g. "zst:19"; the level defaults to the codec's highest."""
+    name, _, level = spec.partition(":")
+    if name not in KNOWN_CODECS:
+        raise ValueError(f"Unknown codec '{name}', expected one of {KNOWN_CODECS}")
+    if name not in CODECS:
+        raise ValueError(f"Codec '{name}' needs the {'zstandard' if name == 'zst' else 'brotli'} package")
+    codec = CODECS[name]
+    try:
+        level = int(level) if level else codec.levels[-1]
+    except ValueError:
+        raise ValueError(f"Invalid level in '{spec}'")
+    if level not in codec.levels:
+        raise ValueError(f"Level {level} out of range for {name} ({codec.levels[0]}-{codec.levels[-1]})")
+    return codec, level
+
+def open_decompressed(path: Path, codec: str = 'gz') -> BinaryIO:
+    return CODECS[codec].open(path)
@@ -0,0 +1,213 @@
+"""
+What a firefox-translations-models checkout contains, scanned once and
+shared by generate.py, indexer.py and download.py: the qualities available
+for each pair, the pairs of each language, the size of every file and the
+last commit touching each model directory.
+
+Scans are memoized on disk keyed by the checkout's HEAD, so a tool run
+against an unchanged checkout doesn't touch the tree (or git) at all.
+Uncommitted changes to the checkout are not noticed; use refresh=True.
+"""
+import hashlib
+import json
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+QUALITIES = ['base', 'base-memory', 'tiny']
+# Best first
+QUALITY_PRIORITY = ['base-memory', 'base', 'tiny']
+
+DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() / "offline-translator" / "catalog"
+MEMO_VERSION = 1
+
+def local_file_size(path: Path) -> Optional[int]:
+    """
+    Size of `path`, or of the object it stands for if it is a git-lfs pointer
+    (as found in a checkout made without `git lfs pull`).
+    """
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return None
+    if size < 1024:
+        with open(path, 'rb') as f:
+            head = f.read()
+        if head.startswith(b"version https://git-lfs.github.com/spec/"):
+            for line in head.decode().splitlines():
+                if line.startswith("size "):
+                    return int(line.split()[1])
+    return size
+
+def git_head(repo_path: Path) -> Optional[str]:
+    proc = subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo_path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    return proc.stdout.strip() if proc.returncode == 0 else None
+
+def pair_language(pair: str) -> str:
+    """The non-English side of a pair."""
+    return pair[:2] if pair[2:] == 'en' else pair[2:]
+
+class ModelsCatalog:
+    def __init__(self, pair_qualities: Dict[str, Set[str]], file_sizes: Optional[Dict[str, int]] = None,
+                 repo_path: Optional[Path] = None, head: Optional[str] = None,
+                 releases: Optional[Dict[str, Tuple[int, str]]] = None, memo_path: Optional[Path] = None):
+        self.pair_qualities = pair_qualities
+        # "models/<quality>/<pair>/<file>.gz" -> size
+        self.file_sizes = file_sizes or {}
+        self.repo_path = repo_path
+        self.head = head
+        # "<quality>/<pair>" -> (timestamp, commit) of the last commit touching it
+        self.releases = releases or {}
+        self.memo_path = memo_path
+
+        self.language_pairs_index: Dict[str, List[str]] = {}
+        for pair in sorted(pair_qualities):
+            self.language_pairs_index.setdefault(pair_language(pair), []).append(pair)
+
+    @classmethod
+    def from_language_pairs(cls, language_pairs: Dict[str, Set[str]]) -> 'ModelsCatalog':
+        """A catalog without files, from quality -> pairs as returned by language_pairs()."""
+        pair_qualities: Dict[str, Set[str]] = {}
+        for quality, pairs in language_pairs.items():
+            for pair in pairs:
+                pair_qualities.setdefault(pair, set()).add(quality)
+        return cls(pair_qualities)
+
+    @classmethod
+    def scan(cls, repo_path: Path) -> 'ModelsCatalog':
+        pair_qualities: Dict[str, Set[str]] = {}
+        file_sizes = {}
+        for quality in QUALITIES:
+            models_dir = repo_path / 'models' / quality
+            if not models_dir.exists():
+                continue
+            for pair_dir in os.scandir(models_dir):
+                if not pair_dir.is_dir():
+                    continue
+                pair_qualities.setdefault(pair_dir.name, set()).add(quality)
+                for entry in os.scandir(pair_dir.path):
+                    if entry.is_file():
+                        file_sizes[f"models/{quality}/{pair_dir.name}/{entry.name}"] = local_file_size(Path(entry.path))
+        return cls(pair_qualities, file_sizes, repo_path)
+
+    @classmethod
+    def load(cls, repo_path: Path, cache_dir: Path = DEFAULT_CACHE_DIR, refresh: bool = False) -> 'ModelsCatalog':
+        """
+        The catalog of the checkout at `repo_path`, from the memo of a previous
+        scan at the same HEAD when there is one.
+        """
+        repo_path = Path(repo_path).resolve()
+        head = git_head(repo_path)
+        if head is None:
+            return cls.scan(repo_path)
+
+        memo_path = cache_dir / f"{hashlib.sha1(str(repo_path).encode()).hexdigest()[:16]}.json"
+        if not refresh:
+            try:
+                with open(memo_path, 'r') as f:
+                    memo = json.load(f)
+            except (OSError, ValueError):
+                memo = None
+            if memo and memo.get('version') == MEMO_VERSION and memo.get('head') == head:
+                return cls(
+                    {pair: set(qualities) for pair, qualities in memo['pairs'].items()},
+                    memo['sizes'], repo_path, head,
+                    {key: tuple(release) for key, release in memo['releases'].items()},
+                    memo_path,
+                )
+
+        catalog = cls.scan(repo_path)
+        catalog.head = head
+        catalog.memo_path = memo_path
+        catalog.save()
+        return catalog
+
+    def save(self):
+        if self.memo_path is None:
+            return
+        self.memo_path.parent.mkdir(parents=True, exist_ok=True)
+        memo = {
+            'version': MEMO_VERSION,
+            'head': self.head,
+            'pairs': {pair: sorted(qualities) for pair, qualities in sorted(self.pair_qualities.items())},
+            'sizes': self.file_sizes,
+            'releases': self.releases,
+        }
+        tmp_path = self.memo_path.with_name(self.memo_path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(memo, f, sort_keys=True)
+        os.replace(tmp_path, self.memo_path)
+
+    def pairs(self) -> List[str]:
+        return sorted(self.pair_qualities)
+
+    def qualities(self, pair: str) -> Set[str]:
+        return self.pair_qualities.get(pair, set())
+
+    def best_quality(self, pair: str) -> Optional[str]:
+        qualities = self.qualities(pair)
+        return next((quality for quality in QUALITY_PRIORITY if quality in qualities), None)
+
+    def languages(self) -> List[str]:
+        """Every non-English language with at least one pair."""
+        return sorted(self.language_pairs_index)
+
+    def pairs_for_language(self, lang_code: str) -> List[str]:
+        return self.language_pairs_index.get(lang_code, [])
+
+    def language_pairs(self) -> Dict[str, Set[str]]:
+        """quality -> pairs, the shape generate.extract_language_pairs() returns."""
+        language_pairs = {quality: set() for quality in QUALITIES}
+        for pair, qualities in self.pair_qualities.items():
+            for quality in qualities:
+                language_pairs[quality].add(pair)
+        return language_pairs
+
+    def file_size(self, quality: str, pair: str, filename: str) -> Optional[int]:
+        """Size of `<filename>.gz` for `pair` at `quality`, None if it isn't there."""
+        return self.file_sizes.get(f"models/{quality}/{pair}/{filename}.gz")
+
+    def release_info(self, wanted: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[int, str]]:
+        """
+        (timestamp, commit) of the last commit touching each (quality, pair)
+        directory in `wanted`. Directories not memoized yet are looked up in a
+        single pass over the history, which stops as soon as all of them have
+        been seen.
+        """
+        wanted = set(wanted)
+        missing = {key for key in wanted if f"{key[0]}/{key[1]}" not in self.releases}
+        if missing and self.repo_path is not None:
+            for (quality, pair), release in get_release_dates_and_commits(self.repo_path / 'models', missing).items():
+                self.releases[f"{quality}/{pair}"] = release
+            self.save()
+        return {key: self.releases[f"{key[0]}/{key[1]}"] for key in wanted if f"{key[0]}/{key[1]}" in self.releases}
+
+def get_release_dates_and_commits(repo_path: Path, wanted: Set[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[int, str]]:
+    """
+    Walk the history under `repo_path` once, newest first, and record the last
+    commit touching each (quality, lang_pair) directory in `wanted`.
+    Stops reading as soon as every wanted directory has been seen.
+    """
+    cmd = ["git", "log", "--format=%x00%H;%at", "--name-only", "--no-renames", "--relative", "--", "."]
+    found = {}
+    with subprocess.Popen(cmd, cwd=repo_path, stdout=subprocess.PIPE, text=True) as proc:
+        commit, tstamp = None, 0
+        for line in proc.stdout:
+            line = line.rstrip("\n")
+            if line.startswith("\0"):
+                commit, tstamp = line[1:].split(";")
+                tstamp = int(tstamp)
+                continue
+            parts = line.split("/")
+            if len(parts) < 3:
+                continue
+            key = (parts[0], parts[1])
+            if key in wanted and key not in found:
+                found[key] = (tstamp, commit)
+                if len(found) == len(wanted):
+                    proc.kill()
+                    return found
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+    return found
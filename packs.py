@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Single-file language packs: everything one translation direction needs
+(model, vocabs, lex, tessdata for both languages and any extra files) in one
+archive, so a device pays for one request instead of five or six.
+
+A pack is laid out as
+    MAGIC | manifest length (8 bytes, little endian) | manifest JSON | members
+where each member is a complete gzip stream and the manifest lists, for each
+one, its destination in the OFFLINE_SETUP.md layout and its absolute byte
+offset and size in the pack. A client can fetch the whole object, or read
+the header and then Range-request single members.
+
+Usage:
+    python packs.py build <firefox-translations-models> [<lang> ...] [--output-dir packs]
+    python packs.py unpack <pack file or URL> [--output-dir translator_models] [--only <name> ...]
+"""
+import generate
+from download import BaseUrls, HTTPStatusError, open_url, reset_connections
+from models_catalog import ModelsCatalog
+import argparse
+import gzip
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import zlib
+from pathlib import Path
+from typing import BinaryIO, List, NamedTuple, Optional, Tuple
+
+MAGIC = b"OTPACK1\n"
+MANIFEST_LENGTH = struct.Struct("<Q")
+VERSION = 1
+CHUNK_SIZE = 1024 * 1024
+
+class PackError(ValueError):
+    pass
+
+class Member(NamedTuple):
+    name: str
+    # Relative to the output directory, e.g. bin/model.enes.intgemm.alphas.bin
+    path: str
+    # Where the bytes come from: a .gz file to copy as-is, or a raw file or URL to compress
+    source: str
+    compressed: bool
+
+def pack_members(src_lang: str, tgt_lang: str, quality: str, repo_path: Path, tessdata_path: Optional[Path],
+                 extra_path: Optional[Path], base_urls: BaseUrls = BaseUrls()) -> List[Member]:
+    """
+    The files of one direction, laid out like download.language_pair_jobs()
+    does, with shared vocabs listed once.
+    """
+    pair = f"{src_lang}{tgt_lang}"
+    members = []
+    for filename in sorted(set(generate.generate_files_for_language(src_lang, tgt_lang).values())):
+        path = repo_path / 'models' / quality / pair / f"{filename}.gz"
+        members.append(Member(filename, f"bin/{filename}", str(path), compressed=True))
+
+    for lang_code in (src_lang, tgt_lang):
+        tess_filename = f"{generate.TESSERACT_LANGUAGE_MAPPINGS[lang_code]}.traineddata"
+        source = str(tessdata_path / tess_filename) if tessdata_path else f"{base_urls.tesseract}/{tess_filename}"
+        members.append(Member(tess_filename, f"tesseract/tessdata/{tess_filename}", source, compressed=False))
+        for filename in generate.EXTRA_FILES.get(lang_code, []):
+            source = str(extra_path / filename) if extra_path else f"{base_urls.dictionary}/extra/{filename}"
+            members.append(Member(filename, f"bin/{filename}", source, compressed=False))
+    return members
+
+def _open_source(source: str) -> BinaryIO:
+    if source.startswith(("http://", "https://")):
+        return open_url(source)
+    with open(source, 'rb') as f:
+        if f.read(len(b"version https://git-lfs")) == b"version https://git-lfs":
+            raise PackError(f"{source} is a git-lfs pointer, run `git lfs pull` first")
+    return open(source, 'rb')
+
+def build_pack(members: List[Member], output_path: Path, meta: dict) -> dict:
+    """
+    Write `members` into a pack at `output_path`. Members are first streamed
+    into a temporary body file since their compressed sizes (and so the
+    offsets in the header) are only known afterwards.
+    Returns the manifest.
+    """
+    entries = []
+    with tempfile.TemporaryFile(dir=output_path.parent) as body:
+        for member in members:
+            start = body.tell()
+            uncompressed_size = 0
+            with _open_source(member.source) as f_in:
+                if member.compressed:
+                    shutil.copyfileobj(f_in, body, CHUNK_SIZE)
+                else:
+                    with gzip.GzipFile(fileobj=body, mode='wb', mtime=0) as f_out:
+                        while chunk := f_in.read(CHUNK_SIZE):
+                            f_out.write(chunk)
+                            uncompressed_size += len(chunk)
+            entry = {'name': member.name, 'path': member.path, 'offset': start, 'size': body.tell() - start}
+            if not member.compressed:
+                entry['uncompressed_size'] = uncompressed_size
+            entries.append(entry)
+
+        manifest = dict(meta, version=VERSION, members=entries)
+        # Offsets are absolute, so they depend on the length of the manifest they are in
+        body_offsets = [entry['offset'] for entry in entries]
+        header_size = 0
+        while True:
+            for entry, body_offset in zip(entries, body_offsets):
+                entry['offset'] = header_size + body_offset
+            manifest_bytes = json.dumps(manifest, sort_keys=True).encode()
+            new_header_size = len(MAGIC) + MANIFEST_LENGTH.size + len(manifest_bytes)
+            if new_header_size == header_size:
+                break
+            header_size = new_header_size
+
+        tmp_path = output_path.with_name(output_path.name + ".tmp")
+        try:
+            with open(tmp_path, 'wb') as f_out:
+                f_out.write(MAGIC + MANIFEST_LENGTH.pack(len(manifest_bytes)) + manifest_bytes)
+                body.seek(0)
+                shutil.copyfileobj(body, f_out, CHUNK_SIZE)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        os.replace(tmp_path, output_path)
+    return manifest
+
+def _read_exact(f: BinaryIO, n: int) -> bytes:
+    data = bytearray()
+    while len(data) < n:
+        chunk = f.read(n - len(data))
+        if not chunk:
+            raise PackError("Truncated pack")
+        data += chunk
+    return bytes(data)
+
+def _skip(f: BinaryIO, n: int):
+    while n:
+        chunk = f.read(min(n, CHUNK_SIZE))
+        if not chunk:
+            raise PackError("Truncated pack")
+        n -= len(chunk)
+
+def read_manifest(f: BinaryIO) -> Tuple[dict, int]:
+    """Read the header at the start of `f`; returns the manifest and the header size."""
+    if _read_exact(f, len(MAGIC)) != MAGIC:
+        raise PackError("Not a language pack")
+    (length,) = MANIFEST_LENGTH.unpack(_read_exact(f, MANIFEST_LENGTH.size))
+    manifest = json.loads(_read_exact(f, length))
+    if manifest.get('version') != VERSION:
+        raise PackError(f"Unsupported pack version {manifest.get('version')}")
+    return manifest, len(MAGIC) + MANIFEST_LENGTH.size + length
+
+def _extract_member(f: BinaryIO, entry: dict, output_dir: Path):
+    """Gunzip the next `entry['size']` bytes of `f` into place."""
+    output_path = output_dir / entry['path']
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    remaining = entry['size']
+    try:
+        with open(tmp_path, 'wb') as f_out:
+            while remaining:
+                chunk = f.read(min(remaining, CHUNK_SIZE))
+                if not chunk:
+                    raise PackError(f"Truncated member {entry['name']}")
+                remaining -= len(chunk)
+                f_out.write(decompressor.decompress(chunk))
+            f_out.write(decompressor.flush())
+        if not decompressor.eof:
+            raise PackError(f"Corrupt member {entry['name']}")
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, output_path)
+
+class RangeNotSupported(PackError):
+    pass
+
+def _open_range(url: str, start: int, end: int) -> BinaryIO:
+    response = open_url(url, {'Range': f"bytes={start}-{end}"})
+    if response.status != 206:
+        response.close()
+        reset_connections()
+        raise RangeNotSupported(f"{url} does not support range requests")
+    return response
+
+def _unpack_ranges(url: str, output_dir: Path, only: List[str]) -> dict:
+    with _open_range(url, 0, len(MAGIC) + MANIFEST_LENGTH.size - 1) as f:
+        head = f.read()
+    (length,) = MANIFEST_LENGTH.unpack(head[len(MAGIC):])
+    with _open_range(url, 0, len(head) + length - 1) as f:
+        manifest, _ = read_manifest(f)
+    for entry in manifest['members']:
+        if entry['name'] in only:
+            print(f"Extracting {entry['path']}")
+            with _open_range(url, entry['offset'], entry['offset'] + entry['size'] - 1) as f:
+                _extract_member(f, entry, output_dir)
+    return manifest
+
+def unpack(source: str, output_dir: Path, only: Optional[List[str]] = None) -> dict:
+    """
+    Stream the pack at `source` (a path or URL) into `output_dir`, optionally
+    only the members named in `only`. From a URL, a partial unpack fetches
+    the header and then each wanted member with a Range request.
+    Returns the manifest.
+    """
+    remote = source.startswith(("http://", "https://"))
+    if remote and only:
+        try:
+            return _unpack_ranges(source, output_dir, only)
+        except RangeNotSupported:
+            print(f"{source} does not support range requests, streaming the whole pack")
+
+    with (open_url(source) if remote else open(source, 'rb')) as f:
+        manifest, position = read_manifest(f)
+        for entry in sorted(manifest['members'], key=lambda e: e['offset']):
+            _skip(f, entry['offset'] - position)
+            position = entry['offset'] + entry['size']
+            if only and entry['name'] not in only:
+                _skip(f, entry['size'])
+                continue
+            print(f"Extracting {entry['path']}")
+            _extract_member(f, entry, output_dir)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and unpack single-file language packs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="build one pack per language and direction")
+    build_parser.add_argument("repository_path", type=Path)
+    build_parser.add_argument("languages", nargs="*", help="language codes (default: every language in the repository)")
+    build_parser.add_argument("--quality", choices=generate.QUALITIES, help="quality to pack (default: the best available)")
+    build_parser.add_argument("--output-dir", default="packs", type=Path)
+    build_parser.add_argument("--tessdata-path", type=Path, help="local tessdata_fast checkout (default: fetch from --tesseract-base-url)")
+    build_parser.add_argument("--extra-path", type=Path, help="local directory with the extra files (default: fetch from --dictionary-base-url)")
+    build_parser.add_argument("--tesseract-base-url", default=generate.TESSERACT_BASE_URL)
+    build_parser.add_argument("--dictionary-base-url", default=generate.DICTIONARY_BASE_URL)
+
+    unpack_parser = subparsers.add_parser("unpack", help="extract a pack into the offline layout")
+    unpack_parser.add_argument("pack", help="pack file or URL")
+    unpack_parser.add_argument("--output-dir", default="translator_models", type=Path)
+    unpack_parser.add_argument("--only", nargs="+", help="member names to extract")
+    args = parser.parse_args()
+
+    if args.command == "unpack":
+        try:
+            unpack(args.pack, args.output_dir, args.only)
+        except (OSError, PackError, HTTPStatusError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
+
+    models = ModelsCatalog.load(args.repository_path)
+    base_urls = BaseUrls(tesseract=args.tesseract_base_url, dictionary=args.dictionary_base_url)
+    for pair in models.pairs():
+        src_lang, tgt_lang = generate.parse_language_pair(pair)
+        if args.languages and src_lang not in args.languages and tgt_lang not in args.languages:
+            continue
+        if args.quality and args.quality not in models.qualities(pair):
+            print(f"Skipping {pair}: no {args.quality} model")
+            continue
+        quality = args.quality or models.best_quality(pair)
+
+        output_path = args.output_dir / quality / f"{pair}.pack"
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        members = pack_members(src_lang, tgt_lang, quality, args.repository_path, args.tessdata_path, args.extra_path, base_urls)
+        meta = {'from': src_lang, 'to': tgt_lang, 'quality': quality}
+        try:
+            manifest = build_pack(members, output_path, meta)
+        except (OSError, PackError, HTTPStatusError) as e:
+            print(f"Error building {output_path}: {e}")
+            sys.exit(1)
+        total = sum(entry['size'] for entry in manifest['members'])
+        print(f"Wrote {output_path}: {len(manifest['members'])} files, {total / 1024 ** 2:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Recompress the model, vocab and lex files of a firefox-translations-models
+checkout (and optionally tessdata) with other codecs and levels, and measure
+for each: size and ratio, compression time and single-core decompression
+throughput, against the file as it is served today (.gz models,
+uncompressed tessdata).
+
+Every model file then gets the variant with the lowest estimated install
+time, that is the download at --bandwidth-mbps plus decoding on one core,
+among those at least --min-saving smaller than the .gz that don't install
+slower. With --output-dir, the chosen variants are written there laid out
+like models/ (<quality>/<pair>/<file>.<ext>), along with a variants.json
+that `indexer.py --variants-dir` reads to list each of them in its file's
+index entry; download.py then fetches the variant and falls back to the
+.gz. The directory can be served with `mirror.py --variants`. Tessdata are
+measured but not published, as the index doesn't cover them.
+
+Codecs are given as codec:level, from those in model_codecs.py; zst and br
+need the zstandard and brotli packages.
+
+Usage: python recompress.py ~/git/firefox-translations-models/models [<lang> ...] [--tessdata-path <dir>]
+                            [--codecs gz:9,bz2:9,xz:9,zst:19,br:11] [--bandwidth-mbps 20] [--jobs 4]
+                            [--output-dir variants] [--report codecs.json]
+"""
+import generate
+import model_codecs
+from models_catalog import QUALITIES, pair_language
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+DEFAULT_CODECS = ['gz:9', 'bz2:9', 'xz:6', 'xz:9', 'zst:3', 'zst:19', 'br:11']
+DEFAULT_BANDWIDTH_MBPS = 20.0
+# Variants saving less than this fraction of the .gz aren't worth publishing
+DEFAULT_MIN_SAVING = 0.02
+VARIANTS_VERSION = 1
+
+class SourceFile(NamedTuple):
+    # "<quality>/<pair>/<file>" for model files, None for tessdata
+    key: Optional[str]
+    path: Path
+    # How the file is served today: 'gz', or None for as is
+    served_codec: Optional[str]
+
+def source_files(models_dir: Path, languages: List[str], tessdata_path: Optional[Path] = None) -> List[SourceFile]:
+    files = []
+    for quality in QUALITIES:
+        for path in sorted((models_dir / quality).glob("*/*.gz")):
+            if not languages or pair_language(path.parent.name) in languages:
+                files.append(SourceFile(f"{quality}/{path.parent.name}/{path.name[:-len('.gz')]}", path, 'gz'))
+    if tessdata_path is not None:
+        tess_names = {generate.TESSERACT_LANGUAGE_MAPPINGS[lang] for lang in languages}
+        for path in sorted(tessdata_path.glob("*.traineddata")):
+            if not languages or path.stem in tess_names:
+                files.append(SourceFile(None, path, None))
+    return files
+
+def install_seconds(size: int, decompress_seconds: float, bandwidth: float) -> float:
+    """Estimated time to fetch `size` bytes and decode them."""
+    return size / bandwidth + decompress_seconds
+
+def variant_path(key: str, codec: str) -> str:
+    return f"{key}{model_codecs.CODECS[codec].extension}"
+
+def measure_file(source: SourceFile, specs: List[str], bandwidth: float, min_saving: float = DEFAULT_MIN_SAVING,
+                 output_dir: Optional[Path] = None) -> Optional[dict]:
+    """
+    Compress `source` with every codec:level of `specs` and time decoding
+    it back, and pick a variant (see the module docstring). With an
+    `output_dir`, the chosen variant is written there as a `.tmp` file next
+    to where publish() puts it, so that only one file's worth of compressed
+    data is ever held in memory. None for a git-lfs pointer.
+    """
+    served = source.path.read_bytes()
+    if served.startswith(b"version https://git-lfs"):
+        return None
+    started = time.perf_counter()
+    raw = gzip.decompress(served) if source.served_codec == 'gz' else served
+    served_seconds = time.perf_counter() - started if source.served_codec else 0.0
+    served_install = install_seconds(len(served), served_seconds, bandwidth)
+
+    codecs = {}
+    chosen, chosen_data = None, None
+    for spec in specs:
+        codec, level = model_codecs.parse_codec(spec)
+        started = time.perf_counter()
+        data = codec.compress(raw, level)
+        compress_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        decoded = codec.decompress(data)
+        decompress_seconds = time.perf_counter() - started
+        if decoded != raw:
+            raise ValueError(f"{spec} round trip of {source.path} does not match")
+        codecs[spec] = {'size_bytes': len(data), 'compress_seconds': compress_seconds, 'decompress_seconds': decompress_seconds}
+        estimate = install_seconds(len(data), decompress_seconds, bandwidth)
+        if (source.key is not None and codec.name != source.served_codec and len(data) <= len(served) * (1 - min_saving)
+                and estimate <= served_install and (chosen is None or estimate < chosen['install_seconds'])):
+            chosen = {'codec': codec.name, 'level': level, 'spec': spec, 'size_bytes': len(data), 'install_seconds': estimate}
+            chosen_data = data
+    if chosen is not None and output_dir is not None:
+        tmp_path = output_dir / (variant_path(source.key, chosen['codec']) + ".tmp")
+        tmp_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_bytes(chosen_data)
+        chosen['tmp_path'] = str(tmp_path)
+    return {
+        'key': source.key,
+        'path': str(source.path),
+        'raw_bytes': len(raw),
+        'sha256': hashlib.sha256(raw).hexdigest(),
+        'served_bytes': len(served),
+        'served_decompress_seconds': served_seconds,
+        'served_install_seconds': served_install,
+        'codecs': codecs,
+        'chosen': chosen,
+    }
+
+def print_table(results: List[dict], specs: List[str], bandwidth: float):
+    raw = sum(result['raw_bytes'] for result in results)
+    served = sum(result['served_bytes'] for result in results)
+    print(f"{'codec':10} {'size MB':>9} {'vs raw':>7} {'vs served':>9} {'compress MB/s':>14} {'decode MB/s':>12} {'install s':>10}")
+    decode = sum(result['served_decompress_seconds'] for result in results)
+    print(f"{'served':10} {served / 1024 ** 2:9.1f} {served / raw:7.1%} {1:9.1%} {'':>14} "
+          f"{raw / decode / 1024 ** 2 if decode else float('inf'):12.1f} "
+          f"{sum(result['served_install_seconds'] for result in results):10.1f}")
+    for spec in specs:
+        size = sum(result['codecs'][spec]['size_bytes'] for result in results)
+        compress = sum(result['codecs'][spec]['compress_seconds'] for result in results)
+        decode = sum(result['codecs'][spec]['decompress_seconds'] for result in results)
+        install = sum(install_seconds(result['codecs'][spec]['size_bytes'], result['codecs'][spec]['decompress_seconds'], bandwidth)
+                      for result in results)
+        print(f"{spec:10} {size / 1024 ** 2:9.1f} {size / raw:7.1%} {size / served:9.1%} {raw / compress / 1024 ** 2:14.1f} "
+              f"{raw / decode / 1024 ** 2:12.1f} {install:10.1f}")
+
+def publish(results: List[dict], output_dir: Path):
+    """
+    Move the chosen variants measure_file() wrote for `results` into place
+    in `output_dir` and list them in its variants.json. Entries of files not measured this time are kept;
+    variant files no longer listed are removed.
+    """
+    variants_path = output_dir / "variants.json"
+    variants = {'version': VARIANTS_VERSION, 'files': {}}
+    if variants_path.exists():
+        with open(variants_path, 'r') as f:
+            variants = json.load(f)
+        if variants.get('version') != VARIANTS_VERSION:
+            raise ValueError(f"Unsupported variants.json version {variants.get('version')} in {output_dir}")
+
+    for result in results:
+        if result['key'] is None:
+            continue
+        chosen = result['chosen']
+        if chosen is None:
+            variants['files'].pop(result['key'], None)
+            continue
+        path = variant_path(result['key'], chosen['codec'])
+        os.replace(chosen['tmp_path'], output_dir / path)
+        variants['files'][result['key']] = {
+            'codec': chosen['codec'],
+            'level': chosen['level'],
+            'path': path,
+            'size_bytes': chosen['size_bytes'],
+            'sha256': result['sha256'],
+        }
+
+    tmp_path = variants_path.with_name(variants_path.name + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(variants, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, variants_path)
+
+    listed = {output_dir / variant['path'] for variant in variants['files'].values()}
+    for dirpath, _, filenames in os.walk(output_dir):
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            if path != variants_path and path not in listed:
+                path.unlink()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure alternative codecs for the model files and publish the best variants.")
+    parser.add_argument("models_dir", type=Path, help="models/ directory of a firefox-translations-models checkout")
+    parser.add_argument("languages", nargs="*", help="only the files of these languages (default: all)")
+    parser.add_argument("--tessdata-path", type=Path, help="also measure the .traineddata files in this directory")
+    parser.add_argument("--codecs", help=f"comma-separated codec:level list (default: those installed of {','.join(DEFAULT_CODECS)})")
+    parser.add_argument("--bandwidth-mbps", default=DEFAULT_BANDWIDTH_MBPS, type=float,
+                        help="download speed in megabits per second the install time is estimated for")
+    parser.add_argument("--min-saving", default=DEFAULT_MIN_SAVING, type=float, help="smallest fraction of the .gz size a variant must save")
+    parser.add_argument("--jobs", default=1, type=int, help="files measured at once, each on one core; more is faster but noisier")
+    parser.add_argument("--output-dir", type=Path, help="write the chosen variants and variants.json here")
+    parser.add_argument("--report", type=Path, help="write the measurements as JSON")
+    args = parser.parse_args()
+
+    if args.codecs:
+        specs = args.codecs.split(",")
+    else:
+        specs = [spec for spec in DEFAULT_CODECS if spec.partition(":")[0] in model_codecs.CODECS]
+    try:
+        for spec in specs:
+            model_codecs.parse_codec(spec)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    for lang_code in args.languages:
+        if lang_code not in generate.LANGUAGE_NAMES:
+            print(f"Error: Unsupported language code '{lang_code}'")
+            sys.exit(1)
+    if not args.models_dir.is_dir():
+        print(f"Error: {args.models_dir} is not a directory")
+        sys.exit(1)
+
+    files = source_files(args.models_dir, args.languages, args.tessdata_path)
+    bandwidth = args.bandwidth_mbps * 1e6 / 8
+    print(f"Measuring {len(files)} files with {', '.join(specs)}")
+    results = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        for source, result in zip(files, executor.map(measure_file, files, [specs] * len(files), [bandwidth] * len(files),
+                                                      [args.min_saving] * len(files), [args.output_dir] * len(files))):
+            if result is None:
+                print(f"Skipping {source.path}: git-lfs pointer, run `git lfs pull`")
+                continue
+            chosen = result['chosen']
+            print(f"{source.path.name}: {result['served_bytes']} bytes served"
+                  + (f", {chosen['spec']} {chosen['size_bytes']} bytes" if chosen else ""))
+            results.append(result)
+    if not results:
+        print("Error: Nothing to measure")
+        sys.exit(1)
+
+    models = [result for result in results if result['key'] is not None]
+    tessdata = [result for result in results if result['key'] is None]
+    for name, group in (("Models, vocabs and lexical shortlists", models), ("Tessdata", tessdata)):
+        if group:
+            print(f"\n{name} ({len(group)} files, install time at {args.bandwidth_mbps:g} Mbps on one core):")
+            print_table(group, specs, bandwidth)
+
+    chosen = [result for result in models if result['chosen']]
+    if models:
+        served = sum(result['served_bytes'] for result in models)
+        size = sum(result['chosen']['size_bytes'] if result['chosen'] else result['served_bytes'] for result in models)
+        served_install = sum(result['served_install_seconds'] for result in models)
+        install = sum(result['chosen']['install_seconds'] if result['chosen'] else result['served_install_seconds'] for result in models)
+        counts: Dict[str, int] = {}
+        for result in chosen:
+            counts[result['chosen']['spec']] = counts.get(result['chosen']['spec'], 0) + 1
+        print(f"\nVariants for {len(chosen)} of {len(models)} model files ({', '.join(f'{spec} x{count}' for spec, count in sorted(counts.items()))}): "
+              f"{size / 1024 ** 2:.1f} MB instead of {served / 1024 ** 2:.1f} MB ({size / served - 1:+.1%}), "
+              f"install {install:.1f} s instead of {served_install:.1f} s")
+
+    if args.output_dir:
+        try:
+            publish(models, args.output_dir)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"Wrote {len(chosen)} variants to {args.output_dir}")
+
+    if args.report:
+        report = {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'commit': subprocess.run(["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent,
+                                     stdout=subprocess.PIPE, text=True).stdout.strip(),
+            'parameters': {'codecs': specs, 'bandwidth_mbps': args.bandwidth_mbps, 'min_saving': args.min_saving,
+                           'languages': args.languages, 'jobs': args.jobs},
+            'results': [
+                dict(result, chosen={key: value for key, value in result['chosen'].items() if key != 'tmp_path'} if result['chosen'] else None)
+                for result in results
+            ],
+        }
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Check an existing offline tree (bin/ and tesseract/tessdata/, see
+OFFLINE_SETUP.md) against what it should contain and fetch only what is
+missing or corrupt, like rsync would.
+
+What the tree should contain is the download plan of its languages: those
+given on the command line, or by default the ones it already has models
+for, in the quality of the index entry their model matches (--quality when
+there is no index or none matches). Files are checked in parallel:
+  - model files against the uncompressed size and SHA-256 listed in an
+    index.json from indexer.py (--index), hashed through mmap; without an
+    index they are only checked for being there and non-empty,
+  - tessdata and extra files against the sizes in data/<COMMIT>.json, or
+    the Content-Length the server answers a HEAD request with. Files whose
+    size can't be told either way are reported as unverifiable.
+Outdated model files are upgraded like `download.py --index` does, through
+a delta patch when the index has one. Corrupt files bypass the download
+cache, and every fetched file is checked again; sync fails if one still
+doesn't match. With --delete, files the plan doesn't
+list (languages no longer wanted, leftovers of aborted transfers) are removed.
+
+Usage: python sync.py translator_models [<lang>[:<quality>] ...] [--index index.json] [--delete] [--dry-run]
+"""
+import generate
+from download import (DEFAULT_JOBS, BaseUrls, DownloadJob, HTTPStatusError, content_length, directions_for_languages,
+                      execute_plan, load_file_sizes, load_index, plan_downloads, print_plan)
+from download_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, DownloadCache, parse_size, sha256_mmap
+import argparse
+import http.client
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+MODEL_RE = re.compile(r"model\.([a-z]{2})([a-z]{2})\.intgemm\.alphas\.bin")
+# Where the tree keeps files; anything else in the output directory is left alone
+SYNCED_DIRS = ("bin", "tesseract/tessdata")
+# What check_file() reports for a file it has nothing to check against
+UNVERIFIABLE = "unverifiable"
+
+def installed_models(output_dir: Path) -> Dict[Tuple[str, str], Path]:
+    """The model file of every (src, tgt) direction in the tree's bin/."""
+    bin_dir = output_dir / "bin"
+    if not bin_dir.is_dir():
+        return {}
+    models = {}
+    for entry in sorted(os.scandir(bin_dir), key=lambda entry: entry.name):
+        match = MODEL_RE.fullmatch(entry.name)
+        if match:
+            models[(match.group(1), match.group(2))] = Path(entry.path)
+    return models
+
+def installed_directions(models: Dict[Tuple[str, str], Path], quality: str,
+                         index: Optional[Dict[str, dict]] = None) -> List[Tuple[str, str, str]]:
+    """
+    (src, tgt, quality) of every installed model. The quality is that of the
+    model's index entry when the file on disk has the size it lists, and
+    `quality` otherwise.
+    """
+    directions = []
+    for (src, tgt), model_path in models.items():
+        entry = (index or {}).get(model_path.name)
+        if entry is not None and 'uncompressed_size' in entry and model_path.stat().st_size == entry['uncompressed_size']:
+            directions.append((src, tgt, entry['url'].rsplit("/", 3)[1]))
+        else:
+            directions.append((src, tgt, quality))
+    return directions
+
+def index_url(entry: dict, base_urls: BaseUrls) -> str:
+    """
+    The URL of an index entry; the index pins a commit per file, so it is
+    only moved to another server when a translation base URL was given.
+    """
+    if base_urls.translation == generate.TRANSLATION_BASE_URL:
+        return entry['url']
+    quality, pair, filename = entry['url'].rsplit("/", 3)[1:]
+    return f"{base_urls.translation}/{quality}/{pair}/{filename}"
+
+def job_urls(job: DownloadJob, index: Optional[Dict[str, dict]]) -> List[str]:
+    """Every URL `job` may be fetched from: its own and those of the variants its index entry lists."""
+    entry = (index or {}).get(job.output_path.name)
+    return [job.url] + [variant['url'] for variant in (entry or {}).get('variants', []) if job.decompress]
+
+def check_file(job: DownloadJob, entry: Optional[dict], verify_hashes: bool) -> Optional[str]:
+    """
+    Why `job.output_path` needs fetching again, UNVERIFIABLE if there is no
+    size to check a raw file against, or None if it is fine.
+    """
+    try:
+        size = job.output_path.stat().st_size
+    except FileNotFoundError:
+        return "missing"
+    if size == 0:
+        return "empty"
+    if job.decompress:
+        if entry is None or 'sha256' not in entry:
+            return None
+        if size != entry['uncompressed_size']:
+            return f"size {size}, expected {entry['uncompressed_size']}"
+        if verify_hashes and sha256_mmap(job.output_path) != entry['sha256']:
+            return "hash mismatch"
+        return None
+    # Raw files are stored as they are served
+    expected = job.size
+    if expected is None:
+        try:
+            expected = content_length(job.url)
+        except (HTTPStatusError, http.client.HTTPException, OSError):
+            expected = None
+    if expected is None:
+        return UNVERIFIABLE
+    if size != expected:
+        return f"size {size}, expected {expected}"
+    return None
+
+def verify(plan: List[DownloadJob], index: Optional[Dict[str, dict]], verify_hashes: bool = True,
+           jobs: int = DEFAULT_JOBS) -> Dict[Path, str]:
+    """
+    Check every file of `plan` in parallel; returns the output paths that
+    need a fetch or are UNVERIFIABLE, with the reason.
+    """
+    index = index or {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(lambda job: check_file(job, index.get(job.output_path.name), verify_hashes), plan)
+        return {job.output_path: reason for job, reason in zip(plan, results) if reason is not None}
+
+def stale_files(output_dir: Path, plan: List[DownloadJob]) -> List[Path]:
+    """
+    Files under the synced directories that `plan` doesn't produce. The
+    `.part` state of a planned file is kept so its transfer can resume.
+    """
+    expected = {job.output_path for job in plan}
+    for job in plan:
+        part_path = job.output_path.with_name(job.output_path.name + ".part")
+        expected |= {part_path, part_path.with_name(part_path.name + ".json")}
+    stale = []
+    for subdir in SYNCED_DIRS:
+        directory = output_dir / subdir
+        if not directory.is_dir():
+            continue
+        for entry in os.scandir(directory):
+            path = Path(entry.path)
+            if entry.is_file(follow_symlinks=False) and path not in expected:
+                stale.append(path)
+    return sorted(stale)
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify an offline model tree and fetch only what is missing or corrupt.")
+    parser.add_argument("output_dir", type=Path, help="the tree to sync, laid out like OFFLINE_SETUP.md describes")
+    parser.add_argument("languages", nargs="*", help="language codes, optionally with a quality (default: the languages the tree has models for)")
+    parser.add_argument("--quality", default="base", choices=generate.QUALITIES, help="quality for languages without one")
+    parser.add_argument("--index", help="index.json or sharded index manifest.json (path or URL) from indexer.py, with the hashes to check model files against")
+    parser.add_argument("--quick", action="store_true", help="only compare sizes, don't hash")
+    parser.add_argument("--delete", action="store_true", help="delete files the tree shouldn't contain")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would change")
+    parser.add_argument("--jobs", default=DEFAULT_JOBS, type=int, help="files checked and downloaded at once")
+    parser.add_argument("--translation-base-url", default=generate.TRANSLATION_BASE_URL)
+    parser.add_argument("--tesseract-base-url", default=generate.TESSERACT_BASE_URL)
+    parser.add_argument("--dictionary-base-url", default=generate.DICTIONARY_BASE_URL)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, type=Path)
+    parser.add_argument("--cache-size", default=DEFAULT_MAX_BYTES, type=parse_size, help="cache budget, e.g. 500M or 10G")
+    parser.add_argument("--no-cache", action="store_true", help="always fetch from the network")
+    args = parser.parse_args()
+
+    for spec in args.languages:
+        lang_code, _, quality = spec.partition(":")
+        if lang_code not in generate.LANGUAGE_NAMES:
+            print(f"Error: Unsupported language code '{lang_code}'")
+            sys.exit(1)
+        if quality and quality not in generate.QUALITIES:
+            print(f"Error: Unknown quality '{quality}', expected one of {generate.QUALITIES}")
+            sys.exit(1)
+    models = {} if args.languages else installed_models(args.output_dir)
+    if not args.languages and not models:
+        print(f"Error: No models in {args.output_dir / 'bin'}, pass the languages to sync")
+        sys.exit(1)
+    languages = {spec.partition(":")[0] for spec in args.languages} | {lang for pair in models for lang in pair}
+    try:
+        index = load_index(args.index, sorted(languages)) if args.index else None
+    except (OSError, ValueError, HTTPStatusError) as e:
+        print(f"Error: Could not load index {args.index}: {e}")
+        sys.exit(1)
+    if args.languages:
+        directions = directions_for_languages(args.languages, args.quality)
+    else:
+        directions = installed_directions(models, args.quality, index)
+        print("Installed: " + ", ".join(f"{src}{tgt} ({quality})" for src, tgt, quality in directions))
+
+    base_urls = BaseUrls(args.translation_base_url, args.tesseract_base_url, args.dictionary_base_url)
+    try:
+        # Sizes recorded for another commit would flag good files as corrupt
+        plan = plan_downloads(directions, args.output_dir, base_urls, sizes=load_file_sizes(fallback=False)[0])
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if index is not None:
+        # The index pins the exact version (and so the URL) of each model file
+        plan = [
+            job._replace(url=index_url(index[job.output_path.name], base_urls), size=index[job.output_path.name]['size_bytes'])
+            if job.decompress and job.output_path.name in index else job
+            for job in plan
+        ]
+
+    print(f"Checking {len(plan)} files in {args.output_dir}")
+    wrong = verify(plan, index, verify_hashes=not args.quick, jobs=args.jobs)
+    unverifiable = sorted(path for path, reason in wrong.items() if reason == UNVERIFIABLE)
+    wrong = {path: reason for path, reason in wrong.items() if reason != UNVERIFIABLE}
+    for path, reason in sorted(wrong.items()):
+        print(f"{'Missing' if reason == 'missing' else 'Corrupt'} {path.relative_to(args.output_dir)}" + ("" if reason == "missing" else f" ({reason})"))
+    for path in unverifiable:
+        print(f"Unverifiable {path.relative_to(args.output_dir)} (no known size)")
+    stale = stale_files(args.output_dir, plan) if args.delete else []
+    for path in stale:
+        print(f"Stale {path.relative_to(args.output_dir)}")
+
+    fetch = [job for job in plan if job.output_path in wrong]
+    print(f"{len(plan) - len(wrong) - len(unverifiable)} files up to date, {len(unverifiable)} unverifiable, "
+          f"{len(fetch)} to fetch, {len(stale)} to delete")
+    print_plan(fetch, args.output_dir, verbose=False)
+    if args.dry_run:
+        return
+
+    for path in stale:
+        path.unlink()
+    if not fetch:
+        return
+    cache = None if args.no_cache else DownloadCache(args.cache_dir, args.cache_size)
+    if cache is not None:
+        # The cache is keyed by URL and would hand the same bad bytes back
+        for job in fetch:
+            if wrong[job.output_path] != "missing":
+                for url in job_urls(job, index):
+                    cache.discard(url)
+    failed = execute_plan(fetch, args.jobs, cache, index)
+    fetched = [job for job in fetch if job not in failed]
+    still_wrong = {path: reason for path, reason in verify(fetched, index, jobs=args.jobs).items() if reason != UNVERIFIABLE}
+    for job in fetched:
+        if job.output_path in still_wrong:
+            print(f"Still corrupt after fetching {job.output_path.relative_to(args.output_dir)} ({still_wrong[job.output_path]})")
+            for url in job_urls(job, index) if cache is not None else []:
+                cache.discard(url)
+    if cache is not None:
+        cache.close()
+    if failed:
+        print(f"{len(failed)} downloads failed")
+    if failed or still_wrong:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
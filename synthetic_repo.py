@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Build a fake firefox-translations-models git repository, laid out like the
+real one (models/<quality>/<pair>/<file>.gz), at any scale: number of
+languages, qualities per direction, extra files per pair directory and
+commits. Used by bench_scaling.py to see how the tooling copes with a repo
+much larger than today's.
+
+Files are small valid gzip streams, distinct per file and version, so
+indexer.py can hash them. The first commit adds every pair directory; each
+later one rewrites the model of a few random pairs, like a model update
+upstream, so the last commit touching some directories is deep in the
+history. The history is written with `git fast-import`, which takes seconds
+even for tens of thousands of commits.
+
+The first languages are real ones, so a repo of up to 50 languages works
+with generate.py as is. Beyond that, two-letter codes unknown to generate.py
+are used; register_languages() adds them to its tables in the current
+process.
+
+Usage: python synthetic_repo.py <output_dir> [--scale 10] [--languages 420] [--qualities-per-pair 2]
+                                [--extra-files 0] [--commits 3000] [--tessdata-dir <dir>]
+"""
+import generate
+import argparse
+import gzip
+import hashlib
+import random
+import string
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, IO, List, NamedTuple, Set
+
+# Roughly upstream today (data/<COMMIT>.json): languages besides English,
+# qualities per direction and commits touching models/
+TODAY_LANGUAGES = 42
+TODAY_QUALITIES_PER_PAIR = 2
+TODAY_COMMITS = 300
+FILES_PER_PAIR = 4
+DEFAULT_FILE_SIZE = 1024  # uncompressed bytes
+START_TIMESTAMP = 1672531200  # 2023-01-01
+COMMIT_INTERVAL = 3600  # seconds
+
+class RepoShape(NamedTuple):
+    languages: int
+    qualities_per_pair: int
+    extra_files: int
+    commits: int
+
+def scale_shape(scale: float) -> RepoShape:
+    """
+    Today's repo multiplied by `scale`. Pairs are four letters, so languages
+    run out at 675; past that the number of files is kept growing with
+    extra files per pair directory.
+    """
+    languages = min(max(round(TODAY_LANGUAGES * scale), 1), max_languages())
+    files_per_dir = FILES_PER_PAIR * TODAY_LANGUAGES * scale / languages
+    return RepoShape(languages, TODAY_QUALITIES_PER_PAIR, max(round(files_per_dir) - FILES_PER_PAIR, 0),
+                     max(round(TODAY_COMMITS * scale), 1))
+
+def max_languages() -> int:
+    return 26 * 26 - 1
+
+def language_codes(count: int) -> List[str]:
+    """The real language codes first, then made up ones."""
+    real = sorted(code for code in generate.LANGUAGE_NAMES if code != 'en')
+    made_up = [a + b for a in string.ascii_lowercase for b in string.ascii_lowercase
+               if a + b not in generate.LANGUAGE_NAMES and a + b != 'en']
+    if count > len(real) + len(made_up):
+        raise ValueError(f"At most {len(real) + len(made_up)} languages fit in two-letter codes, not {count}")
+    return (real + made_up)[:count]
+
+def tess_name(code: str) -> str:
+    return generate.TESSERACT_LANGUAGE_MAPPINGS.get(code, f"syn_{code}")
+
+def register_languages(codes: List[str]):
+    """Make generate.py (and everything importing its tables) accept made up codes."""
+    for code in codes:
+        if code not in generate.LANGUAGE_NAMES:
+            generate.LANGUAGE_NAMES[code] = f"Synthetic {code.upper()}"
+            generate.LANGUAGE_SCRIPTS[code] = 'Latin'
+            generate.TESSERACT_LANGUAGE_MAPPINGS[code] = tess_name(code)
+
+def pair_directories(codes: List[str], qualities_per_pair: int, rng: random.Random) -> Dict[str, Set[str]]:
+    """pair -> qualities it is available in; both directions of every language."""
+    qualities_per_pair = min(qualities_per_pair, len(generate.QUALITIES))
+    return {
+        pair: set(rng.sample(generate.QUALITIES, qualities_per_pair))
+        for code in codes
+        for pair in (f"{code}en", f"en{code}")
+    }
+
+def pair_files(pair: str, extra_files: int) -> List[str]:
+    """Names of the files in a pair directory, without .gz."""
+    files = sorted(set(generate.generate_files_for_language(pair[:2], pair[2:]).values()))
+    return files + [f"extra.{i}.{pair}.bin" for i in range(extra_files)]
+
+def file_contents(path: str, version: int, size: int) -> bytes:
+    block = hashlib.sha256(f"{path}@{version}".encode()).digest()
+    return gzip.compress((block * (size // len(block) + 1))[:size], mtime=0)
+
+def write_blob(stream: IO[bytes], data: bytes):
+    stream.write(b"data %d\n" % len(data))
+    stream.write(data)
+    stream.write(b"\n")
+
+def write_commit(stream: IO[bytes], number: int, message: str, changes: Dict[str, bytes]):
+    timestamp = START_TIMESTAMP + number * COMMIT_INTERVAL
+    stream.write(b"commit refs/heads/main\n")
+    stream.write(b"mark :%d\n" % (number + 1))
+    stream.write(b"committer Synthetic <synthetic@example.com> %d +0000\n" % timestamp)
+    write_blob(stream, message.encode())
+    if number > 0:
+        stream.write(b"from :%d\n" % number)
+    for path, data in changes.items():
+        stream.write(f"M 100644 inline {path}\n".encode())
+        write_blob(stream, data)
+
+def build_repo(repo_path: Path, shape: RepoShape, touch_per_commit: int = 2, file_size: int = DEFAULT_FILE_SIZE,
+               seed: int = 0) -> dict:
+    """Create the repository at `repo_path`, which must not exist yet; returns what it holds."""
+    rng = random.Random(seed)
+    codes = language_codes(shape.languages)
+    directories = pair_directories(codes, shape.qualities_per_pair, rng)
+    repo_path.mkdir(parents=True)
+    subprocess.run(["git", "init", "-q"], cwd=repo_path, check=True)
+    subprocess.run(["git", "symbolic-ref", "HEAD", "refs/heads/main"], cwd=repo_path, check=True)
+
+    started = time.monotonic()
+    model_dirs = sorted((quality, pair) for pair, qualities in directories.items() for quality in qualities)
+    files = 0
+    with subprocess.Popen(["git", "fast-import", "--quiet"], cwd=repo_path, stdin=subprocess.PIPE) as proc:
+        initial = {}
+        for quality, pair in model_dirs:
+            for filename in pair_files(pair, shape.extra_files):
+                path = f"models/{quality}/{pair}/{filename}.gz"
+                initial[path] = file_contents(path, 0, file_size)
+        files = len(initial)
+        write_commit(proc.stdin, 0, "Add models", initial)
+        for number in range(1, shape.commits):
+            changes = {}
+            for quality, pair in rng.sample(model_dirs, min(touch_per_commit, len(model_dirs))):
+                path = f"models/{quality}/{pair}/model.{pair}.intgemm.alphas.bin.gz"
+                changes[path] = file_contents(path, number, file_size)
+            write_commit(proc.stdin, number, f"Update {', '.join(sorted(changes))}", changes)
+        proc.stdin.close()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, "git fast-import")
+    subprocess.run(["git", "reset", "-q", "--hard"], cwd=repo_path, check=True)
+    return {
+        'languages': len(codes),
+        'pair_dirs': len(model_dirs),
+        'files': files,
+        'commits': shape.commits,
+        'seconds': time.monotonic() - started,
+    }
+
+def build_tessdata(tessdata_path: Path, codes: List[str], file_size: int = DEFAULT_FILE_SIZE):
+    """A traineddata file for every language and English, as the 'local' size provider reads them."""
+    tessdata_path.mkdir(parents=True, exist_ok=True)
+    for code in codes + ['en']:
+        (tessdata_path / f"{tess_name(code)}.traineddata").write_bytes(b"\0" * file_size)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a synthetic firefox-translations-models repository.")
+    parser.add_argument("output_dir", type=Path)
+    parser.add_argument("--scale", type=float, help="today's repo times this; --languages, --extra-files and --commits override parts of it")
+    parser.add_argument("--languages", type=int, help=f"languages besides English (default {TODAY_LANGUAGES})")
+    parser.add_argument("--qualities-per-pair", type=int, help=f"qualities each direction is available in (default {TODAY_QUALITIES_PER_PAIR})")
+    parser.add_argument("--extra-files", type=int, help="files added to every pair directory besides model, vocab and lex")
+    parser.add_argument("--commits", type=int, help=f"commits in the history (default {TODAY_COMMITS})")
+    parser.add_argument("--touch-per-commit", default=2, type=int, help="pair directories changed by every commit after the first")
+    parser.add_argument("--file-size", default=DEFAULT_FILE_SIZE, type=int, help="uncompressed bytes per file")
+    parser.add_argument("--seed", default=0, type=int)
+    parser.add_argument("--tessdata-dir", type=Path, help="also write a traineddata file per language here")
+    args = parser.parse_args()
+
+    shape = scale_shape(args.scale) if args.scale else RepoShape(TODAY_LANGUAGES, TODAY_QUALITIES_PER_PAIR, 0, TODAY_COMMITS)
+    shape = RepoShape(
+        args.languages if args.languages is not None else shape.languages,
+        args.qualities_per_pair if args.qualities_per_pair is not None else shape.qualities_per_pair,
+        args.extra_files if args.extra_files is not None else shape.extra_files,
+        args.commits if args.commits is not None else shape.commits,
+    )
+    if args.output_dir.exists():
+        print(f"Error: {args.output_dir} already exists")
+        sys.exit(1)
+    try:
+        stats = build_repo(args.output_dir, shape, args.touch_per_commit, args.file_size, args.seed)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if args.tessdata_dir:
+        build_tessdata(args.tessdata_dir, language_codes(shape.languages), args.file_size)
+    print(f"Built {args.output_dir}: {stats['languages']} languages, {stats['pair_dirs']} pair directories, "
+          f"{stats['files']} files, {stats['commits']} commits in {stats['seconds']:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+One entry point for the Python tooling: `python tools.py <command> [args]`
+runs the script of that name with the remaining arguments, exactly as
+running the script itself would.
+
+Nothing is imported before the command is known, and the scripts only load
+their heavy parts (aiohttp and asyncio for HTTP size lookups, the system CA
+store for the first HTTPS connection, the scan of the
+firefox-translations-models checkout in indexer.py) when the command actually
+gets to them, so quick operations like `download --dry-run` start in
+milliseconds. bench_startup.py measures it.
+
+Usage: python tools.py <command> [args]
+       python tools.py <command> --help
+"""
+import importlib
+import sys
+
+# command -> (module, summary)
+COMMANDS = {
+    'generate': ('generate', "write catalog.json and Language.kt from a models checkout"),
+    'index': ('indexer', "build index.json (and sharded manifests) with hashes and delta patches"),
+    'download': ('download', "fetch models and tessdata for an offline tree"),
+    'sync': ('sync', "verify an offline tree and fetch only what is missing or corrupt"),
+    'budget': ('budget', "pick per-direction qualities that fit a storage budget"),
+    'packs': ('packs', "build and unpack single-file language packs"),
+    'mirror': ('mirror', "serve local checkouts as a LAN mirror"),
+    'dedupe': ('dedupe', "turn identical files into reflinks or hardlinks"),
+    'recompress': ('recompress', "measure other codecs for the models and publish the best variants"),
+}
+
+def usage() -> str:
+    width = max(len(command) for command in COMMANDS)
+    lines = ["usage: tools.py <command> [args]", "", "commands:"]
+    lines += [f"  {command:{width}}  {summary}" for command, (_, summary) in COMMANDS.items()]
+    lines += ["", "Run `tools.py <command> --help` for the options of a command."]
+    return "\n".join(lines)
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] in ('-h', '--help'):
+        print(usage())
+        return
+    command, rest = args[0], args[1:]
+    if command not in COMMANDS:
+        print(f"Error: Unknown command '{command}', expected one of {list(COMMANDS)}")
+        sys.exit(1)
+    module = importlib.import_module(COMMANDS[command][0])
+    # argparse takes the program name from argv[0]
+    sys.argv = [f"tools.py {command}", *rest]
+    module.main()
+
+if __name__ == "__main__":
+    main()
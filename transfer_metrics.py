@@ -0,0 +1,214 @@
+"""
+Per-file timings and counters for download.py: time to first byte, transfer
+time and rate, retries, time spent gunzipping into place and bytes received
+and written. Records can be written as JSON lines and are summarized at the
+end of a run; live progress with an ETA is shown from the sizes known in
+advance (data/<COMMIT>.json or a local checkout).
+
+download.py reports into the record of the file the current thread is
+working on (see current()), so the download code doesn't have to pass it
+around and does nothing extra when no metrics are being collected.
+"""
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    import cProfile
+
+PROGRESS_INTERVAL = 1.0  # seconds
+
+_current = threading.local()
+
+@dataclass
+class TransferRecord:
+    url: str
+    path: str
+    # Bytes on the wire, when known in advance
+    expected_bytes: Optional[int] = None
+    # downloaded, cached, patched, up-to-date or failed
+    outcome: str = "downloaded"
+    error: Optional[str] = None
+    # Seconds from sending the (last) request to its first body byte
+    ttfb: Optional[float] = None
+    # Seconds spent fetching, retries and their backoff included
+    transfer_seconds: float = 0.0
+    bytes_received: int = 0
+    # Bytes already on disk from an earlier, interrupted transfer
+    resumed_from: int = 0
+    retries: int = 0
+    # Seconds spent gunzipping (or copying) into place
+    install_seconds: float = 0.0
+    bytes_written: int = 0
+    total_seconds: float = 0.0
+
+    def rate(self) -> Optional[float]:
+        """Bytes per second over the wire."""
+        return self.bytes_received / self.transfer_seconds if self.transfer_seconds else None
+
+    def to_json(self) -> dict:
+        return dict(asdict(self), rate=self.rate())
+
+def current() -> Optional[TransferRecord]:
+    """The record of the file this thread is downloading, None when not collecting metrics."""
+    return getattr(_current, 'record', None)
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+class TransferMetrics:
+    def __init__(self, jsonl_path: Optional[Path] = None, progress: bool = False, profile_path: Optional[Path] = None):
+        self.jsonl_path = jsonl_path
+        self.jsonl = open(jsonl_path, 'a') if jsonl_path else None
+        self.profile_path = profile_path
+        self.profiles: List['cProfile.Profile'] = []
+        self.records: List[TransferRecord] = []
+        self.active: List[TransferRecord] = []
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.expected_files = 0
+        self.expected_bytes = 0
+
+        self.progress_stop = threading.Event()
+        self.progress_thread = None
+        if progress:
+            self.progress_thread = threading.Thread(target=self._show_progress, daemon=True)
+            self.progress_thread.start()
+
+    def expect(self, files: int, total_bytes: int):
+        """Announce the files about to be fetched, for progress and ETA."""
+        with self.lock:
+            self.expected_files += files
+            self.expected_bytes += total_bytes
+
+    @contextmanager
+    def track(self, url: str, output_path: Path, expected_bytes: Optional[int] = None) -> Iterator[TransferRecord]:
+        """Collect the metrics of one file fetched by the current thread."""
+        record = TransferRecord(url, str(output_path), expected_bytes)
+        with self.lock:
+            self.active.append(record)
+        profile = self._thread_profile()
+        _current.record = record
+        started = time.monotonic()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield record
+        except BaseException as e:
+            record.outcome = "failed"
+            record.error = str(e) or type(e).__name__
+            raise
+        finally:
+            if profile is not None:
+                profile.disable()
+            record.total_seconds = time.monotonic() - started
+            _current.record = None
+            with self.lock:
+                self.active.remove(record)
+                self.records.append(record)
+                if self.jsonl is not None:
+                    self.jsonl.write(json.dumps(record.to_json()) + "\n")
+                    self.jsonl.flush()
+
+    def _thread_profile(self) -> Optional['cProfile.Profile']:
+        """
+        cProfile only sees the thread it is enabled in, so each download
+        thread gets its own profiler; they are merged in close().
+        """
+        if self.profile_path is None:
+            return None
+        profile = getattr(_current, 'profile', None)
+        if profile is None:
+            import cProfile
+            profile = _current.profile = cProfile.Profile()
+            with self.lock:
+                self.profiles.append(profile)
+        return profile
+
+    def _progress_line(self) -> str:
+        with self.lock:
+            done = len(self.records)
+            received = sum(record.bytes_received for record in self.records + self.active)
+            # Files served from the cache or already up to date count as done
+            accounted = sum(
+                record.expected_bytes or record.bytes_received
+                for record in self.records if record.outcome != "failed"
+            ) + sum(record.bytes_received for record in self.active)
+        elapsed = time.monotonic() - self.started
+        rate = received / elapsed if elapsed else 0
+        line = f"{done}/{self.expected_files} files, {accounted / 1024 ** 2:.1f}/{self.expected_bytes / 1024 ** 2:.1f} MB, {rate / 1024 ** 2:.1f} MB/s"
+        remaining = self.expected_bytes - accounted
+        if rate > 0 and remaining > 0:
+            line += f", ETA {format_duration(remaining / rate)}"
+        return line
+
+    def _show_progress(self):
+        tty = sys.stderr.isatty()
+        while not self.progress_stop.wait(PROGRESS_INTERVAL):
+            line = self._progress_line()
+            if tty:
+                sys.stderr.write(f"\r\033[K{line}")
+            else:
+                sys.stderr.write(f"{line}\n")
+            sys.stderr.flush()
+        if tty:
+            sys.stderr.write("\r\033[K")
+
+    def summary(self) -> dict:
+        records = self.records
+        fetched = [record for record in records if record.ttfb is not None]
+        ttfbs = sorted(record.ttfb for record in fetched)
+        received = sum(record.bytes_received for record in records)
+        transfer_seconds = sum(record.transfer_seconds for record in records)
+        outcomes = {}
+        for record in records:
+            outcomes[record.outcome] = outcomes.get(record.outcome, 0) + 1
+        return {
+            'files': len(records),
+            'outcomes': outcomes,
+            'wall_seconds': time.monotonic() - self.started,
+            'bytes_received': received,
+            'bytes_written': sum(record.bytes_written for record in records),
+            'retries': sum(record.retries for record in records),
+            'ttfb_median': ttfbs[len(ttfbs) // 2] if ttfbs else None,
+            'ttfb_max': ttfbs[-1] if ttfbs else None,
+            # Per connection, not aggregate: parallel transfers overlap
+            'rate': received / transfer_seconds if transfer_seconds else None,
+            'transfer_seconds': transfer_seconds,
+            'install_seconds': sum(record.install_seconds for record in records),
+        }
+
+    def print_summary(self, slowest: int = 5):
+        summary = self.summary()
+        outcomes = ", ".join(f"{count} {outcome}" for outcome, count in sorted(summary['outcomes'].items()))
+        print(f"Transfers: {summary['files']} files ({outcomes}) in {summary['wall_seconds']:.1f} s")
+        print(f"  received {summary['bytes_received'] / 1024 ** 2:.1f} MB, wrote {summary['bytes_written'] / 1024 ** 2:.1f} MB, {summary['retries']} retries")
+        if summary['ttfb_median'] is not None:
+            print(f"  time to first byte: median {summary['ttfb_median'] * 1000:.0f} ms, max {summary['ttfb_max'] * 1000:.0f} ms")
+        if summary['rate'] is not None:
+            print(f"  per-connection rate {summary['rate'] / 1024 ** 2:.1f} MB/s")
+        print(f"  time in transfers {summary['transfer_seconds']:.1f} s, in decompression and install {summary['install_seconds']:.1f} s")
+        for record in sorted(self.records, key=lambda record: record.total_seconds, reverse=True)[:slowest]:
+            rate = f"{record.rate() / 1024 ** 2:.1f} MB/s" if record.rate() else "-"
+            ttfb = f"{record.ttfb * 1000:.0f} ms" if record.ttfb is not None else "-"
+            print(f"  {record.total_seconds:6.1f} s  {Path(record.path).name}  (ttfb {ttfb}, {rate}, install {record.install_seconds:.1f} s)")
+
+    def close(self):
+        if self.progress_thread is not None:
+            self.progress_stop.set()
+            self.progress_thread.join()
+        if self.jsonl is not None:
+            self.jsonl.close()
+        if self.profile_path is not None and self.profiles:
+            import pstats
+            stats = pstats.Stats(*self.profiles)
+            stats.dump_stats(self.profile_path)
+            print(f"Wrote profile to {self.profile_path}; top functions by cumulative time:")
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(15)
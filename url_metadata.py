@@ -0,0 +1,118 @@
+"""
+What HEAD requests said about each URL (size, ETag, Last-Modified, status
+and when), so that repeated generate.py runs don't ask again:
+  - an answer younger than the TTL is used as is, without any request,
+  - an older one is revalidated with If-None-Match / If-Modified-Since, and
+    a 304 costs no more than a HEAD without a body,
+  - a failure is remembered too, and the URL isn't retried until a backoff
+    that doubles with every consecutive failure has passed, so a flaky or
+    missing file doesn't slow every run down. Meanwhile, a size seen before
+    the failures started is still used.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+DEFAULT_PATH = Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() / "offline-translator" / "url-metadata.json"
+DEFAULT_TTL = 24 * 3600  # seconds
+NEGATIVE_TTL = 15 * 60  # seconds, after the first failure
+MAX_NEGATIVE_TTL = 7 * 24 * 3600
+
+class UrlMetadataCache:
+    def __init__(self, path: Path = DEFAULT_PATH, ttl: float = DEFAULT_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        try:
+            with open(self.path, 'r') as f:
+                self.entries: Dict[str, dict] = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        self.counts = {'fresh': 0, 'not_modified': 0, 'fetched': 0, 'failed': 0, 'backing_off': 0}
+
+    def fresh_size(self, url: str) -> Optional[int]:
+        """The size of `url` if it was fetched successfully less than a TTL ago."""
+        entry = self.entries.get(url)
+        if entry is None or not entry.get('size') or time.time() - entry['fetched_at'] > self.ttl:
+            return None
+        self.counts['fresh'] += 1
+        return entry['size']
+
+    def backing_off(self, url: str) -> bool:
+        """Whether `url` failed recently enough that it shouldn't be asked again yet."""
+        entry = self.entries.get(url)
+        if entry is None or not entry.get('failures') or time.time() >= entry['retry_at']:
+            return False
+        self.counts['backing_off'] += 1
+        return True
+
+    def known_size(self, url: str) -> Optional[int]:
+        """The last size seen for `url`, however old."""
+        entry = self.entries.get(url)
+        return entry.get('size') if entry is not None else None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        entry = self.entries.get(url)
+        if entry is None or not entry.get('size'):
+            return {}
+        if entry.get('etag'):
+            return {'If-None-Match': entry['etag']}
+        if entry.get('last_modified'):
+            return {'If-Modified-Since': entry['last_modified']}
+        return {}
+
+    def record_response(self, url: str, status: int, headers: Mapping[str, str]) -> int:
+        """
+        Update `url` from a HEAD response and return its size, 0 if the
+        response doesn't give one.
+        """
+        now = time.time()
+        entry = self.entries.get(url)
+        if status == 304 and entry is not None and entry.get('size'):
+            self.counts['not_modified'] += 1
+            entry['fetched_at'] = now
+            return entry['size']
+        content_length = headers.get('Content-Length')
+        if status != 200 or not content_length:
+            self.record_failure(url, f"HTTP {status}" if status != 200 else "no Content-Length", status)
+            return 0
+        self.counts['fetched'] += 1
+        self.entries[url] = {
+            'size': int(content_length),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'status': status,
+            'fetched_at': now,
+        }
+        return int(content_length)
+
+    def record_failure(self, url: str, error: str, status: Optional[int] = None):
+        """Remember that `url` couldn't be sized; a previously known size is kept."""
+        self.counts['failed'] += 1
+        now = time.time()
+        entry = self.entries.setdefault(url, {'size': None, 'fetched_at': now})
+        entry['failures'] = entry.get('failures', 0) + 1
+        entry['status'] = status
+        entry['error'] = error
+        entry['retry_at'] = now + min(NEGATIVE_TTL * 2 ** (entry['failures'] - 1), MAX_NEGATIVE_TTL)
+
+    def clear_failures(self, url: str):
+        entry = self.entries.get(url)
+        if entry is not None:
+            for key in ('failures', 'error', 'retry_at'):
+                entry.pop(key, None)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def print_stats(self):
+        counts = self.counts
+        requests = counts['not_modified'] + counts['fetched'] + counts['failed']
+        print(f"URL metadata: {counts['fresh']} fresh, {counts['not_modified']} revalidated (304), "
+              f"{counts['fetched']} fetched, {counts['failed']} failed, {counts['backing_off']} skipped while backing off; "
+              f"{requests} URLs asked")